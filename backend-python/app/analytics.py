@@ -0,0 +1,268 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from . import models
+from .database import read_engine
+
+# Seconds between incremental refreshes triggered by reads
+ANALYTICS_REFRESH_SECONDS = float(os.getenv("ANALYTICS_REFRESH_SECONDS", "30"))
+LOAD_BATCH_SIZE = 50000
+
+# Integer codes stand in for strings; -1 marks a missing value
+MISSING = -1
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Column arrays for orders, order items and products at one point in time"""
+    order_id: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    order_dc: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    order_status: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    order_day: np.ndarray = field(default_factory=lambda: np.empty(0, "datetime64[D]"))
+    item_id: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    item_order_id: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    item_product_id: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    item_quantity: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    item_revenue: np.ndarray = field(default_factory=lambda: np.empty(0, np.float64))
+    # Category code per product id (index), MISSING where unknown
+    product_category: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    statuses: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
+    center_names: Dict[int, str] = field(default_factory=dict)
+    # Derived on every refresh: item revenue summed per order row
+    order_revenue: np.ndarray = field(default_factory=lambda: np.empty(0, np.float64))
+    max_product_id: int = 0
+
+def _encode(values: List[Optional[str]], vocabulary: Tuple[str, ...]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Map strings to codes in a growing vocabulary, one dict lookup per distinct value"""
+    uniques, inverse = np.unique(np.array([value or "" for value in values], dtype=object), return_inverse=True)
+    vocabulary = list(vocabulary)
+    positions = {value: code for code, value in enumerate(vocabulary)}
+    mapping = np.empty(len(uniques), np.int64)
+    for index, value in enumerate(uniques):
+        if value not in positions:
+            positions[value] = len(vocabulary)
+            vocabulary.append(value)
+        mapping[index] = positions[value]
+    return mapping[inverse].reshape(-1), tuple(vocabulary)
+
+def _int_column(values: list, missing: int = MISSING) -> np.ndarray:
+    """Integer array with NULLs replaced by a sentinel (via float, where None becomes NaN)"""
+    column = np.array(values, np.float64)
+    column[np.isnan(column)] = missing
+    return column.astype(np.int64)
+
+def _fetch_columns(conn, query, count: int) -> List[list]:
+    columns = [[] for _ in range(count)]
+    for rows in conn.execution_options(yield_per=LOAD_BATCH_SIZE).execute(query).partitions():
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+    return columns
+
+def _order_revenue(snapshot: Snapshot) -> np.ndarray:
+    """Sum item revenue onto order rows; order ids are kept sorted, so items find theirs by binary search"""
+    if not len(snapshot.order_id) or not len(snapshot.item_order_id):
+        return np.zeros(len(snapshot.order_id))
+    rows = np.searchsorted(snapshot.order_id, snapshot.item_order_id)
+    rows = np.minimum(rows, len(snapshot.order_id) - 1)
+    matched = snapshot.order_id[rows] == snapshot.item_order_id
+    return np.bincount(rows[matched], weights=snapshot.item_revenue[matched], minlength=len(snapshot.order_id))
+
+def _week_start(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday; weeks start on Monday
+    as_int = days.astype(np.int64)
+    return (as_int - (as_int + 3) % 7).astype("datetime64[D]")
+
+def _group(codes: np.ndarray, size: int, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Count and weight-sum per code, with MISSING collected in the last slot"""
+    codes = np.where(codes == MISSING, size, codes)
+    return (np.bincount(codes, minlength=size + 1),
+            np.bincount(codes, weights=weights, minlength=size + 1))
+
+def _stored_totals(conn) -> Tuple:
+    """Order and item counts and item sums as the trigger-maintained rollups have them"""
+    counts = dict(conn.execute(select(models.TableCount.table_name, models.TableCount.row_count)
+                               .where(models.TableCount.table_name.in_(["orders", "order_items"]))).all())
+    sales = conn.execute(select(func.coalesce(func.sum(models.ProductSales.items), 0),
+                                func.coalesce(func.sum(models.ProductSales.units), 0),
+                                func.coalesce(func.sum(models.ProductSales.revenue), 0))).one()
+    return (counts.get("orders", 0), counts.get("order_items", 0), *sales)
+
+def _snapshot_totals(snapshot: Snapshot) -> Tuple:
+    # product_sales leaves out items without a product
+    with_product = snapshot.item_product_id != MISSING
+    return (len(snapshot.order_id), len(snapshot.item_id), int(with_product.sum()),
+            int(snapshot.item_quantity[with_product].sum()), float(snapshot.item_revenue[with_product].sum()))
+
+def _totals_match(stored: Tuple, loaded: Tuple) -> bool:
+    return stored[:4] == loaded[:4] and math.isclose(stored[4], loaded[4], rel_tol=1e-9, abs_tol=1e-6)
+
+class AnalyticsStore:
+    """Columnar copy of the order tables answering revenue breakdowns with vectorized group-bys
+
+    refresh() appends rows with ids above the last load, then checks the
+    counts and item totals against the rollups and reloads everything when
+    they disagree (deletes, rows inserted below the last id, changed
+    quantities or prices). Edits that leave those totals alone (an order's
+    status, center or date, an item's product, a product's category) wait
+    for reload().
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, refresh_seconds: float = ANALYTICS_REFRESH_SECONDS):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self.snapshot = Snapshot()
+        self.refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def reload(self) -> Snapshot:
+        with self._lock:
+            self.snapshot = Snapshot()
+        return self.refresh()
+
+    def refresh(self) -> Snapshot:
+        """Append rows added since the previous load, reloading if the rollups show other changes"""
+        with self._lock:
+            with self.engine.connect() as conn:
+                snapshot = self._append(conn, self.snapshot)
+                if len(self.snapshot.order_id) and not _totals_match(_stored_totals(conn), _snapshot_totals(snapshot)):
+                    snapshot = self._append(conn, Snapshot())
+            self.snapshot = snapshot
+            self.refreshed_at = time.monotonic()
+            return self.snapshot
+
+    def _append(self, conn, snapshot: Snapshot) -> Snapshot:
+        center_names = dict(conn.execute(select(models.DistributionCenter.id, models.DistributionCenter.name)).all())
+        updated = self._append_products(conn, snapshot)
+        updated = self._append_orders(conn, updated)
+        updated = self._append_items(conn, updated)
+        return replace(updated, center_names=center_names, order_revenue=_order_revenue(updated))
+
+    def current(self) -> Snapshot:
+        """The latest snapshot, refreshed first if it is older than refresh_seconds"""
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_seconds:
+            return self.refresh()
+        return self.snapshot
+
+    def _append_products(self, conn, snapshot: Snapshot) -> Snapshot:
+        ids, categories = _fetch_columns(conn, select(models.Product.id, models.Product.category)
+                                         .where(models.Product.id > snapshot.max_product_id)
+                                         .order_by(models.Product.id), 2)
+        if not ids:
+            return snapshot
+        codes, vocabulary = _encode(categories, snapshot.categories)
+        lookup = np.full(max(ids) + 1, MISSING, np.int64)
+        lookup[:len(snapshot.product_category)] = snapshot.product_category
+        lookup[np.array(ids, np.int64)] = codes
+        return replace(snapshot, product_category=lookup, categories=vocabulary, max_product_id=max(ids))
+
+    def _append_orders(self, conn, snapshot: Snapshot) -> Snapshot:
+        last_id = int(snapshot.order_id[-1]) if len(snapshot.order_id) else 0
+        ids, centers, statuses, dates = _fetch_columns(conn, select(
+            models.Order.id, models.Order.distribution_center_id, models.Order.status, models.Order.order_date,
+        ).where(models.Order.id > last_id).order_by(models.Order.id), 4)
+        if not ids:
+            return snapshot
+        codes, vocabulary = _encode(statuses, snapshot.statuses)
+        return replace(
+            snapshot,
+            order_id=np.concatenate([snapshot.order_id, np.array(ids, np.int64)]),
+            order_dc=np.concatenate([snapshot.order_dc, _int_column(centers)]),
+            order_status=np.concatenate([snapshot.order_status, codes]),
+            order_day=np.concatenate([snapshot.order_day, np.array(dates, "datetime64[D]")]),
+            statuses=vocabulary,
+        )
+
+    def _append_items(self, conn, snapshot: Snapshot) -> Snapshot:
+        last_id = int(snapshot.item_id.max()) if len(snapshot.item_id) else 0
+        ids, order_ids, product_ids, quantities, prices = _fetch_columns(conn, select(
+            models.OrderItem.id, models.OrderItem.order_id, models.OrderItem.product_id,
+            models.OrderItem.quantity, models.OrderItem.price,
+        ).where(models.OrderItem.id > last_id), 5)
+        if not ids:
+            return snapshot
+        quantity = _int_column(quantities, 0)
+        return replace(
+            snapshot,
+            item_id=np.concatenate([snapshot.item_id, np.array(ids, np.int64)]),
+            item_order_id=np.concatenate([snapshot.item_order_id, _int_column(order_ids)]),
+            item_product_id=np.concatenate([snapshot.item_product_id, _int_column(product_ids)]),
+            item_quantity=np.concatenate([snapshot.item_quantity, quantity]),
+            item_revenue=np.concatenate([snapshot.item_revenue, np.nan_to_num(quantity * np.array(prices, np.float64))]),
+        )
+
+    # Breakdowns
+    def revenue_by_distribution_center(self) -> List[dict]:
+        snapshot = self.current()
+        centers, codes = np.unique(snapshot.order_dc, return_inverse=True)
+        orders = np.bincount(codes, minlength=len(centers))
+        revenue = np.bincount(codes, weights=snapshot.order_revenue, minlength=len(centers))
+        return [
+            {
+                "distribution_center_id": None if center == MISSING else int(center),
+                "name": snapshot.center_names.get(int(center)),
+                "orders": int(count),
+                "item_revenue": round(float(total), 2),
+            }
+            for center, count, total in zip(centers, orders, revenue)
+        ]
+
+    def revenue_by_status(self) -> List[dict]:
+        snapshot = self.current()
+        orders, revenue = _group(snapshot.order_status, len(snapshot.statuses), snapshot.order_revenue)
+        return [
+            {"status": status, "orders": int(orders[code]), "item_revenue": round(float(revenue[code]), 2)}
+            for code, status in enumerate(snapshot.statuses)
+            if orders[code]
+        ]
+
+    def revenue_by_category(self) -> List[dict]:
+        snapshot = self.current()
+        product_ids = snapshot.item_product_id
+        known = (product_ids >= 0) & (product_ids < len(snapshot.product_category))
+        codes = np.full(len(product_ids), MISSING, np.int64)
+        codes[known] = snapshot.product_category[product_ids[known]]
+
+        size = len(snapshot.categories)
+        items, revenue = _group(codes, size, snapshot.item_revenue)
+        units = np.bincount(np.where(codes == MISSING, size, codes), weights=snapshot.item_quantity, minlength=size + 1)
+        names = list(snapshot.categories) + [None]
+        return [
+            {"category": names[code], "items": int(items[code]), "units": int(units[code]),
+             "item_revenue": round(float(revenue[code]), 2)}
+            for code in range(size + 1)
+            if items[code]
+        ]
+
+    def revenue_by_period(self, period: str = "day",
+                          start_date: Optional[date] = None,
+                          end_date: Optional[date] = None) -> List[dict]:
+        """Orders and revenue per day or ISO week (Monday start), optionally within [start_date, end_date)"""
+        if period not in ("day", "week"):
+            raise ValueError(f"Unsupported period: {period}")
+        snapshot = self.current()
+        mask = ~np.isnat(snapshot.order_day)
+        if start_date:
+            mask &= snapshot.order_day >= np.datetime64(start_date, "D")
+        if end_date:
+            mask &= snapshot.order_day < np.datetime64(end_date, "D")
+
+        days = snapshot.order_day[mask]
+        keys = _week_start(days) if period == "week" else days
+        periods, codes = np.unique(keys, return_inverse=True)
+        orders = np.bincount(codes, minlength=len(periods))
+        revenue = np.bincount(codes, weights=snapshot.order_revenue[mask], minlength=len(periods))
+        return [
+            {"period_start": start.item(), "orders": int(count), "item_revenue": round(float(total), 2)}
+            for start, count, total in zip(periods, orders, revenue)
+        ]
+
+analytics_store = AnalyticsStore(read_engine)
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from . import schemas, async_crud, async_database, cache, catalog, fastpath, renders
+from .async_database import get_async_db
+
+# Async handlers for the hot endpoints; main.py mounts these ahead of the
+# sync routes when ASYNC_DB is enabled, so they take over the same paths.
+# Cached renders open their own session: concurrent identical requests share one
+# render, which must outlive the request that started it being cancelled.
+router = APIRouter()
+
+@router.get("/api/users/search", response_model=schemas.UserPage)
+async def search_users(
+    email: Optional[str] = Query(None),
+    first_name: Optional[str] = Query(None),
+    last_name: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    phone: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Match on shared trigrams instead of exact substrings"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated user fields to return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    shape = renders.user_search_shape(fields)
+    with renders.bad_request():
+        page = await async_crud.search_users_page(db, email=email, first_name=first_name,
+                                                  last_name=last_name, city=city, phone=phone,
+                                                  fuzzy=fuzzy, limit=limit, cursor=cursor,
+                                                  columns=shape.column_names() if shape else None)
+    return renders.user_search_response(page, shape)
+
+@router.get("/api/users/{user_id}/orders", response_model=schemas.OrderPage)
+async def get_user_orders(
+    request: Request,
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: distribution_center"),
+):
+    async def render():
+        shape = renders.sparse(fastpath.ORDER, fields, include)
+        async with async_database.AsyncSessionLocal() as db:
+            with renders.bad_request():
+                page = await async_crud.get_user_orders_page_rows(db, user_id=user_id, limit=limit, cursor=cursor, shape=shape)
+        return renders.user_orders_body(page, cursor)
+
+    entry = await cache.response_cache.get_or_render_async(
+        "user_orders", (user_id, limit, cursor, fields, include), [cache.user_orders_tag(user_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
+
+@router.post("/api/users/orders:batch", response_model=schemas.UserOrdersBatch)
+async def get_orders_for_users(batch: schemas.UserOrdersBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    return {"results": await async_crud.get_orders_for_users(db, batch.user_ids, limit_per_user=batch.limit_per_user)}
+
+@router.post("/api/orders/items:batch", response_model=schemas.OrderItemsBatch)
+async def get_items_for_orders(batch: schemas.OrderItemsBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    return {"results": await async_crud.get_items_for_orders(db, batch.order_ids)}
+
+@router.get("/api/orders/{order_id:int}", response_model=schemas.OrderDetail)
+async def get_order_detail(
+    request: Request,
+    order_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: user, distribution_center, order_items, summary"),
+):
+    async def render():
+        async with async_database.AsyncSessionLocal() as db:
+            if fields is None and include is None:
+                # Validated while the session is open; the ORM objects are read during serialization
+                return renders.order_detail_body(await async_crud.get_order_detail(db, order_id=order_id), shaped=False)
+            # Sparse: only the requested columns, joins and follow-up queries run
+            shape = renders.sparse(fastpath.ORDER_DETAIL, fields, include)
+            detail = await async_crud.get_order_detail_rows(db, order_id=order_id, shape=shape)
+        return renders.order_detail_body(detail, shaped=True)
+
+    entry = await cache.response_cache.get_or_render_async(
+        "order_detail", (order_id, fields, include), [cache.order_tag(order_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
+
+@router.get("/api/orders/{order_id}/items", response_model=List[schemas.OrderItem])
+async def get_order_items(
+    request: Request,
+    order_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: product"),
+):
+    async def render():
+        shape = renders.sparse(fastpath.ORDER_ITEM, fields, include)
+        async with async_database.AsyncSessionLocal() as db:
+            items = await async_crud.get_order_items_rows(db, order_id=order_id, shape=shape)
+        return renders.order_items_body(items)
+
+    entry = await cache.response_cache.get_or_render_async(
+        "order_items", (order_id, fields, include), [cache.order_tag(order_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
+
+@router.get("/api/products/search", response_model=schemas.ProductPage)
+async def search_products(
+    name: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    # Only a due change check or rebuild touches the database, and that runs off the event loop
+    product_catalog = catalog.product_catalog
+    current = product_catalog.catalog
+    if current is None or product_catalog.stale or product_catalog.refresh_due():
+        current = await run_in_threadpool(product_catalog.current)
+    with renders.bad_request():
+        page = current.search_page(name=name, category=category, min_price=min_price,
+                                   max_price=max_price, limit=limit, cursor=cursor)
+    return renders.page_response(page)
@@ -0,0 +1,179 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy import or_, func, select, tuple_
+from . import models, search, pagination, fastpath
+from .crud import ORDER_DETAIL_FIELDS
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+# Async counterparts of the app/crud.py queries that app/async_api.py serves
+
+# User search
+async def _can_use_search_index(db: AsyncSession, terms: dict) -> bool:
+    if not search.terms_support_index(terms):
+        return False
+    engine = db.bind.sync_engine
+    if engine not in search._indexed_engines:
+        conn = await db.connection()
+        search._indexed_engines[engine] = await conn.run_sync(search.connection_has_user_search_index)
+    return search._indexed_engines[engine]
+
+async def _search_users_ranked(db: AsyncSession, terms: dict, skip: int, limit: int, fuzzy: bool,
+                               after: Optional[Tuple[float, int]] = None,
+                               columns: Optional[List[str]] = None) -> List[Tuple[models.User, float]]:
+    query = search.user_search_query(db.bind.dialect.name, terms, fuzzy, after, columns).offset(skip).limit(limit)
+    return [(user, score) for user, score in (await db.execute(query)).all()]
+
+async def search_users_page(db: AsyncSession,
+                            email: Optional[str] = None,
+                            first_name: Optional[str] = None,
+                            last_name: Optional[str] = None,
+                            city: Optional[str] = None,
+                            phone: Optional[str] = None,
+                            limit: int = 100,
+                            fuzzy: bool = False,
+                            cursor: Optional[str] = None,
+                            columns: Optional[List[str]] = None) -> pagination.Page:
+    """Keyset-paginated user search: (score, id) when indexed, id otherwise
+
+    columns, when given, limits the user columns read (the rest are left unloaded).
+    """
+    terms = search.user_search_terms(email, first_name, last_name, city, phone)
+    if await _can_use_search_index(db, terms):
+        after = pagination.decode_cursor(cursor, "users:ranked", (float, int)) if cursor else None
+        rows = await _search_users_ranked(db, terms, 0, limit + 1, fuzzy, after, columns)
+        page = pagination.make_page(rows, limit, "users:ranked", lambda row: (row[1], row[0].id))
+        return pagination.Page([user for user, _ in page.items], page.next_cursor)
+
+    after_id = pagination.decode_cursor(cursor, "users", (int,))[0] if cursor else None
+    users = await search_users_scan(db, email=email, first_name=first_name, last_name=last_name,
+                                    city=city, phone=phone, limit=limit + 1, after_id=after_id, columns=columns)
+    return pagination.make_page(users, limit, "users", lambda user: (user.id,))
+
+async def search_users_scan(db: AsyncSession,
+                            email: Optional[str] = None,
+                            first_name: Optional[str] = None,
+                            last_name: Optional[str] = None,
+                            city: Optional[str] = None,
+                            phone: Optional[str] = None,
+                            skip: int = 0,
+                            limit: int = 100,
+                            after_id: Optional[int] = None,
+                            columns: Optional[List[str]] = None) -> List[models.User]:
+    """User search with ILIKE substring filters (used for short terms or without the search index)"""
+    query = select(models.User)
+    if columns:
+        query = query.options(load_only(*[getattr(models.User, name) for name in columns]))
+    filters = [getattr(models.User, field).ilike(f"%{term}%")
+               for field, term in search.user_search_terms(email, first_name, last_name, city, phone).items()]
+
+    if filters:
+        query = query.where(or_(*filters))
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+
+    return list(await db.scalars(query.order_by(models.User.id).offset(skip).limit(limit)))
+
+# Order CRUD Operations
+async def get_user_orders_page_rows(db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                                    shape: fastpath.Shape = fastpath.ORDER) -> pagination.Page:
+    """Keyset-paginated user orders as schema-shaped dicts, read without ORM objects
+
+    shape may be a projection of fastpath.ORDER; only its columns and joins are queried.
+    """
+    after = pagination.decode_cursor(cursor, "orders", (datetime, int)) if cursor else None
+    query = shape.select().add_columns(models.Order.order_date, models.Order.id).where(models.Order.user_id == user_id)
+    if after:
+        query = query.where(tuple_(models.Order.order_date, models.Order.id) < tuple_(*after))
+    query = query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).limit(limit + 1)
+    # The trailing order_date and id are the keyset, whether or not the shape returns them
+    rows = (await db.execute(query)).all()
+    page = pagination.make_page(rows, limit, "orders", lambda row: tuple(row[-2:]))
+    return pagination.Page(shape.rows(page.items), page.next_cursor)
+
+async def get_orders_for_users(db: AsyncSession, user_ids: List[int], limit_per_user: int = 50) -> Dict[int, List[models.Order]]:
+    """Most recent orders for several users in one query, grouped by user id"""
+    row_number = func.row_number().over(
+        partition_by=models.Order.user_id,
+        order_by=(models.Order.order_date.desc(), models.Order.id.desc()),
+    ).label("row_number")
+    ranked = select(models.Order.id, row_number).where(models.Order.user_id.in_(user_ids)).subquery()
+    query = select(models.Order).options(joinedload(models.Order.distribution_center)).join(ranked, ranked.c.id == models.Order.id).where(ranked.c.row_number <= limit_per_user)
+    orders = await db.scalars(query)
+
+    grouped = {user_id: [] for user_id in user_ids}
+    for order in sorted(orders, key=lambda order: (order.order_date, order.id), reverse=True):
+        grouped[order.user_id].append(order)
+    return grouped
+
+async def get_order_by_id(db: AsyncSession, order_id: int) -> Optional[models.Order]:
+    """Get single order with all related data"""
+    query = select(models.Order).options(
+        joinedload(models.Order.user),
+        joinedload(models.Order.distribution_center),
+        selectinload(models.Order.order_items).joinedload(models.OrderItem.product),
+    ).where(models.Order.id == order_id)
+    return await db.scalar(query)
+
+# Order Items CRUD Operations
+async def get_order_items_rows(db: AsyncSession, order_id: int,
+                               shape: fastpath.Shape = fastpath.ORDER_ITEM) -> List[dict]:
+    """Items with products as schema-shaped dicts, read without ORM objects
+
+    shape may be a projection of fastpath.ORDER_ITEM; only its columns and joins are queried.
+    """
+    query = shape.select().where(models.OrderItem.order_id == order_id)
+    return shape.rows((await db.execute(query)).all())
+
+async def get_items_for_orders(db: AsyncSession, order_ids: List[int]) -> Dict[int, List[models.OrderItem]]:
+    """Items with products for several orders in one query, grouped by order id"""
+    query = select(models.OrderItem).options(joinedload(models.OrderItem.product)).where(models.OrderItem.order_id.in_(order_ids))
+    items = await db.scalars(query)
+
+    grouped = {order_id: [] for order_id in order_ids}
+    for item in items:
+        grouped[item.order_id].append(item)
+    return grouped
+
+async def get_order_totals(db: AsyncSession, order_id: int) -> dict:
+    """Item totals for an order, aggregated in SQL"""
+    total_items, total_amount, item_count = (await db.execute(
+        select(
+            func.coalesce(func.sum(models.OrderItem.quantity), 0),
+            func.coalesce(func.sum(models.OrderItem.quantity * models.OrderItem.price), 0),
+            func.count(models.OrderItem.id),
+        ).where(models.OrderItem.order_id == order_id)
+    )).one()
+
+    return {
+        "total_items": total_items,
+        "total_amount": round(float(total_amount), 2),
+        "item_count": item_count
+    }
+
+async def get_order_detail(db: AsyncSession, order_id: int):
+    """Get an order with its user, distribution center, items and totals"""
+    order = await get_order_by_id(db, order_id)
+    if order is None:
+        return None
+
+    detail = {field: getattr(order, field) for field in ORDER_DETAIL_FIELDS}
+    detail["summary"] = await get_order_totals(db, order_id)
+    return detail
+
+async def get_order_detail_rows(db: AsyncSession, order_id: int,
+                                shape: fastpath.Shape = fastpath.ORDER_DETAIL) -> Optional[dict]:
+    """Order detail as a schema-shaped dict for a projection of fastpath.ORDER_DETAIL
+
+    The items and totals queries only run when the projection embeds them.
+    """
+    row = (await db.execute(shape.select().where(models.Order.id == order_id))).first()
+    if row is None:
+        return None
+
+    detail = shape.rows([row])[0]
+    if "order_items" in shape.detached:
+        detail["order_items"] = await get_order_items_rows(db, order_id, shape.detached["order_items"])
+    if "summary" in shape.detached:
+        detail["summary"] = await get_order_totals(db, order_id)
+    return detail
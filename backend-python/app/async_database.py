@@ -0,0 +1,40 @@
+import os
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .database import DATABASE_URL, configure_sqlite
+from . import metrics
+
+# Async drivers for the dialects we run on: aiosqlite locally, asyncpg for Postgres
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL onto its async driver"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+pool_options = {
+    "pool_size": int(os.getenv("ASYNC_POOL_SIZE", "20")),
+    "max_overflow": int(os.getenv("ASYNC_MAX_OVERFLOW", "20")),
+}
+
+# aiosqlite defaults to NullPool (a new connection thread per session); pool them instead
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool, **pool_options)
+    configure_sqlite(async_engine.sync_engine)
+else:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options)
+
+metrics.instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
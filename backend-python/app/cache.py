@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from . import models
+from .singleflight import single_flight
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Invalidated tags remembered by the memory backend; past this the least recently bumped are forgotten
+CACHE_MAX_TAGS = int(os.getenv("CACHE_MAX_TAGS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+# Backends store opaque bytes plus a generation counter per tag. Invalidating a
+# tag bumps its generation; keys embed the generations they were built under,
+# so stale entries are never read again and age out through LRU/TTL.
+class MemoryBackend:
+    """In-process LRU bounded by entry count, total bytes and TTL
+
+    Generations come from one counter, so a bumped tag always moves past every
+    generation issued before. Tags never bumped, or forgotten once max_tags is
+    exceeded, share the base generation; forgetting the oldest half of the tags
+    raises it, which also retires the keys of every other unbumped tag.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 max_tags: int = CACHE_MAX_TAGS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_tags = max_tags
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._base_generation = 0
+        self._last_generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def generation(self, tag: str) -> int:
+        return self._generations.get(tag, self._base_generation)
+
+    def bump_generation(self, tag: str) -> None:
+        with self._lock:
+            self._last_generation += 1
+            self._generations[tag] = self._last_generation
+            self._generations.move_to_end(tag)
+            if len(self._generations) > self.max_tags:
+                for _ in range(len(self._generations) - self.max_tags // 2):
+                    self._generations.popitem(last=False)
+                self._last_generation += 1
+                self._base_generation = self._last_generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "tags": len(self._generations),
+                "evictions": self.evictions, "expirations": self.expirations}
+
+class RedisBackend:
+    """Shared cache across API processes; Redis handles TTL and memory eviction"""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "api-cache:"):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def generation(self, tag: str) -> int:
+        return int(self.client.get(self.prefix + "gen:" + tag) or 0)
+
+    def bump_generation(self, tag: str) -> None:
+        self.client.incr(self.prefix + "gen:" + tag)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self) -> dict:
+        return {"evictions": self.client.info("stats").get("evicted_keys", 0)}
+
+class ResponseCache:
+    """Serialized response bodies keyed by endpoint, parameters and tag generations"""
+
+    def __init__(self, backend=None, ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def key(self, namespace: str, params: Iterable, tags: Iterable[str]) -> str:
+        """Build the key before querying, so a write that lands mid-request invalidates the result"""
+        generations = ",".join(str(self.backend.generation(tag)) for tag in tags) if self.enabled else ""
+        # JSON keeps None apart from "None" and a value containing ":" apart from two values
+        return f"{namespace}:{json.dumps(list(params), default=str)}@{generations}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, _, body = value.partition(b"\n")
+        return CachedResponse(body, etag.decode())
+
+    def set(self, key: str, body: bytes) -> CachedResponse:
+        entry = CachedResponse(body, make_etag(body))
+        if self.enabled:
+            self.backend.set(key, entry.etag.encode() + b"\n" + body, self.ttl)
+        return entry
+
+    # On a miss, identical requests already rendering share that render instead of querying again
+    def get_or_render(self, namespace: str, params: Iterable, tags: Iterable[str],
+                      render: Callable[[], bytes]) -> CachedResponse:
+        key = self.key(namespace, params, tags)
+        entry = self.get(key)
+        if entry is None:
+            entry, _ = single_flight.do(namespace, key, lambda: self.set(key, render()))
+        return entry
+
+    async def get_or_render_async(self, namespace: str, params: Iterable, tags: Iterable[str],
+                                  render: Callable[[], Awaitable[bytes]]) -> CachedResponse:
+        key = self.key(namespace, params, tags)
+        entry = self.get(key)
+        if entry is None:
+            async def render_and_store() -> CachedResponse:
+                return self.set(key, await render())
+            entry, _ = await single_flight.do_async(namespace, key, render_and_store)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        if not self.enabled:
+            return
+        for tag in tags:
+            self.backend.bump_generation(tag)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        stats = {"backend": CACHE_BACKEND, "hits": self.hits, "misses": self.misses,
+                 "invalidations": self.invalidations, "single_flight": single_flight.stats()}
+        if self.enabled:
+            stats.update(self.backend.stats())
+        return stats
+
+def create_cache() -> ResponseCache:
+    if CACHE_BACKEND == "redis":
+        return ResponseCache(RedisBackend())
+    if CACHE_BACKEND == "memory":
+        return ResponseCache(MemoryBackend())
+    return ResponseCache(None)
+
+response_cache = create_cache()
+
+# Cache tags. Order responses embed users, products and distribution centers, which all share
+# EMBEDDED_TAG: a write to any of them invalidates every cached order response.
+EMBEDDED_TAG = "embedded"
+
+def user_orders_tag(user_id: int) -> str:
+    return f"user_orders:{user_id}"
+
+def order_tag(order_id: int) -> str:
+    return f"order:{order_id}"
+
+def invalidate_order(order_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+    """Drop cached responses that embed an order or its user's order list"""
+    tags = []
+    if order_id is not None:
+        tags.append(order_tag(order_id))
+    if user_id is not None:
+        tags.append(user_orders_tag(user_id))
+    response_cache.invalidate(*tags)
+
+def json_response(request: Request, entry: CachedResponse) -> Response:
+    """200 with an ETag, or 304 when the client already holds this version"""
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+# Invalidate on order and embedded-entity writes made through the ORM, once the transaction commits
+EMBEDDED_MODELS = (models.User, models.Product, models.DistributionCenter)
+
+@event.listens_for(Session, "after_flush")
+def _collect_order_writes(session, flush_context):
+    pending = session.info.setdefault("invalidate_orders", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, EMBEDDED_MODELS):
+            session.info["invalidate_embedded"] = True
+        elif isinstance(obj, models.Order):
+            pending.add((obj.id, obj.user_id))
+            for previous_user_id in inspect(obj).attrs.user_id.history.deleted or ():
+                pending.add((obj.id, previous_user_id))
+        elif isinstance(obj, models.OrderItem):
+            pending.add((obj.order_id, None))
+            for previous_order_id in inspect(obj).attrs.order_id.history.deleted or ():
+                pending.add((previous_order_id, None))
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_orders(session):
+    for order_id, user_id in session.info.pop("invalidate_orders", ()):
+        invalidate_order(order_id, user_id)
+    if session.info.pop("invalidate_embedded", False):
+        response_cache.invalidate(EMBEDDED_TAG)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_order_writes(session):
+    session.info.pop("invalidate_orders", None)
+    session.info.pop("invalidate_embedded", None)
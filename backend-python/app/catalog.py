@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import fastpath, models, pagination
+from .database import read_engine
+
+# Seconds between checks for product changes made outside this process
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "30"))
+NGRAM = 3
+
+def _ngrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+def _postings(groups: Dict) -> Dict:
+    return {key: np.array(positions, np.int64) for key, positions in groups.items()}
+
+class Catalog:
+    """Immutable product index matching crud.search_products: case-insensitive
+    substring filters on name and category, an inclusive price range, id order
+
+    Products are held as schema-shaped dicts in id order and referred to by
+    position. Names get a trigram index (a needle of three or more characters
+    only occurs in names holding all of its trigrams), categories are coded,
+    and prices are sorted for range bisection. A search walks the smallest
+    candidate list in id order and stops once the page is full, as LIMIT does.
+    """
+
+    def __init__(self, products: List[dict], fingerprint: Tuple = ()):
+        self.products = products
+        self.fingerprint = fingerprint
+        self.ids = np.array([product["id"] for product in products], np.int64)
+        self.names = [(product["name"] or "").lower() for product in products]
+        self.prices = np.array([product["price"] for product in products], np.float64)
+
+        ngrams = defaultdict(list)
+        for position, name in enumerate(self.names):
+            for ngram in _ngrams(name):
+                ngrams[ngram].append(position)
+        self.name_index = _postings(ngrams)
+
+        categories = [product["category"] for product in products]
+        self.categories = sorted({category for category in categories if category is not None})
+        codes = {category: code for code, category in enumerate(self.categories)}
+        self.category_codes = np.array([codes.get(category, -1) for category in categories], np.int64)
+        self.category_index = _postings({code: np.flatnonzero(self.category_codes == code)
+                                         for code in range(len(self.categories))})
+
+        # NULL prices sort last as NaN and never satisfy a bound, as in SQL
+        self.price_order = np.argsort(self.prices, kind="stable")
+        self.sorted_prices = self.prices[self.price_order]
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _name_candidates(self, needle: str) -> Optional[np.ndarray]:
+        """Positions holding the needle's rarest trigram, or None when the needle is too short to index"""
+        if len(needle) < NGRAM:
+            return None
+        postings = [self.name_index.get(ngram) for ngram in _ngrams(needle)]
+        if any(positions is None for positions in postings):
+            return np.empty(0, np.int64)
+        return min(postings, key=len)
+
+    def _category_codes(self, needle: str) -> np.ndarray:
+        needle = needle.lower()
+        return np.array([code for code, category in enumerate(self.categories) if needle in category.lower()], np.int64)
+
+    def _price_bounds(self, min_price: Optional[float], max_price: Optional[float]) -> Tuple[int, int]:
+        start = np.searchsorted(self.sorted_prices, min_price, "left") if min_price is not None else 0
+        stop = np.searchsorted(self.sorted_prices, np.inf if max_price is None else max_price, "right")
+        return int(start), int(stop)
+
+    def search(self,
+               name: Optional[str] = None,
+               category: Optional[str] = None,
+               min_price: Optional[float] = None,
+               max_price: Optional[float] = None,
+               limit: int = 50,
+               after_id: Optional[int] = None) -> List[dict]:
+        """Products matching every filter, in id order"""
+        needle = name.lower() if name else None
+        codes = self._category_codes(category) if category else None
+        start = int(np.searchsorted(self.ids, after_id, "right")) if after_id is not None else 0
+
+        # Candidate lists as (size, build); only the smallest is materialized
+        sources = [(len(self.products) - start, lambda: np.arange(start, len(self.products)))]
+        if needle:
+            positions = self._name_candidates(needle)
+            if positions is not None:
+                sources.append((len(positions), lambda: positions))
+        if codes is not None:
+            postings = [self.category_index[code] for code in codes.tolist()] or [np.empty(0, np.int64)]
+            sources.append((sum(map(len, postings)),
+                            lambda: postings[0] if len(postings) == 1 else np.sort(np.concatenate(postings))))
+        if min_price is not None or max_price is not None:
+            low, high = self._price_bounds(min_price, max_price)
+            sources.append((high - low, lambda: np.sort(self.price_order[low:high])))
+        candidates = min(sources, key=lambda source: source[0])[1]()
+
+        candidates = candidates[np.searchsorted(candidates, start):]
+        if codes is not None:
+            # Indexed by code, with -1 (no category) landing on the last, always-False slot
+            allowed = np.zeros(len(self.categories) + 1, bool)
+            allowed[codes] = True
+
+        matched: List[int] = []
+        offset, chunk_size = 0, max(limit, 64)
+        while offset < len(candidates) and len(matched) < limit:
+            chunk = candidates[offset:offset + chunk_size]
+            offset += len(chunk)
+            # Sparse matches: widen the next chunk rather than looping many small ones
+            chunk_size *= 2
+            keep = np.ones(len(chunk), bool)
+            if codes is not None:
+                keep &= allowed[self.category_codes[chunk]]
+            if min_price is not None:
+                keep &= self.prices[chunk] >= min_price
+            if max_price is not None:
+                keep &= self.prices[chunk] <= max_price
+            chunk = chunk[keep].tolist()
+            if needle:
+                names = self.names
+                chunk = [position for position in chunk if needle in names[position]]
+            matched.extend(chunk)
+        return [self.products[position] for position in matched[:limit]]
+
+    def search_page(self,
+                    name: Optional[str] = None,
+                    category: Optional[str] = None,
+                    min_price: Optional[float] = None,
+                    max_price: Optional[float] = None,
+                    limit: int = 50,
+                    cursor: Optional[str] = None) -> pagination.Page:
+        """Keyset-paginated search with the same cursors as crud.search_products_page"""
+        after_id = pagination.decode_cursor(cursor, "products", (int,))[0] if cursor else None
+        products = self.search(name=name, category=category, min_price=min_price,
+                               max_price=max_price, limit=limit + 1, after_id=after_id)
+        return pagination.make_page(products, limit, "products", lambda product: (product["id"],))
+
+def _fingerprint(conn) -> Tuple:
+    # Inserts and deletes move the count or max id; repricing moves the price total
+    return tuple(conn.execute(select(func.count(), func.max(models.Product.id), func.coalesce(func.sum(models.Product.price), 0))).one())
+
+class ProductCatalog:
+    """Serves the current Catalog, rebuilding it when the products table changes
+
+    Product writes committed through the ORM in this process mark the catalog
+    stale straight away; other writers are noticed by a fingerprint query at
+    most every refresh_seconds. Edits that keep count, max id and price total
+    unchanged (a rename from another process) wait for reload().
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, refresh_seconds: float = CATALOG_REFRESH_SECONDS):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self.catalog: Optional[Catalog] = None
+        self.checked_at: Optional[float] = None
+        self.stale = False
+        self._lock = threading.Lock()
+
+    def reload(self) -> Catalog:
+        with self._lock:
+            # Cleared before reading, so a write committed during the load marks the result stale again
+            self.stale = False
+            with self.engine.connect() as conn:
+                fingerprint = _fingerprint(conn)
+                rows = conn.execute(fastpath.PRODUCT.select().order_by(models.Product.id)).all()
+            self.catalog = Catalog(fastpath.PRODUCT.rows(rows), fingerprint)
+            self.checked_at = time.monotonic()
+            return self.catalog
+
+    def refresh_due(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= self.refresh_seconds
+
+    def current(self) -> Catalog:
+        """The latest catalog, checked for changes first if the last check is older than refresh_seconds"""
+        catalog = self.catalog
+        if catalog is None or self.stale:
+            return self.reload()
+        if self.refresh_due():
+            with self.engine.connect() as conn:
+                fingerprint = _fingerprint(conn)
+            if fingerprint != catalog.fingerprint:
+                return self.reload()
+            self.checked_at = time.monotonic()
+        return catalog
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+product_catalog = ProductCatalog(read_engine)
+
+# Mark the catalog stale on product writes made through the ORM, once the transaction commits
+@event.listens_for(Session, "after_flush")
+def _collect_product_writes(session, flush_context):
+    if any(isinstance(obj, models.Product) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info["invalidate_catalog"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session):
+    if session.info.pop("invalidate_catalog", False):
+        product_catalog.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_product_writes(session):
+    session.info.pop("invalidate_catalog", None)
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
-from . import models, schemas
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy import and_, or_, func, select, tuple_
+from . import models, schemas, search, pagination, fastpath, partitions
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
 
 # User CRUD Operations
 def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
@@ -19,9 +20,56 @@ def search_users(db: Session,
                 city: Optional[str] = None,
                 phone: Optional[str] = None,
                 skip: int = 0,
-                limit: int = 100) -> List[models.User]:
-    """Advanced user search with multiple criteria support"""
+                limit: int = 100,
+                fuzzy: bool = False) -> List[models.User]:
+    """Advanced user search with multiple criteria support, ranked by relevance when indexed"""
+    terms = search.user_search_terms(email, first_name, last_name, city, phone)
+    if search.can_use_index(db, terms):
+        return [user for user, _ in search.search_users(db, terms, skip=skip, limit=limit, fuzzy=fuzzy)]
+
+    return search_users_scan(db, email=email, first_name=first_name, last_name=last_name,
+                             city=city, phone=phone, skip=skip, limit=limit)
+
+def search_users_page(db: Session,
+                      email: Optional[str] = None,
+                      first_name: Optional[str] = None,
+                      last_name: Optional[str] = None,
+                      city: Optional[str] = None,
+                      phone: Optional[str] = None,
+                      limit: int = 100,
+                      fuzzy: bool = False,
+                      cursor: Optional[str] = None,
+                      columns: Optional[List[str]] = None) -> pagination.Page:
+    """Keyset-paginated user search: (score, id) when indexed, id otherwise
+
+    columns, when given, limits the user columns read (the rest are left unloaded).
+    """
+    terms = search.user_search_terms(email, first_name, last_name, city, phone)
+    if search.can_use_index(db, terms):
+        after = pagination.decode_cursor(cursor, "users:ranked", (float, int)) if cursor else None
+        rows = search.search_users(db, terms, limit=limit + 1, fuzzy=fuzzy, after=after, columns=columns)
+        page = pagination.make_page(rows, limit, "users:ranked", lambda row: (row[1], row[0].id))
+        return pagination.Page([user for user, _ in page.items], page.next_cursor)
+
+    after_id = pagination.decode_cursor(cursor, "users", (int,))[0] if cursor else None
+    users = search_users_scan(db, email=email, first_name=first_name, last_name=last_name,
+                              city=city, phone=phone, limit=limit + 1, after_id=after_id, columns=columns)
+    return pagination.make_page(users, limit, "users", lambda user: (user.id,))
+
+def search_users_scan(db: Session,
+                      email: Optional[str] = None,
+                      first_name: Optional[str] = None,
+                      last_name: Optional[str] = None,
+                      city: Optional[str] = None,
+                      phone: Optional[str] = None,
+                      skip: int = 0,
+                      limit: int = 100,
+                      after_id: Optional[int] = None,
+                      columns: Optional[List[str]] = None) -> List[models.User]:
+    """User search with ILIKE substring filters (used for short terms or without the search index)"""
     query = db.query(models.User)
+    if columns:
+        query = query.options(load_only(*[getattr(models.User, name) for name in columns]))
     filters = []
 
     if email:
@@ -37,47 +85,172 @@ def search_users(db: Session,
 
     if filters:
         query = query.filter(or_(*filters))
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
 
-    return query.offset(skip).limit(limit).all()
+    return query.order_by(models.User.id).offset(skip).limit(limit).all()
 
 def get_users_count(db: Session) -> int:
     """Get total count of users"""
     return db.query(models.User).count()
 
 # Order CRUD Operations
-def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 50) -> List[models.Order]:
-    """Get all orders for a specific user with related data"""
-    return db.query(models.Order).options(joinedload(models.Order.distribution_center)).filter(models.Order.user_id == user_id).order_by(models.Order.order_date.desc()).offset(skip).limit(limit).all()
+def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 50,
+                    after: Optional[Tuple[datetime, int]] = None) -> List[models.Order]:
+    """Get all orders for a specific user with related data, newest first"""
+    query = db.query(models.Order).options(joinedload(models.Order.distribution_center)).filter(models.Order.user_id == user_id)
+    if after:
+        query = query.filter(tuple_(models.Order.order_date, models.Order.id) < tuple_(*after))
+    return query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).offset(skip).limit(limit).all()
+
+def get_user_orders_page(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None) -> pagination.Page:
+    """Keyset-paginated user orders on (order_date, id)"""
+    after = pagination.decode_cursor(cursor, "orders", (datetime, int)) if cursor else None
+    orders = get_user_orders(db, user_id, limit=limit + 1, after=after)
+    return pagination.make_page(orders, limit, "orders", lambda order: (order.order_date, order.id))
+
+def get_user_orders_page_rows(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                              shape: fastpath.Shape = fastpath.ORDER) -> pagination.Page:
+    """Keyset-paginated user orders as schema-shaped dicts, read without ORM objects
+
+    shape may be a projection of fastpath.ORDER; only its columns and joins are queried.
+    """
+    after = pagination.decode_cursor(cursor, "orders", (datetime, int)) if cursor else None
+    query = shape.select().add_columns(models.Order.order_date, models.Order.id).where(models.Order.user_id == user_id)
+    if after:
+        query = query.where(tuple_(models.Order.order_date, models.Order.id) < tuple_(*after))
+    query = query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).limit(limit + 1)
+    # The trailing order_date and id are the keyset, whether or not the shape returns them
+    rows = db.execute(query).all()
+    page = pagination.make_page(rows, limit, "orders", lambda row: tuple(row[-2:]))
+    return pagination.Page(shape.rows(page.items), page.next_cursor)
+
+def get_orders_for_users(db: Session, user_ids: List[int], limit_per_user: int = 50) -> Dict[int, List[models.Order]]:
+    """Most recent orders for several users in one query, grouped by user id"""
+    row_number = func.row_number().over(
+        partition_by=models.Order.user_id,
+        order_by=(models.Order.order_date.desc(), models.Order.id.desc()),
+    ).label("row_number")
+    ranked = db.query(models.Order.id, row_number).filter(models.Order.user_id.in_(user_ids)).subquery()
+    orders = db.query(models.Order).options(joinedload(models.Order.distribution_center)).join(ranked, ranked.c.id == models.Order.id).filter(ranked.c.row_number <= limit_per_user).all()
+    
+    grouped = {user_id: [] for user_id in user_ids}
+    for order in sorted(orders, key=lambda order: (order.order_date, order.id), reverse=True):
+        grouped[order.user_id].append(order)
+    return grouped
 
 def get_order_by_id(db: Session, order_id: int) -> Optional[models.Order]:
     """Get single order with all related data"""
-    return db.query(models.Order).options(joinedload(models.Order.user), joinedload(models.Order.distribution_center), joinedload(models.Order.order_items).joinedload(models.OrderItem.product)).filter(models.Order.id == order_id).first()
+    # Many-to-one joins add no rows; items load in a second IN query instead of multiplying the order row
+    return db.query(models.Order).options(joinedload(models.Order.user), joinedload(models.Order.distribution_center), selectinload(models.Order.order_items).joinedload(models.OrderItem.product)).filter(models.Order.id == order_id).first()
 
-def get_orders_by_status(db: Session, status: str, limit: int = 100) -> List[models.Order]:
-    """Get orders by status"""
-    return db.query(models.Order).filter(models.Order.status == status).order_by(models.Order.order_date.desc()).limit(limit).all()
+def get_orders_by_status(db: Session, status: str, limit: int = 100,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[models.Order]:
+    """Get orders by status, newest first, optionally placed in [start, end)"""
+    query = db.query(models.Order).filter(models.Order.status == status)
+    if start is not None:
+        query = query.filter(models.Order.order_date >= start)
+    if end is not None:
+        query = query.filter(models.Order.order_date < end)
+    return query.order_by(models.Order.order_date.desc()).limit(limit).all()
+
+def get_orders_page_rows(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None,
+                         shape: fastpath.Shape = fastpath.ORDER) -> pagination.Page:
+    """Keyset-paginated orders placed in [start, end), newest first, as schema-shaped dicts
+
+    orders is not partitioned: the range is a B-tree range seek on the
+    order_date index (or, with status, the status index), so only index entries
+    inside [start, end) are read.
+    """
+    after = pagination.decode_cursor(cursor, "orders", (datetime, int)) if cursor else None
+    query = shape.select().add_columns(models.Order.order_date, models.Order.id)
+    if status is not None:
+        query = query.where(models.Order.status == status)
+    if start is not None:
+        query = query.where(models.Order.order_date >= start)
+    if end is not None:
+        query = query.where(models.Order.order_date < end)
+    if after:
+        query = query.where(tuple_(models.Order.order_date, models.Order.id) < tuple_(*after))
+    query = query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).limit(limit + 1)
+    rows = db.execute(query).all()
+    page = pagination.make_page(rows, limit, "orders", lambda row: tuple(row[-2:]))
+    return pagination.Page(shape.rows(page.items), page.next_cursor)
 
 # Order Items CRUD Operations
 def get_order_items(db: Session, order_id: int) -> List[models.OrderItem]:
     """Get all items for a specific order with product details"""
     return db.query(models.OrderItem).options(joinedload(models.OrderItem.product)).filter(models.OrderItem.order_id == order_id).all()
 
+def get_order_items_rows(db: Session, order_id: int, shape: fastpath.Shape = fastpath.ORDER_ITEM) -> List[dict]:
+    """Items with products as schema-shaped dicts, read without ORM objects
+
+    shape may be a projection of fastpath.ORDER_ITEM; only its columns and joins are queried.
+    """
+    query = shape.select().where(models.OrderItem.order_id == order_id)
+    return shape.rows(db.execute(query).all())
+
+def get_items_for_orders(db: Session, order_ids: List[int]) -> Dict[int, List[models.OrderItem]]:
+    """Items with products for several orders in one query, grouped by order id"""
+    items = db.query(models.OrderItem).options(joinedload(models.OrderItem.product)).filter(models.OrderItem.order_id.in_(order_ids)).all()
+    
+    grouped = {order_id: [] for order_id in order_ids}
+    for item in items:
+        grouped[item.order_id].append(item)
+    return grouped
+
+def get_order_totals(db: Session, order_id: int) -> dict:
+    """Item totals for an order, aggregated in SQL"""
+    total_items, total_amount, item_count = db.query(
+        func.coalesce(func.sum(models.OrderItem.quantity), 0),
+        func.coalesce(func.sum(models.OrderItem.quantity * models.OrderItem.price), 0),
+        func.count(models.OrderItem.id),
+    ).filter(models.OrderItem.order_id == order_id).one()
+    
+    return {
+        "total_items": total_items,
+        "total_amount": round(float(total_amount), 2),
+        "item_count": item_count
+    }
+
 def get_order_items_with_totals(db: Session, order_id: int):
     """Get order items with calculated totals"""
-    items = get_order_items(db, order_id)
-    total_items = sum(item.quantity for item in items)
-    total_amount = sum(item.quantity * item.price for item in items)
-    
     return {
         "order_id": order_id,
-        "items": items,
-        "summary": {
-            "total_items": total_items,
-            "total_amount": round(total_amount, 2),
-            "item_count": len(items)
-        }
+        "items": get_order_items(db, order_id),
+        "summary": get_order_totals(db, order_id)
     }
 
+ORDER_DETAIL_FIELDS = ("id", "user_id", "distribution_center_id", "order_number", "status", "total_amount",
+                       "order_date", "user", "distribution_center", "order_items")
+
+def get_order_detail(db: Session, order_id: int):
+    """Get an order with its user, distribution center, items and totals"""
+    order = get_order_by_id(db, order_id)
+    if order is None:
+        return None
+    
+    detail = {field: getattr(order, field) for field in ORDER_DETAIL_FIELDS}
+    detail["summary"] = get_order_totals(db, order_id)
+    return detail
+
+def get_order_detail_rows(db: Session, order_id: int, shape: fastpath.Shape = fastpath.ORDER_DETAIL) -> Optional[dict]:
+    """Order detail as a schema-shaped dict for a projection of fastpath.ORDER_DETAIL
+
+    The items and totals queries only run when the projection embeds them.
+    """
+    row = db.execute(shape.select().where(models.Order.id == order_id)).first()
+    if row is None:
+        return None
+
+    detail = shape.rows([row])[0]
+    if "order_items" in shape.detached:
+        detail["order_items"] = get_order_items_rows(db, order_id, shape.detached["order_items"])
+    if "summary" in shape.detached:
+        detail["summary"] = get_order_totals(db, order_id)
+    return detail
+
 # Product CRUD Operations
 def get_product_by_id(db: Session, product_id: int) -> Optional[models.Product]:
     """Get product by ID"""
@@ -92,7 +265,8 @@ def search_products(db: Session,
                    category: Optional[str] = None,
                    min_price: Optional[float] = None,
                    max_price: Optional[float] = None,
-                   limit: int = 50) -> List[models.Product]:
+                   limit: int = 50,
+                   after_id: Optional[int] = None) -> List[models.Product]:
     """Advanced product search"""
     query = db.query(models.Product)
     
@@ -104,8 +278,23 @@ def search_products(db: Session,
         query = query.filter(models.Product.price >= min_price)
     if max_price is not None:
         query = query.filter(models.Product.price <= max_price)
+    if after_id is not None:
+        query = query.filter(models.Product.id > after_id)
     
-    return query.limit(limit).all()
+    return query.order_by(models.Product.id).limit(limit).all()
+
+def search_products_page(db: Session,
+                         name: Optional[str] = None,
+                         category: Optional[str] = None,
+                         min_price: Optional[float] = None,
+                         max_price: Optional[float] = None,
+                         limit: int = 50,
+                         cursor: Optional[str] = None) -> pagination.Page:
+    """Keyset-paginated product search on id"""
+    after_id = pagination.decode_cursor(cursor, "products", (int,))[0] if cursor else None
+    products = search_products(db, name=name, category=category, min_price=min_price,
+                               max_price=max_price, limit=limit + 1, after_id=after_id)
+    return pagination.make_page(products, limit, "products", lambda product: (product.id,))
 
 # Distribution Center CRUD Operations
 def get_distribution_centers(db: Session) -> List[models.DistributionCenter]:
@@ -117,35 +306,116 @@ def get_distribution_center_by_id(db: Session, center_id: int) -> Optional[model
     return db.query(models.DistributionCenter).filter(models.DistributionCenter.id == center_id).first()
 
 # Analytics and Summary Functions
-def get_user_order_summary(db: Session, user_id: int):
-    """Get comprehensive order summary for a user"""
-    orders = get_user_orders(db, user_id)
+def get_user_order_summary(db: Session, user_id: int, limit: int = 50):
+    """Get order summary for a user from the rollup, with their most recent orders"""
+    summary = db.get(models.UserOrderSummary, user_id)
     
-    if not orders:
+    if not summary or not summary.total_orders:
         return {
             "user_id": user_id,
             "total_orders": 0,
             "total_spent": 0,
-            "orders": []
+            "orders": [],
+            "latest_order_date": None
         }
     
-    total_spent = sum(order.total_amount for order in orders)
-    
     return {
         "user_id": user_id,
-        "total_orders": len(orders),
-        "total_spent": round(total_spent, 2),
-        "orders": orders,
-        "latest_order_date": orders[0].order_date if orders else None
+        "total_orders": summary.total_orders,
+        "total_spent": round(summary.total_spent, 2),
+        "orders": get_user_orders(db, user_id, limit=limit),
+        "latest_order_date": summary.latest_order_date
     }
 
+ORDER_STATS_GROUPS = ("day", "month", "status", "distribution_center")
+
+def get_order_stats(db: Session,
+                    start_date: Optional[date] = None,
+                    end_date: Optional[date] = None,
+                    group_by: Tuple[str, ...] = ("day",),
+                    status: Optional[str] = None,
+                    distribution_center_id: Optional[int] = None) -> List[dict]:
+    """Order counts and order_total (sum of total_amount) from the daily rollup, grouped by any of ORDER_STATS_GROUPS
+
+    Only the rollup rows for days in [start_date, end_date) are read.
+    """
+    stats = models.OrderDailyStat
+    dialect = db.get_bind().dialect.name
+    keys = {
+        "day": stats.day,
+        "month": partitions.month_expression(dialect, stats.day),
+        "status": stats.status,
+        "distribution_center": stats.distribution_center_id,
+    }
+    columns = [keys[name].label(name) for name in group_by]
+    query = select(*columns, func.sum(stats.orders).label("orders"), func.sum(stats.revenue).label("revenue"))
+    if start_date is not None:
+        query = query.where(stats.day >= start_date)
+    if end_date is not None:
+        query = query.where(stats.day < end_date)
+    if status is not None:
+        query = query.where(stats.status == status)
+    if distribution_center_id is not None:
+        query = query.where(stats.distribution_center_id == distribution_center_id)
+    query = query.group_by(*columns).order_by(*columns)
+
+    results = []
+    for row in db.execute(query):
+        values = row._mapping
+        result = {}
+        for name in group_by:
+            if name == "distribution_center":
+                # The rollup files orders without a status under '' and without a center under 0
+                result["distribution_center_id"] = values[name] or None
+            elif name == "status":
+                result["status"] = values[name] or None
+            else:
+                result[name] = values[name]
+        result["orders"] = values["orders"]
+        result["order_total"] = round(values["revenue"], 2)
+        results.append(result)
+    return results
+
+def get_top_products(db: Session, category: Optional[str] = None, k: int = 10) -> List[dict]:
+    """Best-selling products by item revenue, overall or within a category, from the product_sales rollup
+
+    category is matched exactly, not as a substring: the read is k rows off the high end of one
+    (category,) revenue index range, however many items have been sold.
+    """
+    sales = models.ProductSales
+    query = (select(sales.product_id, models.Product.name, sales.category, sales.items, sales.units, sales.revenue)
+             .outerjoin(models.Product, models.Product.id == sales.product_id)
+             .order_by(sales.revenue.desc(), sales.product_id.desc())
+             .limit(k))
+    if category is not None:
+        query = query.where(sales.category == category)
+    return [
+        {"product_id": row.product_id, "name": row.name, "category": row.category or None,
+         "items": row.items, "units": row.units, "item_revenue": round(row.revenue, 2)}
+        for row in db.execute(query)
+    ]
+
+def get_top_users(db: Session, k: int = 10) -> List[dict]:
+    """Customers by total spend, from the user_order_summaries rollup's spend index"""
+    summary = models.UserOrderSummary
+    query = (select(summary.user_id, models.User.first_name, models.User.last_name, models.User.email,
+                    summary.total_orders, summary.total_spent)
+             .outerjoin(models.User, models.User.id == summary.user_id)
+             .order_by(summary.total_spent.desc(), summary.user_id.desc())
+             .limit(k))
+    return [
+        {"user_id": row.user_id, "first_name": row.first_name, "last_name": row.last_name, "email": row.email,
+         "total_orders": row.total_orders, "order_total": round(row.total_spent, 2)}
+        for row in db.execute(query)
+    ]
+
 def get_database_stats(db: Session):
-    """Get overall database statistics"""
+    """Get overall database statistics from the maintained row counts"""
+    counts = dict(db.query(models.TableCount.table_name, models.TableCount.row_count).all())
     return {
-        "users_count": db.query(models.User).count(),
-        "orders_count": db.query(models.Order).count(),
-        "products_count": db.query(models.Product).count(),
-        "order_items_count": db.query(models.OrderItem).count(),
-        "distribution_centers_count": db.query(models.DistributionCenter).count()
+        "users_count": counts.get("users", 0),
+        "orders_count": counts.get("orders", 0),
+        "products_count": counts.get("products", 0),
+        "order_items_count": counts.get("order_items", 0),
+        "distribution_centers_count": counts.get("distribution_centers", 0)
     }
-
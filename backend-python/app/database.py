@@ -1,19 +1,79 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from . import metrics
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ecommerce.db")
+# Reads go to a replica when one is configured; otherwise to a second pool on the primary
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
 
-# For SQLite, add check_same_thread=False
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+# Sized to cover Starlette's 40 worker threads, so sync handlers don't queue for connections
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+
+# The sample database tracked in the repo
+SHIPPED_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ecommerce.db")
+
+# WAL lets readers run alongside a writer; mmap and a larger page cache cut read syscalls.
+# WAL is recorded in the file header, so the shipped database keeps its rollback journal
+# unless SQLITE_JOURNAL_MODE is set explicitly
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE")
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE or "WAL",
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),
+    "temp_store": "MEMORY",
+}
+
+def configure_sqlite(engine: Engine, read_only: bool = False) -> None:
+    """Apply SQLITE_PRAGMAS to every new connection (and query_only on read engines)"""
+    in_memory = engine.url.database in (None, "", ":memory:")
+    keep_journal = in_memory or (SQLITE_JOURNAL_MODE is None
+                                 and os.path.abspath(engine.url.database) == SHIPPED_DATABASE)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            if name == "journal_mode" and keep_journal:
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+def make_engine(url: str, read_only: bool = False) -> Engine:
+    if not url.startswith("sqlite"):
+        return create_engine(url, **POOL_OPTIONS)
+
+    # For SQLite, add check_same_thread=False
+    # (pre-ping guards against dropped server connections, which a file database doesn't have)
+    connect_args = {"check_same_thread": False}
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        engine = create_engine(url, connect_args=connect_args)
+    else:
+        engine = create_engine(url, connect_args=connect_args, **dict(POOL_OPTIONS, pool_pre_ping=False))
+    configure_sqlite(engine, read_only)
+    return engine
+
+engine = make_engine(DATABASE_URL)
+read_engine = make_engine(DATABASE_READ_URL, read_only=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+# Per-request query counts, SQL time and rows for /api/metrics
+metrics.instrument_engine(engine)
+metrics.instrument_engine(read_engine)
+metrics.instrument_orm(Base)
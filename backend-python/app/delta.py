@@ -0,0 +1,325 @@
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+
+from . import ingest, models
+
+# Each subdirectory of DELTA_DIR is one batch: any of the five CSV exports, applied in name order
+DELTA_DIR = os.getenv("DELTA_DIR", "../data/deltas")
+# Past this many changed orders, dropping the whole response cache beats per-order invalidation
+CACHE_CLEAR_THRESHOLD = 10000
+# How often an API process looks for batches applied by another process (the CLI, seed_data)
+DELTA_CHECK_SECONDS = float(os.getenv("DELTA_CHECK_SECONDS", "30"))
+# One applier per process: concurrent callers would both see a batch as pending and apply it twice
+_apply_lock = threading.Lock()
+
+@dataclass
+class DeltaStats:
+    table: str
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+@dataclass
+class BatchResult:
+    name: str
+    tables: List[DeltaStats] = field(default_factory=list)
+    # (order id, user id) pairs whose cached responses are now stale
+    changed_orders: Set[Tuple[Optional[int], Optional[int]]] = field(default_factory=set)
+
+    @property
+    def inserted(self) -> int:
+        return sum(stats.inserted for stats in self.tables)
+
+    @property
+    def updated(self) -> int:
+        return sum(stats.updated for stats in self.tables)
+
+    def touched(self, table: str) -> bool:
+        return any(stats.table == table and (stats.inserted or stats.updated) for stats in self.tables)
+
+class DeltaBatchError(Exception):
+    """A batch that could not be applied; the batches before it were, and are in applied
+
+    The original error is the __cause__: a ValueError for a bad export, anything else
+    (a database error, a missing file) for a failure on this side.
+    """
+
+    def __init__(self, name: str, message: str, applied: List[BatchResult]):
+        super().__init__(f"{name}: {message}")
+        self.applied = applied
+
+def upsert_statement(conn: Connection, table, update_columns: List[str], key: str = "id"):
+    """INSERT ... ON CONFLICT (key) DO UPDATE of update_columns, for the dialects that support it"""
+    if conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {conn.dialect.name}")
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[key]],
+        set_={name: statement.excluded[name] for name in update_columns},
+    )
+
+def get_watermark(conn: Connection, table) -> int:
+    """Highest id loaded into table, by delta batches or anything else
+
+    Bulk ingest and ORM writes never advance the stored watermark, so it is
+    only a floor: rows above it must still be compared, not assumed new.
+    """
+    stored = conn.execute(select(models.IngestWatermark.high_water_id)
+                          .where(models.IngestWatermark.table_name == table.name)).scalar()
+    return max(stored or 0, conn.execute(select(func.max(table.c.id))).scalar() or 0)
+
+def set_watermark(conn: Connection, table, high_water_id: int) -> None:
+    conn.execute(
+        upsert_statement(conn, models.IngestWatermark.__table__, ["high_water_id", "updated_at"], key="table_name"),
+        [{"table_name": table.name, "high_water_id": high_water_id, "updated_at": datetime.now()}],
+    )
+
+def _naive_utc(value):
+    """Timezone-aware values (ISO timestamps ending in Z) as the naive UTC datetimes the database returns"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _changed_orders(name: str, row: Dict[str, Any], previous: Optional[tuple], columns: List[str]) -> Set[tuple]:
+    """Cache keys touched by one new or changed row, including what it pointed at before"""
+    old = dict(zip(columns, previous)) if previous is not None else {}
+    if name == "orders":
+        return {(row["id"], row["user_id"]), (row["id"], old.get("user_id"))}
+    if name == "order_items":
+        return {(row["order_id"], None), (old.get("order_id"), None)}
+    return set()
+
+def apply_table(conn: Connection, name: str, file_path: str, result: BatchResult,
+                chunk_size: int = ingest.DEFAULT_CHUNK_SIZE) -> DeltaStats:
+    """Upsert the new and changed rows of one CSV export, chunk by chunk, on conn
+
+    Rows above the table's high-water mark are new and go straight to the
+    upsert. Rows at or below it are compared with the stored row first, so a
+    cumulative export rewrites only what actually changed.
+    """
+    spec = ingest.TABLE_SPECS[name]
+    table = spec.table
+    stats = DeltaStats(name)
+    started = time.perf_counter()
+    watermark = get_watermark(conn, table)
+    high_water_id = watermark
+    assign = ingest.nearest_center_assigner(conn) if name == "orders" else None
+
+    with open(file_path, "r", encoding="utf-8", newline="") as file:
+        header = next(csv.reader(file), None)
+        if header is None or (spec.required_columns and not all(col in header for col in spec.required_columns)):
+            # Raising rolls the whole batch back, so it stays pending until the export is fixed
+            raise ValueError(f"{os.path.basename(file_path)}: missing header or required columns")
+
+        # Only columns present in the export are compared and written, so a narrower
+        # file never resets the others to their defaults
+        compared = [column for column in spec.columns if column != "id" and column in header]
+        timestamps = [column for column, (_, convert) in spec.columns.items() if convert is ingest.parse_datetime]
+        for chunk in ingest.iter_csv_chunks(file, chunk_size):
+            columns = ingest.convert_columns(spec, header, chunk)
+            for column in timestamps:
+                columns[column] = [_naive_utc(value) for value in columns[column]]
+            rows = ingest.columns_to_params(columns)
+            known_ids = [row["id"] for row in rows if row["id"] <= watermark]
+            existing = {}
+            if known_ids:
+                existing = {row[0]: tuple(row[1:]) for row in conn.execute(
+                    select(table.c.id, *[table.c[column] for column in compared]).where(table.c.id.in_(known_ids)))}
+
+            keep = []
+            for position, row in enumerate(rows):
+                previous = existing.get(row["id"])
+                if previous is not None and previous == tuple(row[column] for column in compared):
+                    stats.unchanged += 1
+                    continue
+                if previous is None:
+                    stats.inserted += 1
+                else:
+                    stats.updated += 1
+                keep.append(position)
+                result.changed_orders |= _changed_orders(name, row, previous, compared)
+            if not keep:
+                continue
+
+            # The assigner and the upsert see only the rows being written
+            columns = {column: [values[position] for position in keep] for column, values in columns.items()}
+            update_columns = list(compared)
+            if assign:
+                assign(columns)
+                update_columns.append("distribution_center_id")
+            conn.execute(upsert_statement(conn, table, update_columns), ingest.columns_to_params(columns))
+            high_water_id = max(high_water_id, max(columns["id"]))
+
+    if high_water_id != watermark:
+        set_watermark(conn, table, high_water_id)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def applied_batches(engine: Engine) -> Set[str]:
+    with engine.connect() as conn:
+        return set(conn.execute(select(models.IngestBatch.name)).scalars())
+
+def pending_batches(engine: Engine, delta_dir: str = DELTA_DIR) -> List[str]:
+    """Batch directories in delta_dir not yet applied, in name order"""
+    if not os.path.isdir(delta_dir):
+        return []
+    applied = applied_batches(engine)
+    return [name for name in sorted(os.listdir(delta_dir))
+            if os.path.isdir(os.path.join(delta_dir, name)) and name not in applied]
+
+def apply_batch(engine: Engine, batch_dir: str, chunk_size: int = ingest.DEFAULT_CHUNK_SIZE) -> BatchResult:
+    """Apply one batch in a single transaction, recording it (and the new watermarks) on commit"""
+    result = BatchResult(os.path.basename(os.path.normpath(batch_dir)))
+    with engine.begin() as conn:
+        for stage in ingest.INGEST_STAGES:
+            for name in stage:
+                file_path = os.path.join(batch_dir, ingest.TABLE_SPECS[name].filename)
+                if os.path.exists(file_path):
+                    result.tables.append(apply_table(conn, name, file_path, result, chunk_size))
+        conn.execute(models.IngestBatch.__table__.insert(), [{
+            "name": result.name, "rows_inserted": result.inserted, "rows_updated": result.updated,
+            "loaded_at": datetime.now(),
+        }])
+    return result
+
+def apply_pending(engine: Engine, delta_dir: str = DELTA_DIR,
+                  chunk_size: int = ingest.DEFAULT_CHUNK_SIZE) -> List[BatchResult]:
+    """Apply every pending batch in order, stopping at the first one that fails"""
+    results = []
+    with _apply_lock:
+        for name in pending_batches(engine, delta_dir):
+            try:
+                results.append(apply_batch(engine, os.path.join(delta_dir, name), chunk_size))
+            except Exception as error:
+                raise DeltaBatchError(name, str(error), results) from error
+    return results
+
+def refresh_downstream(results: List[BatchResult]) -> None:
+    """Bring this process's caches and in-memory indexes in line with the applied batches
+
+    Rollups and search indexes inside the database follow through their triggers.
+    """
+    from . import analytics, cache, catalog, geo
+
+    changed_orders = set().union(*(result.changed_orders for result in results))
+    # Cached order responses embed users, products and centers, so changes to those retire all of them
+    embedded_changed = any(stats.updated for result in results for stats in result.tables
+                           if stats.table in ("users", "products", "distribution_centers"))
+    if len(changed_orders) > CACHE_CLEAR_THRESHOLD:
+        cache.response_cache.clear()
+    elif embedded_changed:
+        cache.response_cache.invalidate(cache.EMBEDDED_TAG)
+    else:
+        for order_id, user_id in changed_orders:
+            cache.invalidate_order(order_id, user_id)
+
+    if any(result.touched("products") for result in results):
+        catalog.product_catalog.invalidate()
+    if any(result.touched("distribution_centers") for result in results):
+        geo.invalidate_center_index()
+    # The column store appends new rows on refresh; changed rows need a full reload
+    if analytics.analytics_store.refreshed_at is not None:
+        if any(result.updated for result in results):
+            analytics.analytics_store.reload()
+        elif any(result.inserted for result in results):
+            analytics.analytics_store.refresh()
+
+def refresh_everything() -> None:
+    """Refresh for batches applied elsewhere, whose changes this process doesn't know"""
+    from . import analytics, cache, catalog, geo
+
+    cache.response_cache.clear()
+    catalog.product_catalog.invalidate()
+    geo.invalidate_center_index()
+    if analytics.analytics_store.refreshed_at is not None:
+        analytics.analytics_store.reload()
+
+class BatchWatcher:
+    """Notices batches that another process applied to the shared database
+
+    refresh_downstream only reaches the caches of the process that applied a
+    batch, so batches from the CLI (or seed_data) would leave an API process
+    stale. check() compares the recorded batch names with ingest_batches at
+    most every check_seconds and, on finding a batch this process didn't apply,
+    refreshes everything.
+    """
+
+    def __init__(self, engine: Engine, check_seconds: float = DELTA_CHECK_SECONDS):
+        self.engine = engine
+        self.check_seconds = check_seconds
+        self.known: Optional[Set[str]] = None
+        self.checked_at: Optional[float] = None
+        self.external = 0
+
+    def check_due(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at >= self.check_seconds
+
+    def record(self, results: List[BatchResult]) -> None:
+        """Batches applied (and refreshed for) by this process"""
+        if self.known is not None:
+            self.known.update(result.name for result in results)
+
+    def check(self) -> bool:
+        """Refresh if other processes applied batches since the last check; True if they did"""
+        self.checked_at = time.monotonic()
+        with self.engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(models.IngestBatch)).scalar()
+            if self.known is not None and count == len(self.known):
+                return False
+            names = set(conn.execute(select(models.IngestBatch.name)).scalars())
+        # The first check only learns what was applied before this process started
+        new = names - self.known if self.known is not None else set()
+        self.known = names
+        if not new:
+            return False
+        self.external += len(new)
+        refresh_everything()
+        return True
+
+def main(argv=None, engine: Engine = None) -> int:
+    """Apply pending batches and refresh this process's caches
+
+    Running API processes don't see this refresh: each notices the new batches
+    within DELTA_CHECK_SECONDS (see BatchWatcher) and then drops all its caches.
+    """
+    parser = argparse.ArgumentParser(
+        description="Apply new delta batches of CSV exports. Running API processes notice "
+                    "them within DELTA_CHECK_SECONDS and drop their caches.")
+    parser.add_argument("delta_dir", nargs="?", default=DELTA_DIR)
+    parser.add_argument("--chunk-size", type=int, default=ingest.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if engine is None:
+        from .database import engine
+
+    pending = pending_batches(engine, args.delta_dir)
+    if not pending:
+        print(f"No new batches in {args.delta_dir}.")
+        return 0
+    for name in pending:
+        started = time.perf_counter()
+        result = apply_batch(engine, os.path.join(args.delta_dir, name), args.chunk_size)
+        refresh_downstream([result])
+        print(f"{name}: applied in {time.perf_counter() - started:.2f}s")
+        for stats in result.tables:
+            print(f"  {stats.table}: {stats.inserted} inserted, {stats.updated} updated, "
+                  f"{stats.unchanged} unchanged in {stats.seconds:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Engine
+
+from . import models
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+ORDER_EXPORT_COLUMNS = [
+    models.Order.id,
+    models.Order.order_number,
+    models.Order.user_id,
+    models.Order.distribution_center_id,
+    models.Order.status,
+    models.Order.total_amount,
+    models.Order.order_date,
+]
+
+ORDER_ITEM_EXPORT_COLUMNS = [
+    models.OrderItem.id,
+    models.OrderItem.order_id,
+    models.OrderItem.product_id,
+    models.OrderItem.quantity,
+    models.OrderItem.price,
+]
+
+def _filter_orders(query: Select,
+                   status: Optional[str] = None,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None,
+                   distribution_center_id: Optional[int] = None,
+                   user_id: Optional[int] = None) -> Select:
+    if status is not None:
+        query = query.where(models.Order.status == status)
+    if start_date is not None:
+        query = query.where(models.Order.order_date >= start_date)
+    if end_date is not None:
+        query = query.where(models.Order.order_date < end_date)
+    if distribution_center_id is not None:
+        query = query.where(models.Order.distribution_center_id == distribution_center_id)
+    if user_id is not None:
+        query = query.where(models.Order.user_id == user_id)
+    return query
+
+# Exports carry no ORDER BY: rows come out in whichever index order the filters
+# select, so the first batch is sent without waiting for the database to sort
+def orders_export_query(**filters) -> Select:
+    """Flat order rows matching the filters"""
+    return _filter_orders(select(*ORDER_EXPORT_COLUMNS), **filters)
+
+def order_items_export_query(**filters) -> Select:
+    """Flat item rows for the orders matching the filters"""
+    query = select(*ORDER_ITEM_EXPORT_COLUMNS).join(models.Order, models.OrderItem.order_id == models.Order.id)
+    return _filter_orders(query, **filters)
+
+# Both formats write datetimes as ISO 8601
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _ndjson_lines(names: List[str], rows) -> str:
+    return "".join(json.dumps(dict(zip(names, map(_encode_value, row))), separators=(",", ":")) + "\n" for row in rows)
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([map(_encode_value, row) for row in rows])
+    return buffer.getvalue()
+
+def stream_rows(engine: Engine, query: Select, fmt: str = "ndjson",
+                batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Encode a query's rows batch by batch from a server-side cursor
+
+    Only one batch is held in memory at a time, so memory use does not grow
+    with the size of the export.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    names = [column.name for column in query.selected_columns]
+    if fmt == "csv":
+        yield _csv_lines([names])
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(query)
+        for rows in result.partitions():
+            yield _csv_lines(rows) if fmt == "csv" else _ndjson_lines(names, rows)
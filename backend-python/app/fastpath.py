@@ -0,0 +1,189 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Type, get_args
+
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+
+from . import metrics, models, schemas
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same bytes, only slower
+    orjson = None
+
+# Read-only list responses built from Core rows instead of ORM objects and
+# from_attributes validation. Field order, nesting and value types follow the
+# Pydantic schemas, so the bytes match model_dump_json() for the same data.
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, matching Pydantic's output for plain dicts and lists"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode()
+
+def _converter(annotation) -> Optional[Callable[[Any], Any]]:
+    # Pydantic renders float fields as floats even when the database hands back an int
+    if annotation is float or float in get_args(annotation):
+        return float
+    return None
+
+# Placeholder for fields the caller fills in from a separate query (one-to-many
+# relationships, aggregates); the key keeps its place in the schema's field order
+_DETACHED = object()
+
+class Shape:
+    """The columns a schema needs from a model, and how to rebuild the schema's dict from a row
+
+    Relationship fields become LEFT JOINs onto the related model, described by
+    their own Shape; the nested dict is None when the join finds no row.
+    Detached fields are left as None for the caller to fill in; their Shape
+    (or None for non-row values) is kept in `detached`.
+    """
+
+    def __init__(self, schema: Type[BaseModel], model, nested: Optional[Dict[str, "Shape"]] = None,
+                 detached: Optional[Dict[str, Optional["Shape"]]] = None):
+        self.model = model
+        self.nested = nested or {}
+        self.detached = detached or {}
+        self.hidden: FrozenSet[str] = frozenset()
+        self.fields: List[Tuple[str, Any]] = []
+        self.columns = []
+        for name, info in schema.model_fields.items():
+            if name in self.nested:
+                self.fields.append((name, self.nested[name]))
+            elif name in self.detached:
+                self.fields.append((name, _DETACHED))
+            else:
+                self.fields.append((name, _converter(info.annotation)))
+                self.columns.append(getattr(model, name))
+
+    def select_columns(self) -> List:
+        columns = list(self.columns)
+        for shape in self.nested.values():
+            columns.extend(shape.select_columns())
+        return columns
+
+    def select(self) -> Select:
+        query = select(*self.select_columns()).select_from(self.model)
+        for name, shape in self.nested.items():
+            query = query.outerjoin(shape.model, getattr(self.model, name))
+        return query
+
+    def build(self, row: Sequence, offset: int = 0) -> Tuple[Optional[dict], int]:
+        """Rebuild the dict starting at row[offset]; returns it and the offset after its columns"""
+        scalars = row[offset:offset + len(self.columns)]
+        position = offset + len(self.columns)
+        values = iter(scalars)
+        hidden = self.hidden
+        result = {}
+        for name, field in self.fields:
+            if isinstance(field, Shape):
+                value, position = field.build(row, position)
+            elif field is _DETACHED:
+                value = None
+            else:
+                value = next(values)
+                if field is not None and value is not None:
+                    value = field(value)
+            if name not in hidden:
+                result[name] = value
+        # A LEFT JOIN miss leaves every column NULL, including the primary key
+        if all(value is None for value in scalars):
+            return None, position
+        return result, position
+
+    def rows(self, rows: Sequence[Sequence]) -> List[dict]:
+        metrics.count_rows(len(rows))
+        return [self.build(row)[0] for row in rows]
+
+    def objects(self, objects: Sequence[Any]) -> List[dict]:
+        """Dicts from ORM objects loaded with only this shape's columns (no relationships)"""
+        fields = [(name, field) for name, field in self.fields if name not in self.hidden]
+        results = []
+        for obj in objects:
+            result = {}
+            for name, field in fields:
+                value = getattr(obj, name)
+                result[name] = field(value) if field is not None and value is not None else value
+            results.append(result)
+        return results
+
+    def column_names(self) -> List[str]:
+        return [column.key for column in self.columns]
+
+    def project(self, fields: Optional[Set[str]] = None, include: Optional[Set[str]] = None) -> "Shape":
+        """This shape cut down to the requested fields and embedded relationships
+
+        fields holds "name" for this model's fields and "relationship.name" for
+        a related one's; include names relationships to embed whole. With
+        fields given, only the named fields and relationships are returned;
+        with include alone, every field plus the included relationships. The
+        primary key is always read (a LEFT JOIN miss is told apart by it) but
+        only returned when asked for. Raises ValueError on unknown names.
+        """
+        if fields is None and include is None:
+            return self
+        relationships = {**self.nested, **self.detached}
+        names = {name for name, _ in self.fields}
+        own, sub = set(), defaultdict(set)
+        for path in fields or ():
+            name, _, rest = path.partition(".")
+            if name not in names or (rest and relationships.get(name) is None):
+                raise ValueError(f"Unknown field: {path}")
+            (sub[name].add(rest) if rest else own.add(name))
+        for name in include or ():
+            if name not in relationships:
+                raise ValueError(f"Unknown relationship: {name}")
+        embedded = set(include or ()) | (own & set(relationships)) | set(sub)
+
+        projected = Shape.__new__(Shape)
+        projected.model = self.model
+        projected.nested = {name: shape.project(sub.get(name)) for name, shape in self.nested.items()
+                            if name in embedded}
+        projected.detached = {name: shape.project(sub.get(name)) if shape is not None else None
+                              for name, shape in self.detached.items() if name in embedded}
+        projected.fields, projected.columns, hidden = [], [], set()
+        for (name, field), column in zip(self.fields, self._field_columns()):
+            if name in relationships:
+                if name in embedded:
+                    projected.fields.append((name, projected.nested.get(name, _DETACHED)))
+                continue
+            if fields is not None and name not in own:
+                if name != "id":
+                    continue
+                hidden.add(name)
+            projected.fields.append((name, field))
+            projected.columns.append(column)
+        projected.hidden = frozenset(hidden)
+        return projected
+
+    def _field_columns(self) -> List:
+        """The column behind each entry of self.fields, None for relationships"""
+        columns = iter(self.columns)
+        return [next(columns) if not isinstance(field, Shape) and field is not _DETACHED else None
+                for _, field in self.fields]
+
+def parse_fieldset(value: Optional[str]) -> Optional[Set[str]]:
+    """A comma-separated query parameter as a set of names; None when the parameter is absent"""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+def sparse(shape: Shape, fields: Optional[str] = None, include: Optional[str] = None) -> Shape:
+    """shape projected onto the fields= and include= query parameters"""
+    return shape.project(parse_fieldset(fields), parse_fieldset(include))
+
+DISTRIBUTION_CENTER = Shape(schemas.DistributionCenter, models.DistributionCenter)
+PRODUCT = Shape(schemas.Product, models.Product)
+USER = Shape(schemas.User, models.User)
+ORDER = Shape(schemas.Order, models.Order, {"distribution_center": DISTRIBUTION_CENTER})
+ORDER_ITEM = Shape(schemas.OrderItem, models.OrderItem, {"product": PRODUCT})
+ORDER_DETAIL = Shape(schemas.OrderDetail, models.Order, {"distribution_center": DISTRIBUTION_CENTER, "user": USER},
+                     {"order_items": ORDER_ITEM, "summary": None})
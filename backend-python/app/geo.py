@@ -0,0 +1,170 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+
+EARTH_RADIUS_KM = 6371.0088
+# Queries are processed in blocks so the query x center similarity matrix stays small
+QUERY_BLOCK_ELEMENTS = 1 << 20
+# Above this many centers a k-d tree (scipy, when installed) beats the dense matrix
+KDTREE_MIN_CENTERS = 256
+INDEX_TTL_SECONDS = 300
+
+# City centers for users without coordinates of their own
+CITY_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "Atlanta": (33.749, -84.388),
+    "Austin": (30.2672, -97.7431),
+    "Boston": (42.3601, -71.0589),
+    "Charlotte": (35.2271, -80.8431),
+    "Chicago": (41.8781, -87.6298),
+    "Dallas": (32.7767, -96.797),
+    "Denver": (39.7392, -104.9903),
+    "Detroit": (42.3314, -83.0458),
+    "Houston": (29.7604, -95.3698),
+    "Las Vegas": (36.1699, -115.1398),
+    "Los Angeles": (34.0522, -118.2437),
+    "Memphis": (35.1495, -90.049),
+    "Miami": (25.7617, -80.1918),
+    "Minneapolis": (44.9778, -93.265),
+    "Nashville": (36.1627, -86.7816),
+    "New Orleans": (29.9511, -90.0715),
+    "New York": (40.7128, -74.006),
+    "Philadelphia": (39.9526, -75.1652),
+    "Phoenix": (33.4484, -112.074),
+    "Portland": (45.5152, -122.6784),
+    "San Antonio": (29.4241, -98.4936),
+    "San Diego": (32.7157, -117.1611),
+    "San Francisco": (37.7749, -122.4194),
+    "Seattle": (47.6062, -122.3321),
+    "Washington": (38.9072, -77.0369),
+}
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km; arguments broadcast like any NumPy expression"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def unit_vectors(lat, lon) -> np.ndarray:
+    """Points on the unit sphere; nearest by chord length is nearest by great-circle distance"""
+    lat, lon = np.radians(np.asarray(lat, np.float64)), np.radians(np.asarray(lon, np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def geocode_cities(cities: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Look up city centers, one dictionary lookup per distinct city; NaN where unknown"""
+    names, inverse = np.unique(np.array([city or "" for city in cities], dtype=object), return_inverse=True)
+    table = np.array([CITY_COORDINATES.get(name, (np.nan, np.nan)) for name in names], np.float64).reshape(-1, 2)
+    coordinates = table[inverse.reshape(-1)]
+    return coordinates[:, 0], coordinates[:, 1]
+
+@dataclass
+class CenterIndex:
+    """Spatial index over distribution centers answering batched k-nearest queries"""
+    ids: np.ndarray
+    names: List[str]
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+
+    def __post_init__(self):
+        self.vectors = unit_vectors(self.latitudes, self.longitudes)
+        self.tree = None
+        if len(self.ids) >= KDTREE_MIN_CENTERS:
+            try:
+                from scipy.spatial import cKDTree  # optional; the dense path is exact too
+                self.tree = cKDTree(self.vectors)
+            except ImportError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nearest(self, lat, lon, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions (n x k) of the k nearest centers to each point, and their distances in km
+
+        Points with NaN coordinates get position -1 and distance NaN.
+        """
+        lat, lon = np.atleast_1d(np.asarray(lat, np.float64)), np.atleast_1d(np.asarray(lon, np.float64))
+        k = min(k, len(self.ids))
+        positions = np.full((len(lat), k), -1, np.int64)
+        distances = np.full((len(lat), k), np.nan)
+        known = ~(np.isnan(lat) | np.isnan(lon))
+        if not k or not known.any():
+            return positions, distances
+
+        rows = np.flatnonzero(known)
+        block_size = max(1, QUERY_BLOCK_ELEMENTS // len(self.ids))
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            points = unit_vectors(lat[block], lon[block])
+            if self.tree is not None:
+                _, nearest = self.tree.query(points, k=k)
+                nearest = nearest.reshape(len(block), k)
+            else:
+                # Largest dot product = smallest angle; partition, then order just the k survivors
+                similarity = points @ self.vectors.T
+                if k == 1:
+                    nearest = similarity.argmax(axis=1)[:, None]
+                else:
+                    nearest = np.argpartition(-similarity, k - 1, axis=1)[:, :k] if k < len(self.ids) else \
+                        np.tile(np.arange(len(self.ids)), (len(block), 1))
+                    order = np.argsort(-np.take_along_axis(similarity, nearest, axis=1), axis=1)
+                    nearest = np.take_along_axis(nearest, order, axis=1)
+            positions[block] = nearest
+            distances[block] = haversine_km(lat[block, None], lon[block, None],
+                                            self.latitudes[nearest], self.longitudes[nearest])
+        return positions, distances
+
+    def nearest_ids(self, lat, lon) -> np.ndarray:
+        """Id of the nearest center for each point, -1 where the point has no coordinates"""
+        positions, _ = self.nearest(lat, lon, k=1)
+        return np.where(positions[:, 0] >= 0, self.ids[positions[:, 0]], -1)
+
+    def nearest_centers(self, lat: float, lon: float, k: int = 1) -> List[dict]:
+        """The k nearest centers to one point, closest first, with their distances"""
+        positions, distances = self.nearest(lat, lon, k)
+        return [
+            {"id": int(self.ids[position]), "name": self.names[position],
+             "latitude": float(self.latitudes[position]), "longitude": float(self.longitudes[position]),
+             "distance_km": round(float(distance), 3)}
+            for position, distance in zip(positions[0], distances[0])
+            if position >= 0
+        ]
+
+def load_center_index(conn: Connection) -> CenterIndex:
+    """Build the index from the distribution_centers table (centers without coordinates are skipped)"""
+    rows = conn.execute(
+        select(models.DistributionCenter.id, models.DistributionCenter.name,
+               models.DistributionCenter.latitude, models.DistributionCenter.longitude)
+        .where(models.DistributionCenter.latitude.isnot(None), models.DistributionCenter.longitude.isnot(None))
+        .order_by(models.DistributionCenter.id)
+    ).all()
+    return CenterIndex(
+        ids=np.array([row[0] for row in rows], np.int64),
+        names=[row[1] for row in rows],
+        latitudes=np.array([row[2] for row in rows], np.float64),
+        longitudes=np.array([row[3] for row in rows], np.float64),
+    )
+
+_index_lock = threading.Lock()
+_cached_index: Optional[Tuple[float, CenterIndex]] = None
+
+def center_index(engine: Engine) -> CenterIndex:
+    """The shared index, rebuilt after INDEX_TTL_SECONDS so center changes are picked up"""
+    global _cached_index
+    with _index_lock:
+        if _cached_index is None or time.monotonic() - _cached_index[0] > INDEX_TTL_SECONDS:
+            with engine.connect() as conn:
+                _cached_index = (time.monotonic(), load_center_index(conn))
+        return _cached_index[1]
+
+def invalidate_center_index() -> None:
+    """Rebuild the shared index on next use"""
+    global _cached_index
+    with _index_lock:
+        _cached_index = None
@@ -0,0 +1,281 @@
+import csv
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import create_engine, event, select, Table
+from sqlalchemy.engine import Connection, Engine
+
+from . import geo, models
+
+logger = logging.getLogger("app.ingest")
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "10000"))
+DEFAULT_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "3"))
+
+# Durability is relaxed for the duration of a bulk load; a failed load is simply rerun
+SQLITE_BULK_PRAGMAS = [
+    "PRAGMA journal_mode=MEMORY",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+]
+
+def parse_datetime(value: str) -> datetime:
+    """Parse the ISO timestamps used in the CSV exports"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def optional_float(value: str) -> Optional[float]:
+    """Empty CSV fields stay NULL instead of failing float()"""
+    return float(value) if value not in ("", None) else None
+
+@dataclass
+class TableSpec:
+    """How one CSV export maps onto a table: column -> (default, converter)"""
+    table: Table
+    filename: str
+    columns: Dict[str, Tuple[Any, Callable[[Any], Any]]]
+    required_columns: Optional[List[str]] = None
+
+@dataclass
+class IngestStats:
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+TABLE_SPECS: Dict[str, TableSpec] = {
+    "distribution_centers": TableSpec(
+        table=models.DistributionCenter.__table__,
+        filename="distribution_centers.csv",
+        columns={
+            "id": (None, int),
+            "name": (None, str),
+            "latitude": (None, float),
+            "longitude": (None, float),
+        },
+        required_columns=["id", "name", "latitude", "longitude"],
+    ),
+    "users": TableSpec(
+        table=models.User.__table__,
+        filename="users.csv",
+        columns={
+            "id": (0, int),
+            "first_name": ("", str),
+            "last_name": ("", str),
+            "email": ("", str),
+            "phone": ("", str),
+            "city": ("", str),
+            "country": ("USA", str),
+            "address": ("", str),
+            "latitude": (None, optional_float),
+            "longitude": (None, optional_float),
+        },
+    ),
+    "products": TableSpec(
+        table=models.Product.__table__,
+        filename="products.csv",
+        columns={
+            "id": (0, int),
+            "name": ("", str),
+            "description": ("", str),
+            "price": (0, float),
+            "category": ("", str),
+            "sku": ("", str),
+        },
+    ),
+    "orders": TableSpec(
+        table=models.Order.__table__,
+        filename="orders.csv",
+        columns={
+            "id": (0, int),
+            "user_id": (0, int),
+            "order_number": ("", str),
+            "status": ("pending", str),
+            "total_amount": (0, float),
+            "order_date": ("2025-01-01T00:00:00", parse_datetime),
+        },
+    ),
+    "order_items": TableSpec(
+        table=models.OrderItem.__table__,
+        filename="order_items.csv",
+        columns={
+            "id": (0, int),
+            "order_id": (0, int),
+            "product_id": (0, int),
+            "quantity": (1, int),
+            "price": (0, float),
+        },
+    ),
+}
+
+# Tables within a stage are independent and load in parallel; stages run in order
+INGEST_STAGES = [
+    ["distribution_centers", "users", "products"],
+    ["orders"],
+    ["order_items"],
+]
+
+def create_bulk_engine(database_url: str) -> Engine:
+    """Create a separate engine tuned for bulk loading"""
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url)
+
+    engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 60})
+
+    @event.listens_for(engine, "connect")
+    def _set_bulk_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_BULK_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+def iter_csv_chunks(file, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[List[str]]]:
+    """Yield fixed-size lists of raw rows from an open CSV file (header already consumed)"""
+    reader = csv.reader(file)
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def convert_columns(spec: TableSpec, header: List[str], chunk: List[List[str]]) -> Dict[str, List[Any]]:
+    """Convert a chunk column by column"""
+    positions = {name: index for index, name in enumerate(header)}
+    columns = {}
+    for name, (default, convert) in spec.columns.items():
+        index = positions.get(name)
+        if index is None:
+            columns[name] = [convert(default)] * len(chunk) if default is not None else [None] * len(chunk)
+        else:
+            columns[name] = list(map(convert, [row[index] for row in chunk]))
+    return columns
+
+def columns_to_params(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+def convert_chunk(spec: TableSpec, header: List[str], chunk: List[List[str]]) -> List[Dict[str, Any]]:
+    """Convert a chunk column by column into insert parameters"""
+    return columns_to_params(convert_columns(spec, header, chunk))
+
+def load_table(engine: Engine,
+               spec: TableSpec,
+               file_path: str,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               assign: Optional[Callable[[Dict[str, List[Any]]], None]] = None,
+               write_lock: Optional[threading.Lock] = None) -> IngestStats:
+    """Stream one CSV file into its table, one executemany per chunk"""
+    started = time.perf_counter()
+    rows = 0
+    if not os.path.exists(file_path):
+        logger.warning("File not found: %s", file_path)
+        return IngestStats(spec.table.name, 0, 0.0)
+
+    write_lock = write_lock or threading.Lock()
+    insert = spec.table.insert()
+    with open(file_path, "r", encoding="utf-8", newline="") as file:
+        header = next(csv.reader(file), None)
+        if header is None:
+            return IngestStats(spec.table.name, 0, time.perf_counter() - started)
+        if spec.required_columns and not all(col in header for col in spec.required_columns):
+            logger.warning("Missing required columns in %s: %s", os.path.basename(file_path), spec.required_columns)
+            return IngestStats(spec.table.name, 0, time.perf_counter() - started)
+
+        for chunk in iter_csv_chunks(file, chunk_size):
+            columns = convert_columns(spec, header, chunk)
+            if assign:
+                assign(columns)
+            params = columns_to_params(columns)
+            with write_lock:
+                with engine.begin() as conn:
+                    conn.execute(insert, params)
+            rows += len(params)
+
+    return IngestStats(spec.table.name, rows, time.perf_counter() - started)
+
+def log_stats(results: List[IngestStats]) -> None:
+    for stats in results:
+        logger.info("%s: %d rows in %.2fs (%.0f rows/sec)", stats.table, stats.rows, stats.seconds, stats.rows_per_second)
+
+def nearest_distribution_center_assigner(engine: Engine) -> Callable[[Dict[str, List[Any]]], None]:
+    """Assign each order the distribution center nearest its user"""
+    with engine.connect() as conn:
+        return nearest_center_assigner(conn)
+
+def nearest_center_assigner(conn: Connection) -> Callable[[Dict[str, List[Any]]], None]:
+    """Assign each order the distribution center nearest its user, as seen by conn
+
+    Users are located by their own coordinates, else by their city's center; the
+    nearest center is resolved once per user, so each chunk is a single lookup.
+    Orders whose user can't be located get no distribution center.
+    """
+    index = geo.load_center_index(conn)
+    users = conn.execute(
+        select(models.User.id, models.User.latitude, models.User.longitude, models.User.city)
+        .order_by(models.User.id)
+    ).all()
+
+    user_ids = np.array([row[0] for row in users], np.int64)
+    latitudes = np.array([row[1] for row in users], np.float64)
+    longitudes = np.array([row[2] for row in users], np.float64)
+    missing = np.flatnonzero(np.isnan(latitudes) | np.isnan(longitudes))
+    if len(missing):
+        latitudes[missing], longitudes[missing] = geo.geocode_cities([users[i][3] for i in missing])
+    user_centers = index.nearest_ids(latitudes, longitudes) if len(index) else np.full(len(user_ids), -1)
+
+    def assign(columns: Dict[str, List[Any]]) -> None:
+        order_users = np.asarray(columns["user_id"], np.int64)
+        centers = np.full(len(order_users), -1, np.int64)
+        if len(user_ids):
+            positions = np.minimum(np.searchsorted(user_ids, order_users), len(user_ids) - 1)
+            found = user_ids[positions] == order_users
+            centers[found] = user_centers[positions[found]]
+        values = centers.astype(object)
+        values[centers < 0] = None
+        columns["distribution_center_id"] = values.tolist()
+
+    return assign
+
+def ingest_csv_directory(engine: Engine,
+                         data_dir: str,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         max_workers: int = DEFAULT_MAX_WORKERS) -> List[IngestStats]:
+    """Load every CSV export in data_dir, running independent tables in parallel"""
+    # SQLite allows a single writer: parsing runs in parallel, chunk writes take turns
+    write_lock = threading.Lock()
+    results: List[IngestStats] = []
+
+    for stage in INGEST_STAGES:
+        assigners = {}
+        if "orders" in stage:
+            assigners["orders"] = nearest_distribution_center_assigner(engine)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stage)))) as executor:
+            futures = [
+                executor.submit(
+                    load_table,
+                    engine,
+                    TABLE_SPECS[name],
+                    os.path.join(data_dir, TABLE_SPECS[name].filename),
+                    chunk_size,
+                    assigners.get(name),
+                    write_lock,
+                )
+                for name in stage
+            ]
+            results.extend(future.result() for future in futures)
+
+    return results
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements slower than this are logged with their parameters; unset disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0")) or None
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts with a final +Inf slot, sum)
+        self._values: Dict[Labels, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', _format_number(bound))])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_number(total)}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+REQUEST_DURATION = Histogram("api_request_duration_seconds", "Request latency by route, method and status")
+REQUEST_QUERIES = Histogram("api_request_queries", "SQL statements issued per request", COUNT_BUCKETS)
+REQUEST_SQL_DURATION = Histogram("api_request_sql_duration_seconds", "Time spent executing SQL per request")
+REQUEST_ROWS = Histogram("api_request_rows", "Rows materialized per request: ORM objects loaded plus fastpath Core rows",
+                         (0, 1, 10, 50, 100, 500, 1000, 5000, 10000))
+SERIALIZATION_DURATION = Histogram("api_serialization_duration_seconds", "Time spent encoding response bodies")
+QUERY_DURATION = Histogram("db_query_duration_seconds", "SQL statement execution time by statement type")
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+SINGLE_FLIGHT_REQUESTS = Counter("api_single_flight_requests_total",
+                                 "Cache misses by endpoint that ran the render (leader) or shared one in flight (coalesced)")
+REGISTRY = [REQUEST_DURATION, REQUEST_QUERIES, REQUEST_SQL_DURATION, REQUEST_ROWS,
+            SERIALIZATION_DURATION, QUERY_DURATION, SLOW_QUERIES, SINGLE_FLIGHT_REQUESTS]
+
+# Route endpoint -> path template, so metrics don't get a label per id
+_route_templates: Dict = {}
+
+def _route_template(scope) -> str:
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_templates:
+        app = scope.get("app")
+        _route_templates[endpoint] = next((route.path for route in getattr(app, "routes", ())
+                                           if getattr(route, "endpoint", None) is endpoint), "unmatched")
+    return _route_templates[endpoint]
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    sql_seconds: float = 0.0
+    rows: int = 0
+
+    @property
+    def route(self) -> str:
+        return _route_template(self.scope)
+
+# Stats for the request being handled; engine and ORM hooks add to it from any thread it runs on
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def _statement_type(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on the engine and attribute it to the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        QUERY_DURATION.observe(elapsed, statement=_statement_type(statement))
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+
+        if SLOW_QUERY_MS is not None and elapsed * 1000 >= SLOW_QUERY_MS:
+            SLOW_QUERIES.inc()
+            slow_query_logger.warning("slow query %.1f ms on %s: %s params=%r", elapsed * 1000,
+                                      stats.route if stats else "-", statement, parameters)
+
+def count_rows(count: int) -> None:
+    """Add rows materialized without the ORM (the fastpath Core reads) to the current request"""
+    stats = current_request.get()
+    if stats is not None:
+        stats.rows += count
+
+def instrument_orm(base) -> None:
+    """Count ORM objects hydrated during the current request"""
+
+    @event.listens_for(base, "load", propagate=True)
+    def _count_load(target, context):
+        count_rows(1)
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """Time encoding a response body, attributed to the current request's route"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = current_request.get()
+        SERIALIZATION_DURATION.observe(time.perf_counter() - started, route=stats.route if stats else "unmatched")
+
+class MeasuredJSONResponse(JSONResponse):
+    """The app's default response class: routes that return models or dicts report the JSON
+    encoding of their body too (FastAPI's response_model validation before it is not timed)"""
+
+    def render(self, content) -> bytes:
+        with measure_serialization():
+            return super().render(content)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, SQL and row counts per route once the response completes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            labels = {"route": stats.route}
+            REQUEST_DURATION.observe(time.perf_counter() - started, method=scope["method"], status=status, **labels)
+            REQUEST_QUERIES.observe(stats.queries, **labels)
+            REQUEST_SQL_DURATION.observe(stats.sql_seconds, **labels)
+            REQUEST_ROWS.observe(stats.rows, **labels)
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+INITIAL_REVISION = "0001_initial_schema"
+# Tables, columns and indexes as 0001 (and the metadata.create_all it replaced) left them
+INITIAL_SCHEMA = {
+    "distribution_centers": ({"id", "name", "latitude", "longitude"}, {"ix_distribution_centers_name"}),
+    "users": ({"id", "email", "first_name", "last_name", "phone", "address", "city", "country", "created_at"},
+              {"ix_users_email", "ix_users_id"}),
+    "products": ({"id", "name", "description", "price", "category", "sku"},
+                 {"ix_products_id", "ix_products_name", "ix_products_sku"}),
+    "orders": ({"id", "user_id", "distribution_center_id", "order_number", "status", "total_amount", "order_date"},
+               {"ix_orders_id", "ix_orders_order_number"}),
+    "order_items": ({"id", "order_id", "product_id", "quantity", "price"}, {"ix_order_items_id"}),
+}
+
+def alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+def schema_differences(conn, schema=INITIAL_SCHEMA) -> list:
+    """How the database's tables, columns and named indexes differ from schema; empty when they match"""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    differences = [f"unexpected table {table}" for table in sorted(tables - set(schema))]
+    for table, (columns, indexes) in schema.items():
+        if table not in tables:
+            differences.append(f"missing table {table}")
+            continue
+        found = {column["name"] for column in inspector.get_columns(table)}
+        found_indexes = {index["name"] for index in inspector.get_indexes(table) if index["name"]}
+        differences += [f"{table}: {kind} {name}" for kind, names in [
+            ("missing column", columns - found), ("unexpected column", found - columns),
+            ("missing index", indexes - found_indexes), ("unexpected index", found_indexes - indexes),
+        ] for name in sorted(names)]
+    return differences
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Bring the schema up to date, adopting unversioned databases whose schema is exactly 0001's
+
+    Raises RuntimeError for an unversioned database with any other schema
+    (e.g. create_all from newer models), which no stamp would make upgradable.
+    """
+    config = alembic_config()
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        tables = set(inspect(conn).get_table_names())
+        if "users" in tables and "alembic_version" not in tables:
+            differences = schema_differences(conn)
+            if differences:
+                raise RuntimeError(f"Database has no alembic_version and its schema is not {INITIAL_REVISION} "
+                                   f"({'; '.join(differences[:5])}); recreate it or stamp it by hand")
+            command.stamp(config, INITIAL_REVISION)
+        command.upgrade(config, revision)
+
+def check_revision(engine: Engine) -> str:
+    """The database's revision, after checking it is the head; raises RuntimeError otherwise. Runs no DDL."""
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise RuntimeError(f"Database schema is at {current or 'no revision'}, this build expects {head}; "
+                           "run `python -m app.migrate` first")
+    return current
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Upgrade the database schema to head (the deploy step for STARTUP_MODE=production)")
+    parser.add_argument("--database", help="Database URL (defaults to DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    from . import partitions
+    from .database import DATABASE_URL
+    engine = create_engine(args.database or DATABASE_URL)
+    before = current_revision(engine)
+    upgrade_database(engine)
+    created = partitions.ensure_month_partitions(engine)
+    print(f"Schema at {current_revision(engine)} (was {before or 'empty'})")
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
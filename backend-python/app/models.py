@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -24,6 +24,8 @@ class User(Base):
     address = Column(Text, nullable=True)
     city = Column(String, nullable=True)
     country = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     
     orders = relationship("Order", back_populates="user")
@@ -42,6 +44,13 @@ class Product(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Newest-first order history per user; id breaks order_date ties for keyset paging
+        Index("ix_orders_user_id_order_date", "user_id", "order_date", "id"),
+        Index("ix_orders_status_order_date", "status", "order_date"),
+        # Date-range listings: a B-tree range seek over [start, end) on the (unpartitioned) orders table
+        Index("ix_orders_order_date", "order_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -59,7 +68,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price = Column(Float)
@@ -67,3 +76,64 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
 
+
+# Rollups maintained by database triggers (see migrations/versions/0004_rollups.py)
+class UserOrderSummary(Base):
+    __tablename__ = "user_order_summaries"
+    __table_args__ = (
+        # Top customers by spend (see migrations/versions/0008_product_sales.py)
+        Index("ix_user_order_summaries_total_spent", "total_spent", "user_id"),
+    )
+    
+    user_id = Column(Integer, primary_key=True)
+    total_orders = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0)
+    latest_order_date = Column(DateTime, nullable=True)
+
+class TableCount(Base):
+    __tablename__ = "table_counts"
+    
+    table_name = Column(String, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+
+# Per day, status and center (see migrations/versions/0007_order_daily_stats.py);
+# a missing status is stored as '' and a missing center as 0
+class OrderDailyStat(Base):
+    __tablename__ = "order_daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    distribution_center_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+# Per product (see migrations/versions/0008_product_sales.py); the product's category is
+# copied in, a missing one as '', and revenue sums quantity x price
+class ProductSales(Base):
+    __tablename__ = "product_sales"
+    __table_args__ = (
+        Index("ix_product_sales_category_revenue", "category", "revenue", "product_id"),
+        Index("ix_product_sales_revenue", "revenue", "product_id"),
+    )
+    
+    product_id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False, default="")
+    items = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+# Incremental ingestion state (see app/delta.py)
+class IngestWatermark(Base):
+    __tablename__ = "ingest_watermarks"
+    
+    table_name = Column(String, primary_key=True)
+    high_water_id = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+
+class IngestBatch(Base):
+    __tablename__ = "ingest_batches"
+    
+    name = Column(String, primary_key=True)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    rows_updated = Column(Integer, nullable=False, default=0)
+    loaded_at = Column(DateTime, nullable=True)
@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    """Opaque cursor holding the keyset of the last row on a page"""
+    payload = [kind] + [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, kind: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(payload, list) or len(payload) != len(types) + 1 or payload[0] != kind:
+        raise ValueError("Invalid cursor")
+
+    values = []
+    for value, value_type in zip(payload[1:], types):
+        try:
+            values.append(datetime.fromisoformat(value) if value_type is datetime else value_type(value))
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+    return tuple(values)
+
+def make_page(rows: List[Any], limit: int, kind: str, key: Callable[[Any], Sequence[Any]]) -> Page:
+    """Build a page from limit + 1 fetched rows; the extra row only signals that more exist"""
+    items = rows[:limit]
+    next_cursor = encode_cursor(kind, key(items[-1])) if len(rows) > limit and items else None
+    return Page(items, next_cursor)
@@ -0,0 +1,75 @@
+from datetime import date
+from typing import List, Tuple
+
+from sqlalchemy import Date, cast, func, text
+from sqlalchemy.engine import Engine
+
+# order_daily_stats is range-partitioned by month on PostgreSQL; partitions are
+# created this many months ahead so new days never land in the default partition
+PARTITION_MONTHS_AHEAD = 2
+PARTITIONED_TABLE = "order_daily_stats"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def month_ranges(start: date, end: date) -> List[Tuple[date, date]]:
+    """[first, next first) for every month overlapping [start, end)"""
+    ranges = []
+    month = month_start(start)
+    while month < end:
+        ranges.append((month, add_months(month, 1)))
+        month = add_months(month, 1)
+    return ranges
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_{month:%Y_%m}"
+
+def day_expression(dialect: str, column):
+    """The calendar day of a DateTime column, as the rollup stores it"""
+    if dialect == "sqlite":
+        return func.date(column, type_=Date)
+    return cast(column, Date)
+
+def month_expression(dialect: str, column):
+    """First day of the month of a Date column"""
+    if dialect == "sqlite":
+        return func.date(column, "start of month", type_=Date)
+    return cast(func.date_trunc("month", column), Date)
+
+def ensure_month_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                            today: date = None) -> List[str]:
+    """On PostgreSQL, create any missing partitions from this month to months_ahead; returns their names
+
+    A month that already has rows in the default partition (written while
+    no partition covered it) would make PARTITION OF fail, so each new
+    partition is built standalone, those rows are moved into it, and then
+    it is attached. SQLite keeps the rollup in one table, where the
+    (day, ...) primary key gives date ranges the same pruning.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+    today = today or date.today()
+    created = []
+    with engine.begin() as conn:
+        existing = set(conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"), {"table": PARTITIONED_TABLE}).scalars())
+        for first, following in month_ranges(month_start(today), add_months(today, months_ahead + 1)):
+            name = partition_name(first)
+            if name not in existing:
+                conn.exec_driver_sql(f'CREATE TABLE "{name}" '
+                                     f"(LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                conn.exec_driver_sql(f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                                     f"WHERE day >= '{first}' AND day < '{following}' RETURNING *) "
+                                     f'INSERT INTO "{name}" SELECT * FROM moved')
+                conn.exec_driver_sql(f'ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION "{name}" '
+                                     f"FOR VALUES FROM ('{first}') TO ('{following}')")
+                created.append(name)
+    return created
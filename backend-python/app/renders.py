@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from . import fastpath, metrics, pagination, schemas
+
+# Response building shared by the sync handlers in main.py and the async ones in
+# app/async_api.py: handlers only fetch, so both modes answer with the same bytes,
+# status codes and messages.
+
+@contextmanager
+def bad_request() -> Iterator[None]:
+    """Turn a ValueError (unknown field, bad cursor) into a 400"""
+    try:
+        yield
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def sparse(shape: fastpath.Shape, fields: Optional[str] = None, include: Optional[str] = None) -> fastpath.Shape:
+    with bad_request():
+        return fastpath.sparse(shape, fields, include)
+
+def json_body(value) -> Response:
+    with metrics.measure_serialization():
+        body = fastpath.dumps(value)
+    return Response(content=body, media_type="application/json")
+
+def user_search_shape(fields: Optional[str]) -> Optional[fastpath.Shape]:
+    """Sparse results read only the requested columns and skip response model validation"""
+    return sparse(fastpath.USER, fields) if fields is not None else None
+
+def user_search_response(page: pagination.Page, shape: Optional[fastpath.Shape]):
+    if shape is None:
+        return {"results": page.items, "next_cursor": page.next_cursor}
+    return json_body({"results": shape.objects(page.items), "next_cursor": page.next_cursor})
+
+def user_orders_body(page: pagination.Page, cursor: Optional[str]) -> bytes:
+    if not page.items and cursor is None:
+        raise HTTPException(status_code=404, detail="No orders found for this user")
+    with metrics.measure_serialization():
+        return fastpath.dumps({"results": page.items, "next_cursor": page.next_cursor})
+
+def order_detail_body(detail: Optional[dict], shaped: bool) -> bytes:
+    """detail from crud.get_order_detail (ORM objects) or, when shaped, get_order_detail_rows"""
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    with metrics.measure_serialization():
+        if shaped:
+            return fastpath.dumps(detail)
+        return schemas.OrderDetail.model_validate(detail).model_dump_json().encode()
+
+def order_items_body(items: list) -> bytes:
+    if not items:
+        raise HTTPException(status_code=404, detail="No items found for this order")
+    with metrics.measure_serialization():
+        return fastpath.dumps(items)
+
+def page_response(page: pagination.Page) -> Response:
+    return json_body({"results": page.items, "next_cursor": page.next_cursor})
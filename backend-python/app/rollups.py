@@ -0,0 +1,164 @@
+import argparse
+import sys
+from typing import List
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.engine import Connection, Engine
+
+from . import models, partitions
+
+# Tables whose row counts are kept in table_counts
+COUNTED_MODELS = {
+    "users": models.User,
+    "orders": models.Order,
+    "products": models.Product,
+    "order_items": models.OrderItem,
+    "distribution_centers": models.DistributionCenter,
+}
+
+# total_spent is maintained by repeated float addition, so allow for rounding drift
+SPENT_TOLERANCE = 0.01
+
+def _recomputed_summaries():
+    return (
+        select(
+            models.Order.user_id,
+            func.count().label("total_orders"),
+            func.coalesce(func.sum(models.Order.total_amount), 0).label("total_spent"),
+            func.max(models.Order.order_date).label("latest_order_date"),
+        )
+        .where(models.Order.user_id.isnot(None))
+        .group_by(models.Order.user_id)
+    )
+
+def _recomputed_daily_stats(dialect: str):
+    day = partitions.day_expression(dialect, models.Order.order_date)
+    status = func.coalesce(models.Order.status, "")
+    center = func.coalesce(models.Order.distribution_center_id, 0)
+    return (
+        select(
+            day.label("day"),
+            status.label("status"),
+            center.label("distribution_center_id"),
+            func.count().label("orders"),
+            func.coalesce(func.sum(models.Order.total_amount), 0).label("revenue"),
+        )
+        .where(models.Order.order_date.isnot(None))
+        .group_by(day, status, center)
+    )
+
+def _recomputed_product_sales():
+    item = models.OrderItem
+    quantity = func.coalesce(item.quantity, 0)
+    return (
+        select(
+            item.product_id,
+            func.coalesce(func.max(models.Product.category), "").label("category"),
+            func.count().label("items"),
+            func.coalesce(func.sum(item.quantity), 0).label("units"),
+            func.coalesce(func.sum(quantity * func.coalesce(item.price, 0)), 0).label("revenue"),
+        )
+        .outerjoin(models.Product, models.Product.id == item.product_id)
+        .where(item.product_id.isnot(None))
+        .group_by(item.product_id)
+    )
+
+def rebuild(conn: Connection) -> None:
+    """Replace every rollup with a full recompute"""
+    summaries = models.UserOrderSummary.__table__
+    conn.execute(delete(summaries))
+    conn.execute(insert(summaries).from_select(
+        ["user_id", "total_orders", "total_spent", "latest_order_date"], _recomputed_summaries()))
+
+    counts = models.TableCount.__table__
+    conn.execute(delete(counts))
+    for table_name, model in COUNTED_MODELS.items():
+        conn.execute(insert(counts).from_select(
+            ["table_name", "row_count"], select(literal(table_name), func.count()).select_from(model)))
+
+    daily = models.OrderDailyStat.__table__
+    conn.execute(delete(daily))
+    conn.execute(insert(daily).from_select(
+        ["day", "status", "distribution_center_id", "orders", "revenue"], _recomputed_daily_stats(conn.dialect.name)))
+
+    sales = models.ProductSales.__table__
+    conn.execute(delete(sales))
+    conn.execute(insert(sales).from_select(
+        ["product_id", "category", "items", "units", "revenue"], _recomputed_product_sales()))
+
+def verify(conn: Connection) -> List[str]:
+    """Compare the rollups against a full recompute and describe every mismatch"""
+    problems = []
+
+    stored = {row.table_name: row.row_count for row in conn.execute(select(models.TableCount))}
+    for table_name, model in COUNTED_MODELS.items():
+        actual = conn.execute(select(func.count()).select_from(model)).scalar()
+        if stored.get(table_name) != actual:
+            problems.append(f"table_counts[{table_name}] = {stored.get(table_name)}, expected {actual}")
+
+    expected = {row.user_id: row for row in conn.execute(_recomputed_summaries())}
+    for row in conn.execute(select(models.UserOrderSummary)):
+        want = expected.pop(row.user_id, None)
+        if want is None:
+            if row.total_orders:
+                problems.append(f"user {row.user_id}: rollup has {row.total_orders} orders, expected none")
+        elif (row.total_orders != want.total_orders
+              or abs(row.total_spent - want.total_spent) > SPENT_TOLERANCE
+              or row.latest_order_date != want.latest_order_date):
+            problems.append(
+                f"user {row.user_id}: rollup ({row.total_orders}, {row.total_spent:.2f}, {row.latest_order_date}) "
+                f"expected ({want.total_orders}, {want.total_spent:.2f}, {want.latest_order_date})")
+    for user_id, want in expected.items():
+        problems.append(f"user {user_id}: missing rollup, expected {want.total_orders} orders")
+
+    # SQLite's date() gives strings where the model gives dates; both print as YYYY-MM-DD
+    expected = {(str(row.day), row.status, row.distribution_center_id): row
+                for row in conn.execute(_recomputed_daily_stats(conn.dialect.name))}
+    for row in conn.execute(select(models.OrderDailyStat)):
+        key = (str(row.day), row.status, row.distribution_center_id)
+        want = expected.pop(key, None)
+        if want is None or row.orders != want.orders or abs(row.revenue - want.revenue) > SPENT_TOLERANCE:
+            problems.append(f"order_daily_stats{key}: ({row.orders}, {row.revenue:.2f}) expected "
+                            + (f"({want.orders}, {want.revenue:.2f})" if want is not None else "no row"))
+    for key, want in expected.items():
+        problems.append(f"order_daily_stats{key}: missing, expected {want.orders} orders")
+
+    expected = {row.product_id: row for row in conn.execute(_recomputed_product_sales())}
+    for row in conn.execute(select(models.ProductSales)):
+        want = expected.pop(row.product_id, None)
+        if (want is None or (row.category, row.items, row.units) != (want.category, want.items, want.units)
+                or abs(row.revenue - want.revenue) > SPENT_TOLERANCE):
+            problems.append(f"product_sales[{row.product_id}]: ({row.category!r}, {row.items}, {row.units}, "
+                            f"{row.revenue:.2f}) expected " + (
+                                f"({want.category!r}, {want.items}, {want.units}, {want.revenue:.2f})"
+                                if want is not None else "no row"))
+    for product_id, want in expected.items():
+        problems.append(f"product_sales[{product_id}]: missing, expected {want.items} items")
+
+    return problems
+
+def main(argv=None, engine: Engine = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild the order rollups")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args(argv)
+
+    if engine is None:
+        from .database import engine
+
+    if args.command == "rebuild":
+        with engine.begin() as conn:
+            rebuild(conn)
+        print("Rollups rebuilt.")
+        return 0
+
+    with engine.connect() as conn:
+        problems = verify(conn)
+    for problem in problems[:50]:
+        print(problem)
+    if len(problems) > 50:
+        print(f"... and {len(problems) - 50} more")
+    print("Rollups OK." if not problems else f"{len(problems)} mismatches found.")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from datetime import date, datetime
+from typing import Dict, Optional, List
 from decimal import Decimal
 
 # Distribution Center Schemas
@@ -14,6 +14,9 @@ class DistributionCenter(DistributionCenterBase):
     
     id: int
 
+class NearestDistributionCenter(DistributionCenter):
+    distance_km: float = Field(..., description="Great-circle distance from the query point")
+
 # User Schemas
 class UserBase(BaseModel):
     email: str = Field(..., description="User email address")
@@ -63,6 +66,8 @@ class OrderItem(OrderItemBase):
     product_id: int
     product: Product
 
+OrderItemList = TypeAdapter(List[OrderItem])
+
 class OrderItemSummary(BaseModel):
     order_id: int
     items: List[OrderItem]
@@ -89,6 +94,15 @@ class OrderWithItems(Order):
 class OrderWithUser(Order):
     user: User
 
+class OrderTotals(BaseModel):
+    total_items: int = Field(..., description="Sum of item quantities")
+    total_amount: float = Field(..., description="Sum of quantity x price")
+    item_count: int = Field(..., description="Number of line items")
+
+class OrderDetail(OrderWithItems):
+    user: User
+    summary: OrderTotals
+
 # Response Schemas
 class UserOrderSummary(BaseModel):
     user_id: int
@@ -104,6 +118,87 @@ class DatabaseStats(BaseModel):
     order_items_count: int
     distribution_centers_count: int
 
+# Revenue is reported two ways, named apart: item_revenue sums quantity x price over
+# order items, order_total sums the orders' own total_amount
+ITEM_REVENUE = "Sum of order item quantity x price"
+ORDER_TOTAL = "Sum of order total_amount"
+
+# Analytics Schemas
+class DistributionCenterRevenue(BaseModel):
+    distribution_center_id: Optional[int]
+    name: Optional[str]
+    orders: int
+    item_revenue: float = Field(..., description=ITEM_REVENUE)
+
+class StatusRevenue(BaseModel):
+    status: str
+    orders: int
+    item_revenue: float = Field(..., description=ITEM_REVENUE)
+
+class CategoryRevenue(BaseModel):
+    category: Optional[str]
+    items: int = Field(..., description="Number of line items")
+    units: int = Field(..., description="Sum of item quantities")
+    item_revenue: float = Field(..., description=ITEM_REVENUE)
+
+class PeriodRevenue(BaseModel):
+    period_start: Optional[date] = Field(..., description="The day, or the Monday starting the week")
+    orders: int
+    item_revenue: float = Field(..., description=ITEM_REVENUE)
+
+class OrderStats(BaseModel):
+    day: Optional[date] = None
+    month: Optional[date] = Field(None, description="First day of the month")
+    status: Optional[str] = None
+    distribution_center_id: Optional[int] = None
+    orders: int
+    order_total: float = Field(..., description=ORDER_TOTAL)
+
+class TopProduct(BaseModel):
+    product_id: int
+    name: Optional[str] = None
+    category: Optional[str] = None
+    items: int = Field(..., description="Order lines sold")
+    units: int = Field(..., description="Sum of quantity")
+    item_revenue: float = Field(..., description=ITEM_REVENUE)
+
+class TopUser(BaseModel):
+    user_id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    total_orders: int
+    order_total: float = Field(..., description=ORDER_TOTAL)
+
+# Cursor Pagination Schemas
+class UserPage(BaseModel):
+    results: List[User]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+class OrderPage(BaseModel):
+    results: List[Order]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+class ProductPage(BaseModel):
+    results: List[Product]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+# Batch Lookup Schemas
+MAX_BATCH_SIZE = 500
+
+class OrderItemsBatchRequest(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Orders to fetch items for")
+
+class OrderItemsBatch(BaseModel):
+    results: Dict[int, List[OrderItem]] = Field(..., description="Items keyed by order id; empty for unknown orders")
+
+class UserOrdersBatchRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Users to fetch orders for")
+    limit_per_user: int = Field(50, ge=1, le=500, description="Most recent orders returned per user")
+
+class UserOrdersBatch(BaseModel):
+    results: Dict[int, List[Order]] = Field(..., description="Orders keyed by user id, newest first; empty for unknown users")
+
 class SearchResult(BaseModel):
     results: List[User]
     total_count: int
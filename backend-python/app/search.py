@@ -0,0 +1,114 @@
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, func, inspect, or_, select, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.sql import column, table
+
+from . import models
+
+USER_SEARCH_FIELDS = ("email", "first_name", "last_name", "city", "phone")
+
+# Trigram indexes cannot match terms shorter than this; those fall back to a scan
+MIN_TERM_LENGTH = 3
+
+# Created (with the triggers that keep it current) by migration 0003_user_search_index
+users_fts = table("users_fts", column("rowid"), column("rank"))
+
+# Engines known to carry the search index, so requests don't re-inspect the schema
+_indexed_engines: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+def connection_has_user_search_index(conn: Connection) -> bool:
+    """Inspect a connection's database for the search index"""
+    if conn.dialect.name == "sqlite":
+        return inspect(conn).has_table("users_fts")
+    if conn.dialect.name == "postgresql":
+        return conn.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_users_email_trgm'")
+        ).first() is not None
+    return False
+
+def has_user_search_index(db: Session) -> bool:
+    """Whether the session's database has the search index"""
+    engine = db.get_bind()
+    if engine not in _indexed_engines:
+        with engine.connect() as conn:
+            _indexed_engines[engine] = connection_has_user_search_index(conn)
+    return _indexed_engines[engine]
+
+def user_search_terms(email: Optional[str] = None,
+                      first_name: Optional[str] = None,
+                      last_name: Optional[str] = None,
+                      city: Optional[str] = None,
+                      phone: Optional[str] = None) -> Dict[str, str]:
+    """The non-empty search criteria keyed by users column"""
+    values = (email, first_name, last_name, city, phone)
+    return {field: value for field, value in zip(USER_SEARCH_FIELDS, values) if value}
+
+def terms_support_index(terms: Dict[str, str]) -> bool:
+    """Indexed search needs every term to be at least one trigram long"""
+    return bool(terms) and all(len(term) >= MIN_TERM_LENGTH for term in terms.values())
+
+def can_use_index(db: Session, terms: Dict[str, str]) -> bool:
+    return terms_support_index(terms) and has_user_search_index(db)
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _trigrams(term: str) -> List[str]:
+    term = term.lower()
+    return sorted({term[i:i + 3] for i in range(len(term) - 2)})
+
+def build_match_expression(terms: Dict[str, str], fuzzy: bool = False) -> str:
+    """FTS5 MATCH expression: any field containing its term (or sharing trigrams when fuzzy)"""
+    clauses = []
+    for field, term in terms.items():
+        if fuzzy:
+            phrase = "(" + " OR ".join(_quote(gram) for gram in _trigrams(term)) + ")"
+        else:
+            phrase = _quote(term)
+        clauses.append(f"({field} : {phrase})")
+    return " OR ".join(clauses)
+
+def user_search_query(dialect: str,
+                      terms: Dict[str, str],
+                      fuzzy: bool = False,
+                      after: Optional[Tuple[float, int]] = None,
+                      columns: Optional[List[str]] = None) -> Select:
+    """select(User, score) for an indexed search, best match first (lower score is better)"""
+    if dialect == "postgresql":
+        filters = []
+        similarities = []
+        for field, term in terms.items():
+            col = getattr(models.User, field)
+            filters.append(col.bool_op("%")(term) if fuzzy else col.ilike(f"%{term}%"))
+            similarities.append(func.similarity(col, term))
+
+        # Negated so that, as with FTS5 rank, lower is better
+        score = -(func.greatest(*similarities) if len(similarities) > 1 else similarities[0])
+        query = select(models.User, score).where(or_(*filters))
+    else:
+        score = users_fts.c.rank
+        query = (
+            select(models.User, score)
+            .join(users_fts, users_fts.c.rowid == models.User.id)
+            .where(text("users_fts MATCH :match").bindparams(match=build_match_expression(terms, fuzzy)))
+        )
+
+    if after:
+        query = query.where(tuple_(score, models.User.id) > tuple_(*after))
+    if columns:
+        query = query.options(load_only(*[getattr(models.User, name) for name in columns]))
+    return query.order_by(score, models.User.id)
+
+def search_users(db: Session,
+                 terms: Dict[str, str],
+                 skip: int = 0,
+                 limit: int = 100,
+                 fuzzy: bool = False,
+                 after: Optional[Tuple[float, int]] = None,
+                 columns: Optional[List[str]] = None) -> List[Tuple[models.User, float]]:
+    """Indexed user search as (user, score) pairs; columns limits the user columns read"""
+    query = user_search_query(db.get_bind().dialect.name, terms, fuzzy, after, columns).offset(skip).limit(limit)
+    return [(user, score) for user, score in db.execute(query).all()]
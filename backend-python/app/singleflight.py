@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+from collections import Counter as KeyCounter
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from . import metrics
+
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+# Keys kept for the "most coalesced" list in stats(); pruned to the busiest when exceeded
+TRACKED_KEYS = 1000
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key wait and share its outcome
+
+    Works for sync handlers (threads) through do() and async handlers through
+    do_async(). Nothing is kept once a call finishes; caching is the response
+    cache's job, this only collapses requests that overlap in time.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT):
+        self.enabled = enabled
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.coalesced_by_key: KeyCounter = KeyCounter()
+
+    def _record(self, namespace: str, key: str, shared: bool) -> None:
+        role = "coalesced" if shared else "leader"
+        metrics.SINGLE_FLIGHT_REQUESTS.inc(namespace=namespace, role=role)
+        with self._lock:
+            if not shared:
+                self.leaders += 1
+                return
+            self.coalesced += 1
+            self.coalesced_by_key[key] += 1
+            if len(self.coalesced_by_key) > TRACKED_KEYS:
+                self.coalesced_by_key = KeyCounter(dict(self.coalesced_by_key.most_common(TRACKED_KEYS // 2)))
+
+    def do(self, namespace: str, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """fn() or the result of an identical call already in flight; returns (result, shared)"""
+        if not self.enabled:
+            return fn(), False
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._record(namespace, key, not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, namespace: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async counterpart of do(); the shared call runs as its own task, so a caller that
+        disconnects does not cancel it for the others"""
+        if not self.enabled:
+            return await fn(), False
+        task = self._tasks.get(key)
+        shared = task is not None
+        if not shared:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        self._record(namespace, key, shared)
+        return await asyncio.shield(task), shared
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._tasks)
+
+    def stats(self, top: int = 10) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": self.in_flight(),
+                "most_coalesced": [{"key": key, "coalesced": count}
+                                   for key, count in self.coalesced_by_key.most_common(top)],
+            }
+
+single_flight = SingleFlight()
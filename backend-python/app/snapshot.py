@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import DateTime, Float, Integer, String, Table, create_engine, func, select
+from sqlalchemy.engine import Engine
+
+from . import ingest, migrate, models, rollups
+
+SNAPSHOT_FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "50000"))
+MANIFEST = "manifest.json"
+# Trigger-maintained rollups, recomputed after a load rather than snapshotted
+DERIVED_TABLES = {"user_order_summaries", "table_counts", "order_daily_stats", "product_sales"}
+# How SQLAlchemy stores DateTime values in SQLite
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # Arrow's %S includes the microseconds
+
+def snapshot_tables() -> List[Table]:
+    """Every models.py table except the trigger-maintained rollups, parents before children"""
+    return [table for table in models.Base.metadata.sorted_tables if table.name not in DERIVED_TABLES]
+
+def _arrow():
+    import pyarrow  # optional dependency, only needed for snapshots
+    return pyarrow
+
+def arrow_schema(table: Table):
+    pa = _arrow()
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, String):
+            arrow_type = pa.string()
+        else:
+            raise TypeError(f"No Arrow type for {table.name}.{column.name} ({column.type})")
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+def _writer(path: str, schema, fmt: str):
+    pa = _arrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema)
+    return pa.ipc.new_file(path, schema)
+
+def _batches(path: str, fmt: str, batch_size: int):
+    """Record batches from a snapshot file; Arrow files are memory-mapped and read without copying"""
+    pa = _arrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+
+def export_snapshot(engine: Engine, out_dir: str, fmt: str = "arrow",
+                    batch_size: int = SNAPSHOT_BATCH_SIZE) -> List[ingest.IngestStats]:
+    """Write each table to out_dir in fmt, streaming rows in primary key order"""
+    pa = _arrow()
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    with engine.connect() as conn:
+        manifest = {"format": fmt, "revision": migrate.current_revision(engine),
+                    "created_at": datetime.now().isoformat(), "tables": {}}
+        for table in snapshot_tables():
+            started = time.perf_counter()
+            schema = arrow_schema(table)
+            rows = 0
+            path = os.path.join(out_dir, table.name + SNAPSHOT_FORMATS[fmt])
+            query = select(table).order_by(*table.primary_key.columns)
+            with _writer(path, schema, fmt) as writer:
+                for partition in conn.execution_options(yield_per=batch_size).execute(query).partitions():
+                    columns = list(zip(*partition))
+                    writer.write_batch(pa.RecordBatch.from_arrays(
+                        [pa.array(values, field.type) for values, field in zip(columns, schema)], schema=schema))
+                    rows += len(partition)
+            manifest["tables"][table.name] = rows
+            results.append(ingest.IngestStats(table.name, rows, time.perf_counter() - started))
+
+    with open(os.path.join(out_dir, MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return results
+
+def _column_values(column, sqlite: bool) -> list:
+    """Python values for one Arrow column, going through NumPy (far faster than to_pylist)"""
+    pa = _arrow()
+    import pyarrow.compute as pc
+    if pa.types.is_timestamp(column.type):
+        if not sqlite:
+            return column.to_pylist()
+        column = pc.strftime(column, SQLITE_DATETIME_FORMAT)
+    if not column.null_count:
+        return column.to_numpy(zero_copy_only=False).tolist()
+    values = pc.fill_null(column, "" if pa.types.is_string(column.type) else 0).to_numpy(zero_copy_only=False)
+    values = values.astype(object)
+    values[column.is_null().to_numpy(zero_copy_only=False)] = None
+    return values.tolist()
+
+@contextmanager
+def _deferred_indexes(conn, table_names: List[str]):
+    """On SQLite, drop the tables' indexes and triggers for the load, then recreate them
+
+    Building an index once over sorted input beats updating it per row, and the
+    rollups and user search index the triggers maintain are rebuilt in bulk.
+    """
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    placeholders = ", ".join("?" for _ in table_names)
+    saved = conn.exec_driver_sql(
+        "SELECT type, name, sql FROM sqlite_master "
+        f"WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+        tuple(table_names),
+    ).all()
+    for object_type, name, _ in saved:
+        conn.exec_driver_sql(f'DROP {object_type.upper()} "{name}"')
+    yield
+    for _, _, sql in saved:
+        conn.exec_driver_sql(sql)
+    rollups.rebuild(conn)
+    if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'users_fts'").first():
+        conn.exec_driver_sql("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+def import_snapshot(engine: Engine, snapshot_dir: str,
+                    batch_size: int = SNAPSHOT_BATCH_SIZE) -> List[ingest.IngestStats]:
+    """Bulk-load a snapshot into an empty database at the snapshot's schema revision"""
+    with open(os.path.join(snapshot_dir, MANIFEST)) as file:
+        manifest = json.load(file)
+    fmt = manifest["format"]
+    revision = migrate.current_revision(engine)
+    if revision != manifest["revision"]:
+        raise ValueError(f"Snapshot is at revision {manifest['revision']}, database is at {revision}")
+
+    tables = {table.name: table for table in snapshot_tables()}
+    results = []
+    with engine.begin() as conn:
+        for name in manifest["tables"]:
+            if conn.execute(select(func.count()).select_from(tables[name])).scalar():
+                raise ValueError(f"Table {name} already has rows; snapshots load into empty databases")
+
+        sqlite = conn.dialect.name == "sqlite"
+        with _deferred_indexes(conn, list(manifest["tables"])):
+            for name in manifest["tables"]:
+                started = time.perf_counter()
+                rows = 0
+                table = tables[name]
+                # SQLite takes positional rows straight through the driver, skipping per-value bind processing
+                statement = (f"INSERT INTO {name} ({', '.join(table.columns.keys())}) "
+                             f"VALUES ({', '.join('?' for _ in table.columns)})")
+                for batch in _batches(os.path.join(snapshot_dir, name + SNAPSHOT_FORMATS[fmt]), fmt, batch_size):
+                    if not batch.num_rows:
+                        continue
+                    columns = [_column_values(batch.column(column.name), sqlite) for column in table.columns]
+                    if sqlite:
+                        conn.exec_driver_sql(statement, list(zip(*columns)))
+                    else:
+                        conn.execute(table.insert(), [dict(zip(table.columns.keys(), row)) for row in zip(*columns)])
+                    rows += batch.num_rows
+                results.append(ingest.IngestStats(name, rows, time.perf_counter() - started))
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export or import a binary snapshot of every table")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("directory")
+    parser.add_argument("--format", choices=sorted(SNAPSHOT_FORMATS), default="arrow")
+    parser.add_argument("--database", help="Database URL (defaults to DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    from .database import DATABASE_URL
+    database_url = args.database or DATABASE_URL
+    started = time.perf_counter()
+    if args.command == "export":
+        # A plain engine: the bulk pragmas would switch a live database out of WAL
+        engine = create_engine(database_url)
+        migrate.upgrade_database(engine)
+        results = export_snapshot(engine, args.directory, args.format)
+    else:
+        engine = ingest.create_bulk_engine(database_url)
+        migrate.upgrade_database(engine)
+        results = import_snapshot(engine, args.directory)
+    engine.dispose()
+
+    for stats in results:
+        print(f"  {stats.table}: {stats.rows} rows in {stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/sec)")
+    print(f"{args.command.capitalize()}ed in {time.perf_counter() - started:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import configure_mappers
+
+from . import migrate, models, partitions
+
+# "production" checks the schema revision instead of migrating, and configures mappers and
+# the OpenAPI schema before serving; "development" migrates at startup and stays lazy
+STARTUP_MODE = os.getenv("STARTUP_MODE", "development").lower()
+# Open the pools' connections before the first request
+WARM_POOL = os.getenv("WARM_POOL", "false").lower() in ("1", "true", "yes")
+# Render the hottest responses into the response cache (and build the product catalog) at startup
+WARM_CACHES = os.getenv("WARM_CACHES", "false").lower() in ("1", "true", "yes")
+WARM_TOP_USERS = int(os.getenv("WARM_TOP_USERS", "50"))
+WARM_RECENT_ORDERS = int(os.getenv("WARM_RECENT_ORDERS", "50"))
+# Fixed warm-up paths: product search builds the in-memory product catalog; /api/stats is an
+# uncached table_counts query, sent to exercise the read session and response model path
+WARM_STATIC_PATHS = ["/api/products/search?limit=1", "/api/stats"]
+
+logger = logging.getLogger("app.startup")
+IMPORTED_AT = time.time()
+
+def process_started_at() -> float:
+    """Wall-clock time this process started, from /proc on Linux; elsewhere when this module was imported"""
+    try:
+        with open("/proc/self/stat") as file:
+            # starttime (field 22) is in clock ticks since boot; fields before it follow the parenthesized name
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return IMPORTED_AT
+
+class StartupReport:
+    """How long each startup phase took, and how long after process start the first health check succeeded"""
+
+    def __init__(self, mode: str = STARTUP_MODE):
+        self.mode = mode
+        self.started_at = process_started_at()
+        self.phases: Dict[str, float] = {}
+        self.warmed: Dict[str, int] = {}
+        self.ready_seconds: Optional[float] = None
+        self.first_healthy_seconds: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.ready_seconds = time.time() - self.started_at
+        logger.info("Ready to serve %.3fs after process start (%s)", self.ready_seconds,
+                    ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items()))
+
+    def mark_healthy(self) -> None:
+        if self.first_healthy_seconds is None:
+            self.first_healthy_seconds = time.time() - self.started_at
+            logger.info("First healthy response %.3fs after process start", self.first_healthy_seconds)
+
+    def as_dict(self) -> dict:
+        return {"mode": self.mode, "phases": dict(self.phases), "warmed": dict(self.warmed),
+                "ready_seconds": self.ready_seconds, "first_healthy_seconds": self.first_healthy_seconds}
+
+report = StartupReport()
+
+def prepare_schema(engine: Engine, mode: str = STARTUP_MODE) -> None:
+    """Migrate (development) or only verify the revision (production, where `python -m app.migrate`
+    runs the DDL, and creates the coming months' partitions, as a deploy step)"""
+    if mode == "production":
+        migrate.check_revision(engine)
+        return
+    migrate.upgrade_database(engine)
+    partitions.ensure_month_partitions(engine)
+
+def configure_eagerly(app) -> None:
+    """Do the one-off work the first requests would otherwise pay for: mapper configuration
+    and the OpenAPI schema (the JSON schemas of every request and response model)"""
+    configure_mappers()
+    app.openapi()
+
+def warm_pool(engine: Engine, connections: Optional[int] = None) -> int:
+    """Check out up to the pool size of connections at once, so each is opened (and set up), then return them"""
+    connections = connections if connections is not None else getattr(engine.pool, "size", lambda: 1)()
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+async def warm_async_pool(engine, connections: Optional[int] = None) -> int:
+    connections = connections if connections is not None else getattr(engine.pool, "size", lambda: 1)()
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(await engine.connect())
+    finally:
+        for conn in opened:
+            await conn.close()
+    return len(opened)
+
+def hot_paths(engine: Engine, top_users: int = WARM_TOP_USERS, recent_orders: int = WARM_RECENT_ORDERS) -> List[str]:
+    """Order lists of the users with the most orders and details of the newest orders, plus WARM_STATIC_PATHS"""
+    with engine.connect() as conn:
+        user_ids = conn.execute(select(models.UserOrderSummary.user_id)
+                                .order_by(models.UserOrderSummary.total_orders.desc())
+                                .limit(top_users)).scalars().all()
+        order_ids = conn.execute(select(models.Order.id).order_by(models.Order.id.desc())
+                                 .limit(recent_orders)).scalars().all()
+    return (list(WARM_STATIC_PATHS)
+            + [f"/api/users/{user_id}/orders" for user_id in user_ids]
+            + [path for order_id in order_ids for path in (f"/api/orders/{order_id}", f"/api/orders/{order_id}/items")])
+
+async def warm_requests(app, paths: List[str]) -> int:
+    """Send GETs through the app in-process; responses land in the response cache under their usual keys"""
+    import httpx
+    warmed = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+        for path in paths:
+            response = await client.get(path)
+            if response.status_code < 500:
+                warmed += 1
+            else:
+                logger.warning("Warm-up request %s returned %s", path, response.status_code)
+    return warmed
+
+async def start(app, engine: Engine, read_engine: Engine, async_engine=None, mode: str = STARTUP_MODE,
+                warm_pool_connections: bool = WARM_POOL, warm_caches: bool = WARM_CACHES) -> StartupReport:
+    """Run the startup phases in order, recording each in the report"""
+    with report.phase("schema"):
+        prepare_schema(engine, mode)
+    if mode == "production":
+        with report.phase("configure"):
+            configure_eagerly(app)
+    if warm_pool_connections:
+        with report.phase("pool"):
+            report.warmed["connections"] = warm_pool(engine) + warm_pool(read_engine)
+            if async_engine is not None:
+                report.warmed["connections"] += await warm_async_pool(async_engine)
+    if warm_caches:
+        with report.phase("caches"):
+            report.warmed["responses"] = await warm_requests(app, hot_paths(read_engine))
+    report.mark_ready()
+    return report
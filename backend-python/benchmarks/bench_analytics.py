@@ -0,0 +1,72 @@
+"""Revenue breakdowns: SQL GROUP BY over the order tables versus the NumPy column store.
+
+Run from backend-python/:  python -m benchmarks.bench_analytics [orders]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app import ingest, models
+from app.analytics import AnalyticsStore
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+ITEM_REVENUE = func.sum(models.OrderItem.quantity * models.OrderItem.price)
+
+# The SQL each breakdown replaces, as (key, orders or items, revenue) rows
+SQL_BREAKDOWNS = {
+    "distribution_center": select(
+        models.Order.distribution_center_id, func.count(func.distinct(models.Order.id)), ITEM_REVENUE,
+    ).join(models.OrderItem, models.OrderItem.order_id == models.Order.id).group_by(models.Order.distribution_center_id),
+    "status": select(
+        models.Order.status, func.count(func.distinct(models.Order.id)), ITEM_REVENUE,
+    ).join(models.OrderItem, models.OrderItem.order_id == models.Order.id).group_by(models.Order.status),
+    "category": select(
+        models.Product.category, func.count(models.OrderItem.id), ITEM_REVENUE,
+    ).join(models.Product, models.OrderItem.product_id == models.Product.id).group_by(models.Product.category),
+    "day": select(
+        func.date(models.Order.order_date), func.count(func.distinct(models.Order.id)), ITEM_REVENUE,
+    ).join(models.OrderItem, models.OrderItem.order_id == models.Order.id).group_by(func.date(models.Order.order_date)),
+}
+
+STORE_BREAKDOWNS = {
+    "distribution_center": lambda store: store.revenue_by_distribution_center(),
+    "status": lambda store: store.revenue_by_status(),
+    "category": lambda store: store.revenue_by_category(),
+    "day": lambda store: store.revenue_by_period("day"),
+}
+
+def sql_breakdown(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(SQL_BREAKDOWNS[name]).all()
+
+def timed_ms(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main(orders=200000):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=5000, products=1000, orders=orders)
+        engine = sqlite_engine(os.path.join(workdir, "analytics.db"))
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+        store = AnalyticsStore(engine, refresh_seconds=float("inf"))
+        started = time.perf_counter()
+        store.refresh()
+        print(f"{orders} orders; column store loaded in {time.perf_counter() - started:.2f}s")
+
+        for name in SQL_BREAKDOWNS:
+            sql_ms = timed_ms(lambda: sql_breakdown(engine, name))
+            store_ms = timed_ms(lambda: STORE_BREAKDOWNS[name](store))
+            print(f"  {name:20} SQL {sql_ms:9.2f} ms   NumPy {store_ms:8.2f} ms   {sql_ms / store_ms:6.1f}x")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,133 @@
+"""Per-endpoint throughput and p50/p95/p99 latency against a local API server,
+saved as JSON so runs can be compared.
+
+Run from backend-python/:
+    python -m benchmarks.bench_api --orders 100000 --concurrency 1,16,64 --output results/base.json
+    python -m benchmarks.bench_api --database sqlite:////tmp/1m.db --env CACHE_BACKEND=none --env ASYNC_DB=true
+    python -m benchmarks.bench_api compare results/base.json results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+
+from sqlalchemy import create_engine, func, select
+
+from app import ingest, migrate, models
+from benchmarks.common import LAST_NAMES
+from benchmarks.generate import DatasetSpec, generate
+from benchmarks.load import BACKEND_DIR, api_server, print_result, run_load
+
+# Scenario name -> path builder taking (rng, users, orders)
+SCENARIOS = {
+    "users_search": lambda rng, users, orders: f"/api/users/search?email={rng.randint(1, users)}@example.com",
+    "users_search_broad": lambda rng, users, orders: f"/api/users/search?last_name={rng.choice(LAST_NAMES)}&limit=20",
+    "user_orders": lambda rng, users, orders: f"/api/users/{rng.randint(1, users)}/orders",
+    "order_items": lambda rng, users, orders: f"/api/orders/{rng.randint(1, orders)}/items",
+    "order_detail": lambda rng, users, orders: f"/api/orders/{rng.randint(1, orders)}",
+}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def table_sizes(database_url):
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        users = conn.execute(select(func.max(models.User.id))).scalar() or 0
+        orders = conn.execute(select(func.max(models.Order.id))).scalar() or 0
+    engine.dispose()
+    return users, orders
+
+def run_suite(database_url, scenarios, concurrency_levels, duration, env, seed=11):
+    users, orders = table_sizes(database_url)
+    results = {}
+    with api_server(database_url, **env) as base_url:
+        for name in scenarios:
+            rng = random.Random(seed)
+            build = SCENARIOS[name]
+            results[name] = []
+            for concurrency in concurrency_levels:
+                result = run_load(base_url, lambda: build(rng, users, orders), concurrency, duration)
+                print_result(name, result)
+                results[name].append(result)
+    return results
+
+def compare(baseline_path, candidate_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(candidate_path) as file:
+        candidate = json.load(file)
+
+    print(f"{baseline.get('commit')} -> {candidate.get('commit')}")
+    for name, runs in candidate["results"].items():
+        before = {run["concurrency"]: run for run in baseline["results"].get(name, [])}
+        for run in runs:
+            old = before.get(run["concurrency"])
+            if old is None:
+                continue
+            print(f"  {name:20} c={run['concurrency']:<5} "
+                  f"{old['throughput']:9.1f} -> {run['throughput']:9.1f} req/s ({run['throughput'] / max(old['throughput'], 1e-9):5.2f}x)   "
+                  f"p99 {old['p99_ms']:8.1f} -> {run['p99_ms']:8.1f} ms")
+
+def main(argv):
+    if argv[:1] == ["compare"]:
+        return compare(*argv[1:3])
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100000, help="Size of the generated dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", help="Benchmark an existing database instead of generating one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,16,64")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario and concurrency level")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the API server, e.g. ASYNC_DB=true")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(",")
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    env = dict(item.split("=", 1) for item in args.env)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset = {"database": args.database}
+        database_url = args.database
+        if database_url is None:
+            spec = DatasetSpec.for_orders(args.orders, seed=args.seed)
+            started = time.perf_counter()
+            dataset = dict(asdict(spec), rows=generate(spec, os.path.join(workdir, "data")))
+            database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+            engine = ingest.create_bulk_engine(database_url)
+            migrate.upgrade_database(engine)
+            ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+            engine.dispose()
+            print(f"Generated and loaded {args.orders} orders in {time.perf_counter() - started:.1f}s")
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "dataset": dataset,
+            "server_env": env,
+            "duration": args.duration,
+            "results": run_suite(database_url, scenarios, concurrency_levels, args.duration, env),
+        }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
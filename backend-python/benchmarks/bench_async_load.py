@@ -0,0 +1,43 @@
+"""Throughput of the sync and async API modes at 100-1000 concurrent clients.
+
+Run from backend-python/:  python -m benchmarks.bench_async_load [seconds]
+"""
+import os
+import random
+import sys
+import tempfile
+
+from sqlalchemy import create_engine
+
+from app import ingest, migrate
+from benchmarks.common import write_sample_csvs
+from benchmarks.load import api_server, print_result, run_load
+
+CONCURRENCY = [100, 250, 500, 1000]
+USERS, ORDERS = 5000, 50000
+
+def main(duration=10.0):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=USERS, products=2000, orders=ORDERS)
+        database_url = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        engine = create_engine(database_url)
+        migrate.upgrade_database(engine)
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+        engine.dispose()
+
+        rng = random.Random(3)
+
+        def next_path():
+            if rng.random() < 0.5:
+                return f"/api/users/{rng.randint(1, USERS)}/orders"
+            return f"/api/orders/{rng.randint(1, ORDERS)}/items"
+
+        for mode in ("false", "true"):
+            label = "async" if mode == "true" else "sync"
+            print(f"{label} mode")
+            with api_server(database_url, ASYNC_DB=mode) as base_url:
+                for concurrency in CONCURRENCY:
+                    print_result(label, run_load(base_url, next_path, concurrency, duration))
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,51 @@
+"""Product search: the ilike / price range queries in crud versus the in-memory
+catalog index in app/catalog.py.
+
+Run from backend-python/:  python -m benchmarks.bench_catalog [products]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import Session
+
+from app import crud, ingest
+from app.catalog import ProductCatalog
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+SEARCHES = {
+    "name": {"name": "Product 12"},
+    "category": {"category": "Outerwear"},
+    "price range": {"min_price": 100, "max_price": 110},
+    "name + category + price": {"name": "Product 3", "category": "Tops", "max_price": 150},
+    "no filters, deep page": {"after_id": 40000},
+}
+
+def measure(fn, repeat=200):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+def main(products=50000):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=10, products=products, orders=10)
+        engine = sqlite_engine(os.path.join(workdir, "catalog.db"))
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+        started = time.perf_counter()
+        catalog = ProductCatalog(engine).reload()
+        print(f"catalog of {len(catalog)} products built in {time.perf_counter() - started:.2f}s")
+        with Session(engine) as db:
+            for label, search in SEARCHES.items():
+                sql = measure(lambda: crud.search_products(db, limit=50, **search), repeat=20)
+                memory = measure(lambda: catalog.search(limit=50, **search))
+                print(f"  {label:26} SQL {sql:10.0f} us   catalog {memory:8.1f} us   ({sql / memory:6.0f}x)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,93 @@
+"""A daily delta of new and changed orders: full reload of every export versus
+app.delta applying only the new batch, as a delta-only and as a cumulative file.
+
+Run from backend-python/:  python -m benchmarks.bench_delta [orders] [new_orders]
+"""
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from app import delta, ingest, migrate
+from benchmarks.generate import DatasetSpec, generate
+
+CHANGED_ORDERS = 1000
+
+def read_csv(path):
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    return rows[0], rows[1:]
+
+def write_csv(path, header, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def split_dataset(full_dir, base_dir, orders):
+    """Copy the reference tables and the first `orders` orders into base_dir; return the rest"""
+    os.makedirs(base_dir)
+    for name in ("distribution_centers.csv", "users.csv", "products.csv"):
+        shutil.copy(os.path.join(full_dir, name), base_dir)
+    order_header, order_rows = read_csv(os.path.join(full_dir, "orders.csv"))
+    item_header, item_rows = read_csv(os.path.join(full_dir, "order_items.csv"))
+    write_csv(os.path.join(base_dir, "orders.csv"), order_header, order_rows[:orders])
+    write_csv(os.path.join(base_dir, "order_items.csv"), item_header,
+              [row for row in item_rows if int(row[1]) <= orders])
+    return order_header, order_rows, item_header, [row for row in item_rows if int(row[1]) > orders]
+
+def load(database_path, data_dir):
+    engine = create_engine(f"sqlite:///{database_path}")
+    migrate.upgrade_database(engine)
+    started = time.perf_counter()
+    ingest.ingest_csv_directory(engine, data_dir)
+    return engine, time.perf_counter() - started
+
+def main(orders=200000, new_orders=5000):
+    with tempfile.TemporaryDirectory() as workdir:
+        full_dir, base_dir = os.path.join(workdir, "full"), os.path.join(workdir, "base")
+        generate(DatasetSpec.for_orders(orders + new_orders), full_dir)
+        order_header, order_rows, item_header, new_items = split_dataset(full_dir, base_dir, orders)
+
+        # The day's status changes to existing orders
+        rng = random.Random(1)
+        changed = [list(row) for row in rng.sample(order_rows[:orders], CHANGED_ORDERS)]
+        for row in changed:
+            row[3] = "returned"
+        changed_by_id = {row[0]: row for row in changed}
+        cumulative = [changed_by_id.get(row[0], row) for row in order_rows]
+
+        batches = {
+            "delta-only file": (changed + order_rows[orders:], new_items),
+            "cumulative file": (cumulative, new_items),
+        }
+
+        engine, seconds = load(os.path.join(workdir, "full.db"), full_dir)
+        engine.dispose()
+        print(f"{orders} orders + {new_orders} new, {CHANGED_ORDERS} changed")
+        print(f"  {'full reload':24} {seconds:8.2f} s")
+
+        for label, (delta_orders, delta_items) in batches.items():
+            database_path = os.path.join(workdir, "delta.db")
+            if os.path.exists(database_path):
+                os.remove(database_path)
+            engine, _ = load(database_path, base_dir)
+            batch_dir = os.path.join(workdir, label.replace(" ", "-"), "day-1")
+            write_csv(os.path.join(batch_dir, "orders.csv"), order_header, delta_orders)
+            write_csv(os.path.join(batch_dir, "order_items.csv"), item_header, delta_items)
+
+            started = time.perf_counter()
+            result = delta.apply_batch(engine, batch_dir)
+            seconds = time.perf_counter() - started
+            engine.dispose()
+            stats = ", ".join(f"{s.table}: +{s.inserted} ~{s.updated} ={s.unchanged}" for s in result.tables)
+            print(f"  {label:24} {seconds:8.2f} s   ({stats})")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,49 @@
+"""Peak Python memory of exporting every order: a materialized ORM list encoded
+as one JSON document, versus the streaming NDJSON export.
+
+Run from backend-python/:  python -m benchmarks.bench_export [orders ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import Session
+
+from app import export, ingest, models, schemas
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+def materialized(engine):
+    """The list-endpoint approach: load every order, validate, dump one body"""
+    with Session(engine) as db:
+        orders = db.query(models.Order).all()
+        body = b"".join(schemas.Order.model_validate(order).model_dump_json().encode() for order in orders)
+    return len(body)
+
+def streamed(engine):
+    return sum(len(chunk) for chunk in export.stream_rows(engine, export.orders_export_query()))
+
+def measure(label, fn, engine):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(engine)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:14} {seconds:7.2f}s   peak {peak / 1024 / 1024:8.1f} MiB   {size / 1024 / 1024:8.1f} MiB out")
+
+def main(sizes):
+    for orders in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            write_sample_csvs(os.path.join(workdir, "data"), users=1000, products=200, orders=orders, items_per_order=1)
+            engine = sqlite_engine(os.path.join(workdir, "export.db"))
+            ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+            print(f"{orders} orders")
+            measure("materialized", materialized, engine)
+            measure("streamed", streamed, engine)
+            engine.dispose()
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 100000, 500000])
@@ -0,0 +1,60 @@
+"""Nearest distribution center for a batch of points: a per-row Python loop over
+every center versus the vectorized spatial index in app/geo.py.
+
+Run from backend-python/:  python -m benchmarks.bench_geo [points]
+"""
+import math
+import sys
+import time
+
+import numpy as np
+
+from app import geo
+from benchmarks.generate import DISTRIBUTION_CENTERS
+
+# The per-row loop is timed on a sample and extrapolated
+LOOP_SAMPLE = 100000
+
+def loop_nearest(centers, latitudes, longitudes):
+    """One haversine per (point, center) pair in pure Python"""
+    nearest = []
+    for lat, lon in zip(latitudes, longitudes):
+        best, best_distance = None, math.inf
+        for center_id, _, center_lat, center_lon in centers:
+            p1, p2 = math.radians(lat), math.radians(center_lat)
+            a = math.sin((p2 - p1) / 2) ** 2 + \
+                math.cos(p1) * math.cos(p2) * math.sin(math.radians(center_lon - lon) / 2) ** 2
+            distance = 2 * geo.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+            if distance < best_distance:
+                best, best_distance = center_id, distance
+        nearest.append(best)
+    return nearest
+
+def random_centers(rng, count):
+    return [(i, f"DC {i}", lat, lon) for i, lat, lon in
+            zip(range(1, count + 1), rng.uniform(25, 49, count).tolist(), rng.uniform(-124, -67, count).tolist())]
+
+def main(points=1000000):
+    rng = np.random.default_rng(7)
+    latitudes, longitudes = rng.uniform(25, 49, points), rng.uniform(-124, -67, points)
+    for label, centers in [("10 centers", DISTRIBUTION_CENTERS), ("1000 centers", random_centers(rng, 1000))]:
+        index = geo.CenterIndex(
+            ids=np.array([c[0] for c in centers]), names=[c[1] for c in centers],
+            latitudes=np.array([c[2] for c in centers]), longitudes=np.array([c[3] for c in centers]),
+        )
+        started = time.perf_counter()
+        fast = index.nearest_ids(latitudes, longitudes)
+        vectorized = time.perf_counter() - started
+
+        sample = min(points, LOOP_SAMPLE if len(centers) < 100 else LOOP_SAMPLE // 100)
+        started = time.perf_counter()
+        slow = loop_nearest(centers, latitudes[:sample].tolist(), longitudes[:sample].tolist())
+        loop = (time.perf_counter() - started) * points / sample
+
+        assert list(fast[:sample]) == slow
+        print(f"{label}, {points} points")
+        print(f"  {'per-row loop':24} {loop:9.2f} s  ({points / loop:12,.0f} points/s, extrapolated)")
+        print(f"  {'spatial index':24} {vectorized:9.2f} s  ({points / vectorized:12,.0f} points/s)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,83 @@
+"""Compare the streaming bulk loader with the original row-by-row ORM seeding.
+
+Run from backend-python/:  python -m benchmarks.bench_ingest [orders]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app import models, ingest
+from benchmarks.common import sqlite_engine, write_sample_csvs
+from seed_data import load_csv_data
+
+def orm_row_by_row_seed(db, data_dir):
+    """The original create_sample_data path: whole-file lists and one db.add() per row"""
+    centers_data = load_csv_data(os.path.join(data_dir, "distribution_centers.csv"), ["id", "name", "latitude", "longitude"])
+    distribution_center_ids = []
+    for row in centers_data:
+        db.add(models.DistributionCenter(id=int(row["id"]), name=row["name"],
+                                         latitude=float(row["latitude"]), longitude=float(row["longitude"])))
+        distribution_center_ids.append(int(row["id"]))
+    db.commit()
+
+    for row in load_csv_data(os.path.join(data_dir, "users.csv")):
+        db.add(models.User(id=int(row.get("id", 0)), first_name=row.get("first_name", ""),
+                           last_name=row.get("last_name", ""), email=row.get("email", ""),
+                           phone=row.get("phone", ""), city=row.get("city", ""),
+                           country=row.get("country", "USA"), address=row.get("address", "")))
+    db.commit()
+
+    for row in load_csv_data(os.path.join(data_dir, "products.csv")):
+        db.add(models.Product(id=int(row.get("id", 0)), name=row.get("name", ""),
+                              description=row.get("description", ""), price=float(row.get("price", 0)),
+                              category=row.get("category", ""), sku=row.get("sku", "")))
+    db.commit()
+
+    for row in load_csv_data(os.path.join(data_dir, "orders.csv")):
+        db.add(models.Order(id=int(row.get("id", 0)), user_id=int(row.get("user_id", 0)),
+                            distribution_center_id=random.choice(distribution_center_ids) if distribution_center_ids else None,
+                            order_number=row.get("order_number", ""), status=row.get("status", "pending"),
+                            total_amount=float(row.get("total_amount", 0)),
+                            order_date=datetime.fromisoformat(row.get("order_date", "2025-01-01T00:00:00").replace("Z", "+00:00"))))
+    db.commit()
+
+    for row in load_csv_data(os.path.join(data_dir, "order_items.csv")):
+        db.add(models.OrderItem(id=int(row.get("id", 0)), order_id=int(row.get("order_id", 0)),
+                                product_id=int(row.get("product_id", 0)), quantity=int(row.get("quantity", 1)),
+                                price=float(row.get("price", 0))))
+    db.commit()
+
+def main(orders=50000):
+    with tempfile.TemporaryDirectory() as workdir:
+        data_dir = os.path.join(workdir, "data")
+        write_sample_csvs(data_dir, users=orders // 5, products=2000, orders=orders, items_per_order=3)
+        total_rows = orders // 5 + 2000 + orders * 4 + 4
+        print(f"Dataset: {orders} orders, {total_rows} rows total")
+
+        legacy_engine = sqlite_engine(os.path.join(workdir, "legacy.db"))
+        started = time.perf_counter()
+        with Session(legacy_engine) as db:
+            orm_row_by_row_seed(db, data_dir)
+        legacy_seconds = time.perf_counter() - started
+        legacy_engine.dispose()
+
+        sqlite_engine(os.path.join(workdir, "bulk.db")).dispose()
+        bulk_engine = ingest.create_bulk_engine(f"sqlite:///{os.path.join(workdir, 'bulk.db')}")
+        started = time.perf_counter()
+        stats = ingest.ingest_csv_directory(bulk_engine, data_dir)
+        bulk_seconds = time.perf_counter() - started
+        bulk_engine.dispose()
+
+        print(f"\nrow-by-row ORM: {legacy_seconds:.2f}s ({total_rows / legacy_seconds:,.0f} rows/sec)")
+        print(f"streaming bulk: {bulk_seconds:.2f}s ({total_rows / bulk_seconds:,.0f} rows/sec)")
+        for table_stats in stats:
+            print(f"  {table_stats.table:22} {table_stats.rows:>10} rows  {table_stats.rows_per_second:>12,.0f} rows/sec")
+        print(f"speedup: {legacy_seconds / bulk_seconds:.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
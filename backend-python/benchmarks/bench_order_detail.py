@@ -0,0 +1,56 @@
+"""Order detail with hundreds of line items: chained joinedloads + Python totals
+versus selectinload + SQL totals.
+
+Run from backend-python/:  python -m benchmarks.bench_order_detail [items_per_order]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import Session, joinedload
+
+from app import crud, ingest, models, schemas
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+def joined_detail(db, order_id):
+    """The original path: one query joining order, user, center, items and products"""
+    order = db.query(models.Order).options(
+        joinedload(models.Order.user),
+        joinedload(models.Order.distribution_center),
+        joinedload(models.Order.order_items).joinedload(models.OrderItem.product),
+    ).filter(models.Order.id == order_id).first()
+    items = order.order_items
+    detail = {field: getattr(order, field) for field in crud.ORDER_DETAIL_FIELDS}
+    detail["summary"] = {
+        "total_items": sum(item.quantity for item in items),
+        "total_amount": round(sum(item.quantity * item.price for item in items), 2),
+        "item_count": len(items),
+    }
+    return detail
+
+def measure(label, engine, fn, order_ids):
+    samples = []
+    for order_id in order_ids:
+        with Session(engine) as db:
+            started = time.perf_counter()
+            schemas.OrderDetail.model_validate(fn(db, order_id)).model_dump_json()
+            samples.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:28} mean {statistics.mean(samples):8.2f} ms   median {statistics.median(samples):8.2f} ms")
+
+def main(items_per_order=300, orders=200):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=100, products=5000, orders=orders,
+                          items_per_order=items_per_order)
+        engine = sqlite_engine(os.path.join(workdir, "detail.db"))
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+        print(f"{orders} orders x {items_per_order} line items")
+        order_ids = list(range(1, orders + 1))
+        measure("joinedload + Python totals", engine, joined_detail, order_ids)
+        measure("selectinload + SQL totals", engine, crud.get_order_detail, order_ids)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,83 @@
+"""Dashboard stats: GROUP BY over the orders table versus the trigger-maintained
+order_daily_stats rollup, for date ranges from a week to the whole year, plus
+what maintaining the rollup costs a bulk order load.
+
+Run from backend-python/:  python -m benchmarks.bench_order_stats [orders]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app import crud, ingest, migrate, models
+from benchmarks.common import write_sample_csvs
+
+RANGES = {
+    "1 week": (date(2024, 6, 3), date(2024, 6, 10)),
+    "1 month": (date(2024, 6, 1), date(2024, 7, 1)),
+    "1 quarter": (date(2024, 4, 1), date(2024, 7, 1)),
+    "1 year": (date(2024, 1, 1), date(2025, 1, 1)),
+}
+GROUPINGS = [("day",), ("month", "status"), ("day", "status", "distribution_center")]
+ROLLUP_TRIGGERS = ["order_daily_stats_insert", "order_daily_stats_delete",
+                   "order_daily_stats_update_old", "order_daily_stats_update_new"]
+
+def orders_group_by(db, start, end, group_by):
+    """The same breakdown computed from the orders table"""
+    keys = {
+        "day": func.date(models.Order.order_date),
+        "month": func.date(models.Order.order_date, "start of month"),
+        "status": models.Order.status,
+        "distribution_center": models.Order.distribution_center_id,
+    }
+    columns = [keys[name] for name in group_by]
+    query = (select(*columns, func.count(), func.sum(models.Order.total_amount))
+             .where(models.Order.order_date >= start, models.Order.order_date < end)
+             .group_by(*columns).order_by(*columns))
+    return db.execute(query).all()
+
+def timed_ms(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def load(workdir, name, with_rollup):
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, name)}")
+    migrate.upgrade_database(engine)
+    if not with_rollup:
+        with engine.begin() as conn:
+            for trigger in ROLLUP_TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER {trigger}")
+    results = ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+    seconds = sum(stats.seconds for stats in results if stats.table == "orders")
+    return engine, seconds
+
+def main(orders=200000):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=20000, products=2000, orders=orders, items_per_order=1)
+        bare, bare_seconds = load(workdir, "bare.db", with_rollup=False)
+        bare.dispose()
+        engine, rollup_seconds = load(workdir, "stats.db", with_rollup=True)
+        print(f"Loading {orders} orders: {bare_seconds:.2f}s without the rollup triggers, {rollup_seconds:.2f}s with them")
+
+        with Session(engine) as db:
+            rollup_rows = db.execute(select(func.count()).select_from(models.OrderDailyStat)).scalar()
+            print(f"order_daily_stats: {rollup_rows} rows for {orders} orders")
+            for group_by in GROUPINGS:
+                print(f"group_by={','.join(group_by)}")
+                for label, (start, end) in RANGES.items():
+                    scan = timed_ms(lambda: orders_group_by(db, start, end, group_by))
+                    rollup = timed_ms(lambda: crud.get_order_stats(db, start, end, group_by))
+                    print(f"  {label:10} orders table {scan:8.2f} ms   rollup {rollup:7.2f} ms   ({scan / rollup:5.1f}x)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
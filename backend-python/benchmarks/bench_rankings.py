@@ -0,0 +1,133 @@
+"""Top-N rankings: best-selling products (overall and per category) and top
+customers by spend, computed on demand from order_items and orders versus read
+from the trigger-maintained product_sales and user_order_summaries rollups.
+
+For each dataset size it reports the latency of both, and the accuracy of the
+rollup answers against the exact on-demand ones (recall of the top-k ids and
+the largest revenue difference), before and after a round of item updates and
+deletes. Also reports what maintaining product_sales costs a bulk load.
+
+Run from backend-python/:  python -m benchmarks.bench_rankings [orders,orders,...]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import crud, ingest, migrate, models
+from benchmarks.common import CATEGORIES, write_sample_csvs
+
+SIZES = [20000, 200000]
+KS = [10, 100]
+ROLLUP_TRIGGERS = ["product_sales_insert", "product_sales_delete",
+                   "product_sales_update_old", "product_sales_update_new"]
+
+def exact_top_products(db, category=None, k=10):
+    """Top products by revenue aggregated from every order item"""
+    item = models.OrderItem
+    revenue = func.sum(func.coalesce(item.quantity, 0) * func.coalesce(item.price, 0))
+    query = (select(item.product_id, revenue)
+             .join(models.Product, models.Product.id == item.product_id)
+             .group_by(item.product_id)
+             .order_by(revenue.desc(), item.product_id.desc()).limit(k))
+    if category is not None:
+        query = query.where(models.Product.category == category)
+    return db.execute(query).all()
+
+def exact_top_users(db, k=10):
+    spent = func.sum(models.Order.total_amount)
+    return db.execute(select(models.Order.user_id, spent).where(models.Order.user_id.isnot(None))
+                      .group_by(models.Order.user_id)
+                      .order_by(spent.desc(), models.Order.user_id.desc()).limit(k)).all()
+
+def timed_ms(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def accuracy(db):
+    """Lowest recall of the top-k ids and largest revenue difference over every ranking and k"""
+    recall, error = 1.0, 0.0
+    for k in KS:
+        pairs = [(crud.get_top_products(db, category, k), exact_top_products(db, category, k), "item_revenue")
+                 for category in [None] + CATEGORIES]
+        pairs.append((crud.get_top_users(db, k), exact_top_users(db, k), "order_total"))
+        for ranked, exact, field in pairs:
+            if not exact:
+                continue
+            ids = [row["product_id"] if "product_id" in row else row["user_id"] for row in ranked]
+            recall = min(recall, len(set(ids) & {row[0] for row in exact}) / len(exact))
+            error = max([error] + [abs(row[field] - want[1]) for row, want in zip(ranked, exact)])
+    return recall, error
+
+def load(workdir, name, with_rollup):
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, name)}")
+    migrate.upgrade_database(engine)
+    if not with_rollup:
+        with engine.begin() as conn:
+            for trigger in ROLLUP_TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER {trigger}")
+    results = ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+    seconds = sum(stats.seconds for stats in results if stats.table == "order_items")
+    return engine, seconds
+
+def churn(engine, items, rng, changes=2000):
+    """Reprice, requantify, move and delete random items, as delta batches do"""
+    with engine.begin() as conn:
+        for item_id in rng.sample(range(1, items + 1), changes):
+            action = rng.random()
+            if action < 0.4:
+                conn.execute(update(models.OrderItem).where(models.OrderItem.id == item_id)
+                             .values(quantity=rng.randint(1, 9)))
+            elif action < 0.7:
+                conn.execute(update(models.OrderItem).where(models.OrderItem.id == item_id)
+                             .values(price=round(rng.uniform(5, 250), 2)))
+            elif action < 0.85:
+                conn.execute(update(models.OrderItem).where(models.OrderItem.id == item_id)
+                             .values(product_id=rng.randint(1, 2000)))
+            else:
+                conn.execute(delete(models.OrderItem).where(models.OrderItem.id == item_id))
+
+def main(sizes=SIZES):
+    for orders in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            write_sample_csvs(os.path.join(workdir, "data"), users=max(1000, orders // 10), products=2000, orders=orders)
+            bare, bare_seconds = load(workdir, "bare.db", with_rollup=False)
+            bare.dispose()
+            engine, rollup_seconds = load(workdir, "rankings.db", with_rollup=True)
+            with Session(engine) as db:
+                items = db.execute(select(func.count()).select_from(models.OrderItem)).scalar()
+            print(f"{orders} orders, {items} items: loading items took {bare_seconds:.2f}s without "
+                  f"the product_sales triggers, {rollup_seconds:.2f}s with them")
+
+            with Session(engine) as db:
+                category = CATEGORIES[0]
+                for label, exact, ranked in [
+                    ("top 10 products", lambda: exact_top_products(db, k=10), lambda: crud.get_top_products(db, k=10)),
+                    ("top 10 in category", lambda: exact_top_products(db, category, 10),
+                     lambda: crud.get_top_products(db, category, 10)),
+                    ("top 100 products", lambda: exact_top_products(db, k=100), lambda: crud.get_top_products(db, k=100)),
+                    ("top 10 users", lambda: exact_top_users(db, 10), lambda: crud.get_top_users(db, 10)),
+                    ("top 100 users", lambda: exact_top_users(db, 100), lambda: crud.get_top_users(db, 100)),
+                ]:
+                    scan, rollup = timed_ms(exact), timed_ms(ranked)
+                    print(f"  {label:20} on demand {scan:9.2f} ms   rollup {rollup:6.2f} ms   ({scan / rollup:7.1f}x)")
+
+                recall, error = accuracy(db)
+                print(f"  accuracy after load:  min recall@k {recall:.3f}, max revenue error {error:.4f}")
+            churn(engine, items, random.Random(orders))
+            with Session(engine) as db:
+                recall, error = accuracy(db)
+                print(f"  accuracy after churn: min recall@k {recall:.3f}, max revenue error {error:.4f}")
+            engine.dispose()
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else SIZES)
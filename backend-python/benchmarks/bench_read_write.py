@@ -0,0 +1,92 @@
+"""Read latency and throughput through the API while a separate process keeps
+writing orders: default pooling with a rollback journal versus the tuned
+pools and WAL pragmas in app/database.py.
+
+Run from backend-python/:  python -m benchmarks.bench_read_write [seconds]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, select
+
+from app import ingest, migrate, models
+from benchmarks.common import write_sample_csvs
+from benchmarks.load import api_server, print_result, run_load
+
+USERS, ORDERS = 5000, 50000
+CONCURRENCY = [16, 64]
+
+# Response caching is off so every read reaches the database
+CONFIGS = {
+    "default pool, rollback journal": {
+        "CACHE_BACKEND": "none", "DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 10,
+        "SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": 0, "SQLITE_CACHE_SIZE": -2000,
+    },
+    "tuned pool, WAL": {"CACHE_BACKEND": "none"},
+}
+
+def writer(database_url, journal_mode, stop, commits):
+    """Insert one order with three items per transaction until stopped"""
+    engine = create_engine(database_url, connect_args={"timeout": 30})
+    rng = random.Random(5)
+    with engine.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+        next_id = conn.execute(select(func.max(models.Order.id))).scalar() + 1
+        next_item_id = conn.execute(select(func.max(models.OrderItem.id))).scalar() + 1
+    while not stop.is_set():
+        with engine.begin() as conn:
+            conn.execute(models.Order.__table__.insert(), [{
+                "id": next_id, "user_id": rng.randint(1, USERS), "order_number": f"ORD-W{next_id}",
+                "status": "pending", "total_amount": 100.0, "order_date": datetime.now(),
+            }])
+            conn.execute(models.OrderItem.__table__.insert(), [
+                {"id": next_item_id + n, "order_id": next_id, "product_id": rng.randint(1, 2000),
+                 "quantity": 1, "price": 33.3}
+                for n in range(3)
+            ])
+        next_id += 1
+        next_item_id += 3
+        with commits.get_lock():
+            commits.value += 1
+    engine.dispose()
+
+def main(duration=10.0):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=USERS, products=2000, orders=ORDERS)
+        database_url = f"sqlite:///{os.path.join(workdir, 'mixed.db')}"
+        engine = create_engine(database_url)
+        migrate.upgrade_database(engine)
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+        engine.dispose()
+
+        rng = random.Random(3)
+
+        def next_path():
+            if rng.random() < 0.5:
+                return f"/api/users/{rng.randint(1, USERS)}/orders"
+            return f"/api/orders/{rng.randint(1, ORDERS)}/items"
+
+        for label, env in CONFIGS.items():
+            print(label)
+            journal_mode = env.get("SQLITE_JOURNAL_MODE", "WAL")
+            with api_server(database_url, **env) as base_url:
+                for concurrency in CONCURRENCY:
+                    stop = multiprocessing.Event()
+                    commits = multiprocessing.Value("i", 0)
+                    process = multiprocessing.Process(target=writer, args=(database_url, journal_mode, stop, commits))
+                    process.start()
+                    started = time.perf_counter()
+                    result = run_load(base_url, next_path, concurrency, duration)
+                    stop.set()
+                    process.join()
+                    print_result("reads", result)
+                    print(f"  {'writes':24} {commits.value / (time.perf_counter() - started):9.1f} commits/s")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,61 @@
+"""Per-request CPU time for the order items and user orders bodies: ORM objects
+validated through the Pydantic schemas versus Core rows encoded directly.
+
+Run from backend-python/:  python -m benchmarks.bench_serialization [items_per_order]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import Session
+
+from app import crud, fastpath, ingest, schemas
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+def orm_items(db, order_id):
+    items = crud.get_order_items(db, order_id)
+    return schemas.OrderItemList.dump_json(schemas.OrderItemList.validate_python(items))
+
+def fast_items(db, order_id):
+    return fastpath.dumps(crud.get_order_items_rows(db, order_id))
+
+def orm_orders(db, user_id):
+    page = crud.get_user_orders_page(db, user_id, limit=500)
+    return schemas.OrderPage(results=page.items, next_cursor=page.next_cursor).model_dump_json().encode()
+
+def fast_orders(db, user_id):
+    page = crud.get_user_orders_page_rows(db, user_id, limit=500)
+    return fastpath.dumps({"results": page.items, "next_cursor": page.next_cursor})
+
+def measure(label, engine, fn, keys):
+    samples = []
+    with Session(engine) as db:
+        for key in keys:
+            db.expunge_all()
+            started = time.process_time()
+            fn(db, key)
+            samples.append((time.process_time() - started) * 1000)
+    print(f"  {label:24} mean {statistics.mean(samples):8.3f} ms CPU   p95 {sorted(samples)[int(len(samples) * 0.95)]:8.3f} ms")
+
+def main(items_per_order=200, orders=2000, users=20):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=users, products=2000, orders=orders,
+                          items_per_order=items_per_order)
+        engine = sqlite_engine(os.path.join(workdir, "serialization.db"))
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+        print(f"/api/orders/{{id}}/items with {items_per_order} items per order")
+        order_ids = list(range(1, 301))
+        measure("ORM + Pydantic", engine, orm_items, order_ids)
+        measure("Core rows + orjson" if fastpath.orjson else "Core rows + json", engine, fast_items, order_ids)
+
+        print(f"/api/users/{{id}}/orders with ~{orders // users} orders per user (limit 500)")
+        user_ids = list(range(1, users + 1)) * 5
+        measure("ORM + Pydantic", engine, orm_orders, user_ids)
+        measure("Core rows + orjson" if fastpath.orjson else "Core rows + json", engine, fast_orders, user_ids)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,94 @@
+"""Thundering herd: bursts of identical concurrent requests for one URL
+(the moment a hot entry expires or is invalidated), then steady load over a
+few hot URLs, with response caching off and single-flight coalescing off or
+on. The hot users are heavy accounts, so each render is a 500-order page.
+
+Reports burst completion time, throughput, tail latency and SQL statements per
+request (from /api/metrics) for the sync and async API modes.
+
+Run from backend-python/:  python -m benchmarks.bench_singleflight [seconds]
+"""
+import asyncio
+import os
+import time
+import random
+import sys
+import tempfile
+
+import httpx
+from sqlalchemy import create_engine, update
+
+from app import ingest, migrate, models
+from benchmarks.common import write_sample_csvs
+from benchmarks.load import api_server, print_result, run_load
+
+USERS, ORDERS = 5000, 50000
+HOT_KEYS = 5
+HOT_USER_ORDERS = 2000
+CONCURRENCY = [50, 200]
+BURST_SIZE = 200
+
+def statements_executed(base_url):
+    """Total SQL statements the server has run, summed over db_query_duration_seconds_count"""
+    text = httpx.get(base_url + "/api/metrics").text
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith("db_query_duration_seconds_count"))
+
+async def _burst(base_url, path, size):
+    limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.get("/api/health")
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(path) for _ in range(size)))
+        elapsed = time.perf_counter() - started
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+def burst(base_url, paths, size=BURST_SIZE):
+    """Fire size simultaneous requests at each path in turn; mean seconds per burst, statements per request"""
+    before = statements_executed(base_url)
+    seconds = [asyncio.run(_burst(base_url, path, size)) for path in paths]
+    return sum(seconds) / len(seconds), (statements_executed(base_url) - before) / (size * len(paths))
+
+def main(duration=10.0):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=USERS, products=2000, orders=ORDERS)
+        database_url = f"sqlite:///{os.path.join(workdir, 'herd.db')}"
+        engine = create_engine(database_url)
+        migrate.upgrade_database(engine)
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+
+        rng = random.Random(3)
+        hot_users = rng.sample(range(1, USERS + 1), HOT_KEYS)
+        hot_orders = rng.sample(range(1, ORDERS + 1), HOT_KEYS)
+        with engine.begin() as conn:
+            for n, user_id in enumerate(hot_users):
+                first = n * HOT_USER_ORDERS + 1
+                conn.execute(update(models.Order).where(models.Order.id.between(first, first + HOT_USER_ORDERS - 1))
+                             .values(user_id=user_id))
+        engine.dispose()
+
+        def next_path():
+            if rng.random() < 0.5:
+                return f"/api/users/{rng.choice(hot_users)}/orders?limit=500"
+            return f"/api/orders/{rng.choice(hot_orders)}/items"
+
+        for async_db in ("false", "true"):
+            for single_flight in ("false", "true"):
+                label = f"{'async' if async_db == 'true' else 'sync'}, single-flight {single_flight}"
+                print(label)
+                with api_server(database_url, CACHE_BACKEND="none", ASYNC_DB=async_db,
+                                SINGLE_FLIGHT=single_flight) as base_url:
+                    seconds, per_request = burst(base_url, [f"/api/users/{user_id}/orders?limit=500"
+                                                            for user_id in hot_users])
+                    print(f"  burst of {BURST_SIZE}: {seconds * 1000:8.1f} ms   "
+                          f"{per_request:.2f} SQL statements per request")
+                    for concurrency in CONCURRENCY:
+                        before = statements_executed(base_url)
+                        result = run_load(base_url, next_path, concurrency, duration)
+                        statements = statements_executed(base_url) - before
+                        print_result(label.split(",")[0], result)
+                        print(f"    {statements / max(result['requests'], 1):.2f} SQL statements per request")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,50 @@
+"""Bootstrapping a database: seeding from the CSV exports versus importing a
+binary snapshot (Arrow IPC or Parquet) with app.snapshot.
+
+Run from backend-python/:  python -m benchmarks.bench_snapshot [orders]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app import ingest, migrate, snapshot
+from benchmarks.generate import DatasetSpec, generate
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def fresh_engine(path):
+    engine = ingest.create_bulk_engine(f"sqlite:///{path}")
+    migrate.upgrade_database(engine)
+    return engine
+
+def main(orders=200000):
+    with tempfile.TemporaryDirectory() as workdir:
+        data_dir = os.path.join(workdir, "csv")
+        generate(DatasetSpec.for_orders(orders), data_dir)
+
+        engine = fresh_engine(os.path.join(workdir, "csv.db"))
+        started = time.perf_counter()
+        ingest.ingest_csv_directory(engine, data_dir)
+        csv_seconds = time.perf_counter() - started
+        print(f"{orders} orders")
+        print(f"  {'CSV seeding':20} {csv_seconds:8.2f} s   {directory_size(data_dir) / 2**20:8.1f} MiB")
+
+        for fmt in sorted(snapshot.SNAPSHOT_FORMATS):
+            snapshot_dir = os.path.join(workdir, fmt)
+            started = time.perf_counter()
+            snapshot.export_snapshot(engine, snapshot_dir, fmt)
+            export_seconds = time.perf_counter() - started
+
+            target = fresh_engine(os.path.join(workdir, f"{fmt}.db"))
+            started = time.perf_counter()
+            snapshot.import_snapshot(target, snapshot_dir)
+            seconds = time.perf_counter() - started
+            target.dispose()
+            print(f"  {fmt + ' import':20} {seconds:8.2f} s   {directory_size(snapshot_dir) / 2**20:8.1f} MiB"
+                  f"   ({csv_seconds / seconds:.1f}x faster; export took {export_seconds:.2f} s)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,109 @@
+"""Payload size and per-request time of full responses versus fields=/include=
+projections, for the order items, user orders, order detail and user search
+bodies. Products get catalogue-length descriptions, as in the real exports,
+and the first HEAVY_USERS users get 100 orders each.
+
+Run from backend-python/:  python -m benchmarks.bench_sparse_fields [description_chars]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import crud, fastpath, ingest, models, schemas
+from benchmarks.common import sqlite_engine, write_sample_csvs
+
+USERS, ORDERS, ITEMS_PER_ORDER = 2000, 20000, 10
+HEAVY_USERS = 20
+
+def items(fields=None, include=None):
+    shape = fastpath.sparse(fastpath.ORDER_ITEM, fields, include)
+    return lambda db, order_id: fastpath.dumps(crud.get_order_items_rows(db, order_id, shape))
+
+def user_orders(fields=None, include=None):
+    shape = fastpath.sparse(fastpath.ORDER, fields, include)
+
+    def render(db, user_id):
+        page = crud.get_user_orders_page_rows(db, user_id, limit=100, shape=shape)
+        return fastpath.dumps({"results": page.items, "next_cursor": page.next_cursor})
+    return render
+
+def order_detail(fields=None, include=None):
+    if fields is None and include is None:
+        return lambda db, order_id: schemas.OrderDetail.model_validate(
+            crud.get_order_detail(db, order_id)).model_dump_json().encode()
+    shape = fastpath.sparse(fastpath.ORDER_DETAIL, fields, include)
+    return lambda db, order_id: fastpath.dumps(crud.get_order_detail_rows(db, order_id, shape))
+
+def user_search(fields=None):
+    if fields is None:
+        def render(db, n):
+            page = crud.search_users_page(db, city="o", limit=100)
+            return schemas.UserPage(results=page.items, next_cursor=page.next_cursor).model_dump_json().encode()
+        return render
+    shape = fastpath.sparse(fastpath.USER, fields)
+
+    def render(db, n):
+        page = crud.search_users_page(db, city="o", limit=100, columns=shape.column_names())
+        return fastpath.dumps({"results": shape.objects(page.items), "next_cursor": page.next_cursor})
+    return render
+
+CASES = [
+    ("/api/orders/{id}/items", range(1, 301), [
+        ("full", items()),
+        ("include= (no product)", items(include="")),
+        ("fields=quantity,price,product.name", items("quantity,price,product.name")),
+    ]),
+    ("/api/users/{id}/orders?limit=100", list(range(1, HEAVY_USERS + 1)) * 10, [
+        ("full", user_orders()),
+        ("include= (no center)", user_orders(include="")),
+        ("fields=id,status,total_amount,order_date", user_orders("id,status,total_amount,order_date")),
+    ]),
+    ("/api/orders/{id}", range(1, 301), [
+        ("full", order_detail()),
+        ("include=summary", order_detail(include="summary")),
+        ("fields=id,status,order_items.quantity,order_items.product.name",
+         order_detail("id,status,order_items.quantity,order_items.product.name")),
+    ]),
+    ("/api/users/search?city=o&limit=100", range(200), [
+        ("full", user_search()),
+        ("fields=id,email", user_search("id,email")),
+    ]),
+]
+
+def measure(label, engine, fn, keys):
+    samples, sizes = [], []
+    with Session(engine) as db:
+        for key in keys:
+            db.expunge_all()
+            started = time.perf_counter()
+            body = fn(db, key)
+            samples.append((time.perf_counter() - started) * 1000)
+            sizes.append(len(body))
+    print(f"  {label:66} {statistics.mean(sizes):9,.0f} bytes   mean {statistics.mean(samples):7.3f} ms   "
+          f"p95 {sorted(samples)[int(len(samples) * 0.95)]:7.3f} ms")
+
+def main(description_chars=1000):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=USERS, products=2000, orders=ORDERS,
+                          items_per_order=ITEMS_PER_ORDER)
+        engine = sqlite_engine(os.path.join(workdir, "sparse.db"))
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+        with engine.begin() as conn:
+            description = ("Soft, durable and machine washable. " * (description_chars // 36 + 1))[:description_chars]
+            conn.execute(update(models.Product).values(description=description))
+            conn.execute(update(models.Order).where(models.Order.id <= HEAVY_USERS * 100)
+                         .values(user_id=models.Order.id % HEAVY_USERS + 1))
+
+        for endpoint, keys, variants in CASES:
+            print(endpoint)
+            for label, fn in variants:
+                measure(label, engine, fn, keys)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,109 @@
+"""Time to first healthy response, and latency of the first requests a fresh
+server sees, for development startup (migrate, lazy), production startup
+(revision check, eager configuration) and production with pool and cache
+warm-up.
+
+Time to healthy is measured from spawning the server process to the first 200
+from /api/health; the server's own figure (from its process start) comes from
+/api/startup. First-request latency is each hot path's first hit after the
+server is healthy, and the very first request on its own. The hot paths are
+order lists of the busiest users and details of the newest orders, as clients
+arriving straight after a deploy would send them.
+
+Run from backend-python/:  python -m benchmarks.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import create_engine
+
+from app import ingest, migrate, startup
+from benchmarks.common import write_sample_csvs
+from benchmarks.load import BACKEND_DIR, free_port
+
+USERS, ORDERS = 20000, 100000
+HOT_USERS, HOT_ORDERS = 10, 10
+
+MODES = {
+    "development": {"STARTUP_MODE": "development"},
+    "production": {"STARTUP_MODE": "production"},
+    "production + warm-up": {"STARTUP_MODE": "production", "WARM_POOL": "true", "WARM_CACHES": "true",
+                             "WARM_TOP_USERS": str(HOT_USERS), "WARM_RECENT_ORDERS": str(HOT_ORDERS)},
+}
+
+def start_server(database_url, env):
+    """Spawn uvicorn and poll /api/health; returns the process, its base URL and seconds to the first 200"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=database_url, **env),
+    )
+    while True:
+        try:
+            if httpx.get(base_url + "/api/health", timeout=1).status_code == 200:
+                return process, base_url, time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None or time.perf_counter() - started > 60:
+            raise RuntimeError("API server did not start")
+        time.sleep(0.005)
+
+def first_hits(base_url, paths):
+    """Milliseconds for each path's first request, then for a repeat of the same requests"""
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        timings = []
+        for _ in range(2):
+            latencies = []
+            for path in paths:
+                started = time.perf_counter()
+                assert client.get(path).status_code == 200, path
+                latencies.append((time.perf_counter() - started) * 1000)
+            timings.append(latencies)
+    return timings
+
+def main(runs=3):
+    with tempfile.TemporaryDirectory() as workdir:
+        write_sample_csvs(os.path.join(workdir, "data"), users=USERS, products=2000, orders=ORDERS)
+        database_url = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+        engine = create_engine(database_url)
+        migrate.upgrade_database(engine)
+        ingest.ingest_csv_directory(engine, os.path.join(workdir, "data"))
+        # The same hot set the warm-up picks, minus the in-memory index paths
+        paths = startup.hot_paths(engine, HOT_USERS, HOT_ORDERS)[len(startup.WARM_STATIC_PATHS):]
+        paths = [path for path in paths if not path.endswith("/items")]
+        engine.dispose()
+        print(f"{USERS} users, {ORDERS} orders; {len(paths)} hot paths; median of {runs} starts")
+
+        for label, env in MODES.items():
+            healthy, reported, very_first, first, repeat, phases = [], [], [], [], [], []
+            for _ in range(runs):
+                process, base_url, seconds = start_server(database_url, env)
+                try:
+                    healthy.append(seconds)
+                    report = httpx.get(base_url + "/api/startup").json()
+                    reported.append(report["first_healthy_seconds"])
+                    phases.append(report["phases"])
+                    cold, warm = first_hits(base_url, paths)
+                    very_first.append(cold[0])
+                    first.append(statistics.mean(cold))
+                    repeat.append(statistics.mean(warm))
+                finally:
+                    process.terminate()
+                    process.wait()
+            phase_medians = {name: statistics.median(run[name] for run in phases) for name in phases[0]}
+            print(f"  {label:22} healthy after {statistics.median(healthy):.3f}s "
+                  f"(server reports {statistics.median(reported):.3f}s)   "
+                  f"first request {statistics.median(very_first):6.2f} ms   "
+                  f"first hits {statistics.median(first):6.2f} ms   repeats {statistics.median(repeat):6.2f} ms")
+            print("  " + " " * 22 + " phases: " + ", ".join(f"{name} {seconds * 1000:.1f} ms"
+                                                            for name, seconds in phase_medians.items()))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,77 @@
+"""p50/p99 latency of indexed user search against the ILIKE scan.
+
+Run from backend-python/:  python -m benchmarks.bench_user_search [users] [queries]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from benchmarks.common import CITIES, FIRST_NAMES, LAST_NAMES, sqlite_engine
+
+def populate_users(engine, count, batch=50000, seed=7):
+    rng = random.Random(seed)
+    insert = models.User.__table__.insert()
+    for start in range(1, count + 1, batch):
+        rows = []
+        for i in range(start, min(start + batch, count + 1)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            rows.append({"id": i, "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                         "first_name": first, "last_name": last, "phone": f"555-{i:07d}",
+                         "address": f"{i} Main St", "city": rng.choice(CITIES), "country": "USA"})
+        with engine.begin() as conn:
+            conn.execute(insert, rows)
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def measure(label, fn, queries):
+    samples = []
+    for kwargs in queries:
+        started = time.perf_counter()
+        fn(**kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:18} p50 {percentile(samples, 50):9.2f} ms   p99 {percentile(samples, 99):9.2f} ms"
+          f"   mean {statistics.mean(samples):9.2f} ms")
+
+def main(users=1_000_000, query_count=50):
+    rng = random.Random(11)
+    queries = []
+    for _ in range(query_count):
+        kind = rng.choice(["email", "last_name", "first_name", "phone"])
+        if kind == "email":
+            queries.append({"email": f"{rng.randint(1, users)}@exa"})
+        elif kind == "phone":
+            queries.append({"phone": f"{rng.randint(1000, 9999)}"})
+        else:
+            names = LAST_NAMES if kind == "last_name" else FIRST_NAMES
+            queries.append({kind: rng.choice(names)[1:5]})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = sqlite_engine(os.path.join(workdir, "search.db"))
+        started = time.perf_counter()
+        populate_users(engine, users)
+        # The migrated schema's triggers index the users as they load
+        print(f"Loaded and indexed {users:,} users in {time.perf_counter() - started:.1f}s\n")
+
+        # Selective terms (email, phone) match a handful of rows; name fragments match ~10% of users
+        groups = {
+            "selective": [q for q in queries if "email" in q or "phone" in q],
+            "broad": [q for q in queries if "email" not in q and "phone" not in q],
+        }
+        with Session(engine) as db:
+            for group, group_queries in groups.items():
+                print(f"{group} terms ({len(group_queries)} queries)")
+                measure("ILIKE scan", lambda **kw: crud.search_users_scan(db, limit=20, **kw), group_queries)
+                measure("indexed", lambda **kw: crud.search_users(db, limit=20, **kw), group_queries)
+                measure("indexed fuzzy", lambda **kw: crud.search_users(db, limit=20, fuzzy=True, **kw), group_queries)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
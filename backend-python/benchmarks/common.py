@@ -0,0 +1,70 @@
+import csv
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app import migrate
+
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled", "returned"]
+CATEGORIES = ["Accessories", "Jeans", "Outerwear", "Sweaters", "Tops", "Shorts", "Swim", "Socks"]
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Susan"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Wilson"]
+CITIES = ["Austin", "Boston", "Chicago", "Denver", "Houston", "Memphis", "Portland", "Seattle"]
+
+def sqlite_engine(path):
+    """Fresh SQLite database with the application schema"""
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    migrate.upgrade_database(engine)
+    return engine
+
+@contextmanager
+def timed(label):
+    started = time.perf_counter()
+    yield
+    print(f"  {label}: {time.perf_counter() - started:.3f}s")
+
+def write_sample_csvs(data_dir, users=1000, products=200, orders=5000, items_per_order=3, seed=42):
+    """Write CSV exports in the layout seed_data.py expects"""
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    start = datetime(2024, 1, 1)
+
+    def write(name, header, rows):
+        with open(os.path.join(data_dir, name), "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    write("distribution_centers.csv", ["id", "name", "latitude", "longitude"], [
+        (1, "Memphis TN", 35.1174, -89.9711),
+        (2, "Chicago IL", 41.8369, -87.6847),
+        (3, "Houston TX", 29.7604, -95.3698),
+        (4, "Los Angeles CA", 34.0500, -118.2500),
+    ])
+    write("users.csv", ["id", "first_name", "last_name", "email", "phone", "city", "country", "address"], (
+        (i, f"First{i}", f"Last{i}", f"user{i}@example.com", f"555-{i:07d}",
+         rng.choice(CITIES), "USA", f"{i} Main St")
+        for i in range(1, users + 1)
+    ))
+    write("products.csv", ["id", "name", "description", "price", "category", "sku"], (
+        (i, f"Product {i}", f"Description for product {i}", round(rng.uniform(5, 250), 2),
+         rng.choice(CATEGORIES), f"SKU-{i:08d}")
+        for i in range(1, products + 1)
+    ))
+    write("orders.csv", ["id", "user_id", "order_number", "status", "total_amount", "order_date"], (
+        (i, rng.randint(1, users), f"ORD-{i:010d}", rng.choice(STATUSES), round(rng.uniform(10, 900), 2),
+         (start + timedelta(minutes=rng.randint(0, 525600))).isoformat())
+        for i in range(1, orders + 1)
+    ))
+    write("order_items.csv", ["id", "order_id", "product_id", "quantity", "price"], (
+        ((order_id - 1) * items_per_order + n + 1, order_id, rng.randint(1, products),
+         rng.randint(1, 4), round(rng.uniform(5, 250), 2))
+        for order_id in range(1, orders + 1)
+        for n in range(items_per_order)
+    ))
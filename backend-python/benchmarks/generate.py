@@ -0,0 +1,187 @@
+"""Deterministic synthetic dataset in the CSV layout seed_data.py and app.ingest load.
+
+Buyers and products follow Zipf-like popularity, so a few heavy buyers own long
+order histories and a few hot products appear in most orders. The same seed and
+sizes always produce byte-identical files.
+
+Run from backend-python/:
+    python -m benchmarks.generate --orders 1000000 --out ../data/1m
+    python -m benchmarks.generate --orders 100000 --out /tmp/100k --database sqlite:////tmp/100k.db
+"""
+import argparse
+import csv
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.geo import CITY_COORDINATES
+from benchmarks.common import CATEGORIES, CITIES, FIRST_NAMES, LAST_NAMES, STATUSES
+
+# Orders are generated (and their dates assigned) in fixed-size blocks, so memory
+# stays bounded at 10M orders and the output does not depend on the machine
+BLOCK_SIZE = 500000
+STATUS_WEIGHTS = [0.08, 0.10, 0.22, 0.48, 0.07, 0.05]
+QUANTITY_WEIGHTS = [0.70, 0.18, 0.08, 0.04]
+MAX_ITEMS_PER_ORDER = 10
+# Users are scattered around their city's center (degrees, one standard deviation)
+LOCATION_SPREAD = 0.15
+
+DISTRIBUTION_CENTERS = [
+    (1, "Memphis TN", 35.1174, -89.9711),
+    (2, "Chicago IL", 41.8369, -87.6847),
+    (3, "Houston TX", 29.7604, -95.3698),
+    (4, "Los Angeles CA", 34.05, -118.25),
+    (5, "New Orleans LA", 29.95, -90.0667),
+    (6, "Port Authority of New York/New Jersey NY/NJ", 40.634, -73.7834),
+    (7, "Philadelphia PA", 39.95, -75.1667),
+    (8, "Mobile AL", 30.6944, -88.0431),
+    (9, "Charleston SC", 32.7833, -79.9333),
+    (10, "Savannah GA", 32.0167, -81.1167),
+]
+
+@dataclass
+class DatasetSpec:
+    orders: int
+    users: int
+    products: int
+    seed: int = 42
+    user_skew: float = 0.8
+    product_skew: float = 1.0
+    mean_items_per_order: float = 2.5
+    start: str = "2023-01-01"
+    days: int = 730
+
+    @classmethod
+    def for_orders(cls, orders: int, **overrides) -> "DatasetSpec":
+        """Default proportions: one user per 10 orders, one product per 200 (at least 100)"""
+        return cls(orders=orders, users=max(100, orders // 10), products=max(100, orders // 200), **overrides)
+
+class ZipfSampler:
+    """Draw ids with probability proportional to 1 / rank**skew, ranks shuffled over the ids"""
+
+    def __init__(self, rng: np.random.Generator, count: int, skew: float):
+        weights = 1.0 / np.arange(1, count + 1) ** skew
+        self.cdf = np.cumsum(weights / weights.sum())
+        self.ids = rng.permutation(count) + 1
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        ranks = np.minimum(np.searchsorted(self.cdf, rng.random(size)), len(self.cdf) - 1)
+        return self.ids[ranks]
+
+def _writer(out_dir, name, header):
+    file = open(os.path.join(out_dir, name), "w", encoding="utf-8", newline="")
+    writer = csv.writer(file)
+    writer.writerow(header)
+    return file, writer
+
+def generate(spec: DatasetSpec, out_dir: str) -> dict:
+    """Write the five CSV exports for spec into out_dir and return row counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(spec.seed)
+
+    file, writer = _writer(out_dir, "distribution_centers.csv", ["id", "name", "latitude", "longitude"])
+    with file:
+        writer.writerows(DISTRIBUTION_CENTERS)
+
+    city_centers = np.array([CITY_COORDINATES[city] for city in CITIES])
+    file, writer = _writer(out_dir, "users.csv", ["id", "first_name", "last_name", "email", "phone", "city", "country",
+                                                  "address", "latitude", "longitude"])
+    with file:
+        for start in range(1, spec.users + 1, BLOCK_SIZE):
+            ids = range(start, min(start + BLOCK_SIZE, spec.users + 1))
+            firsts = rng.integers(len(FIRST_NAMES), size=len(ids))
+            lasts = rng.integers(len(LAST_NAMES), size=len(ids))
+            cities = rng.integers(len(CITIES), size=len(ids))
+            locations = np.round(city_centers[cities] + rng.normal(0, LOCATION_SPREAD, (len(ids), 2)), 5)
+            writer.writerows(
+                (i, FIRST_NAMES[f], LAST_NAMES[l], f"{FIRST_NAMES[f].lower()}.{LAST_NAMES[l].lower()}{i}@example.com",
+                 f"555-{i:07d}", CITIES[c], "USA", f"{i} Main St", lat, lon)
+                for i, f, l, c, (lat, lon) in zip(ids, firsts, lasts, cities, locations.tolist())
+            )
+
+    product_prices = np.round(rng.lognormal(mean=3.5, sigma=0.8, size=spec.products).clip(2, 2000), 2)
+    file, writer = _writer(out_dir, "products.csv", ["id", "name", "description", "price", "category", "sku"])
+    with file:
+        categories = rng.integers(len(CATEGORIES), size=spec.products)
+        writer.writerows(
+            (i, f"{CATEGORIES[c]} Product {i}", f"Description for product {i}", price, CATEGORIES[c], f"SKU-{i:08d}")
+            for i, c, price in zip(range(1, spec.products + 1), categories, product_prices.tolist())
+        )
+
+    buyers = ZipfSampler(rng, spec.users, spec.user_skew)
+    catalog = ZipfSampler(rng, spec.products, spec.product_skew)
+    start = datetime.fromisoformat(spec.start)
+    block_count = max(1, -(-spec.orders // BLOCK_SIZE))
+    seconds_per_block = spec.days * 86400 / block_count
+    next_item_id = 1
+
+    orders_file, orders_writer = _writer(out_dir, "orders.csv", ["id", "user_id", "order_number", "status", "total_amount", "order_date"])
+    items_file, items_writer = _writer(out_dir, "order_items.csv", ["id", "order_id", "product_id", "quantity", "price"])
+    with orders_file, items_file:
+        for block, first_id in enumerate(range(1, spec.orders + 1, BLOCK_SIZE)):
+            order_ids = np.arange(first_id, min(first_id + BLOCK_SIZE, spec.orders + 1))
+            count = len(order_ids)
+
+            # Items: a variable number per order, hot products drawn most often
+            per_order = np.minimum(1 + rng.poisson(spec.mean_items_per_order - 1, count), MAX_ITEMS_PER_ORDER)
+            item_orders = np.repeat(order_ids, per_order)
+            products = catalog.sample(rng, len(item_orders))
+            quantities = rng.choice(len(QUANTITY_WEIGHTS), size=len(item_orders), p=QUANTITY_WEIGHTS) + 1
+            prices = product_prices[products - 1]
+            totals = np.bincount(item_orders - first_id, weights=quantities * prices, minlength=count)
+
+            # Order dates increase with id, as they would in a live system
+            offsets = np.sort(rng.random(count)) * seconds_per_block + block * seconds_per_block
+            users = buyers.sample(rng, count)
+            statuses = rng.choice(len(STATUSES), size=count, p=STATUS_WEIGHTS)
+
+            orders_writer.writerows(
+                (order_id, user_id, f"ORD-{order_id:010d}", STATUSES[status], round(total, 2),
+                 (start + timedelta(seconds=int(offset))).isoformat())
+                for order_id, user_id, status, total, offset
+                in zip(order_ids.tolist(), users.tolist(), statuses.tolist(), totals.tolist(), offsets.tolist())
+            )
+            item_ids = range(next_item_id, next_item_id + len(item_orders))
+            items_writer.writerows(zip(item_ids, item_orders.tolist(), products.tolist(), quantities.tolist(), prices.tolist()))
+            next_item_id += len(item_orders)
+
+    return {"distribution_centers": len(DISTRIBUTION_CENTERS), "users": spec.users,
+            "products": spec.products, "orders": spec.orders, "order_items": next_item_id - 1}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--user-skew", type=float, default=0.8)
+    parser.add_argument("--product-skew", type=float, default=1.0)
+    parser.add_argument("--out", required=True, help="Directory for the CSV files")
+    parser.add_argument("--database", help="Also migrate and bulk-load into this database URL")
+    args = parser.parse_args()
+
+    spec = DatasetSpec.for_orders(args.orders, seed=args.seed, user_skew=args.user_skew, product_skew=args.product_skew)
+    if args.users:
+        spec.users = args.users
+    if args.products:
+        spec.products = args.products
+
+    started = time.perf_counter()
+    counts = generate(spec, args.out)
+    print(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+    print(f"Spec: {asdict(spec)}")
+
+    if args.database:
+        from app import ingest, migrate
+
+        engine = ingest.create_bulk_engine(args.database)
+        migrate.upgrade_database(engine)
+        for stats in ingest.ingest_csv_directory(engine, args.out):
+            print(f"  {stats.table}: {stats.rows} rows in {stats.seconds:.1f}s ({stats.rows_per_second:,.0f} rows/s)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
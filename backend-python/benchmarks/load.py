@@ -0,0 +1,89 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def api_server(database_url, **env):
+    """Run main.py under uvicorn in a subprocess and yield its base URL"""
+    port = free_port()
+    environment = dict(os.environ, DATABASE_URL=database_url, **{k: str(v) for k, v in env.items()})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=environment,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/api/health", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.time() > deadline or process.poll() is not None:
+                    raise RuntimeError("API server did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def _drive(base_url, next_path, concurrency, duration):
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(next_path())
+                    if response.status_code >= 500:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def run_load(base_url, next_path, concurrency, duration=10.0):
+    """Hammer the API with `concurrency` clients for `duration` seconds; next_path() picks each URL"""
+    return asyncio.run(_drive(base_url, next_path, concurrency, duration))
+
+def print_result(label, result):
+    print(f"  {label:24} c={result['concurrency']:<5} {result['throughput']:9.1f} req/s   "
+          f"p50 {result['p50_ms']:8.1f} ms   p95 {result['p95_ms']:8.1f} ms   p99 {result['p99_ms']:8.1f} ms   errors {result['errors']}")
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import ingest, migrate
+from benchmarks.common import write_sample_csvs
+
+# Sizes of the sample dataset; a module or test overrides them with @pytest.mark.dataset(users=..., ...)
+DEFAULT_DATASET = {"users": 30, "products": 20, "orders": 400}
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "dataset(**sizes): write_sample_csvs sizes for the engine fixtures")
+
+def load_sample_database(workdir, **sizes):
+    """A migrated SQLite database in workdir, loaded from write_sample_csvs output left in workdir/data"""
+    write_sample_csvs(str(workdir / "data"), **dict(DEFAULT_DATASET, **sizes))
+    engine = create_engine(f"sqlite:///{workdir / 'sample.db'}")
+    migrate.upgrade_database(engine)
+    ingest.ingest_csv_directory(engine, str(workdir / "data"))
+    return engine
+
+def _sizes(request) -> dict:
+    marker = request.node.get_closest_marker("dataset")
+    return marker.kwargs if marker else {}
+
+@pytest.fixture()
+def engine(request, tmp_path):
+    """A fresh sample database per test, with its CSVs under tmp_path/data"""
+    engine = load_sample_database(tmp_path, **_sizes(request))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="module")
+def module_engine(request, tmp_path_factory):
+    """One sample database shared by all of a module's tests"""
+    engine = load_sample_database(tmp_path_factory.mktemp(request.module.__name__), **_sizes(request))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture()
+def api(engine, monkeypatch):
+    """A TestClient for main.app whose sessions, response cache and catalog use the engine fixture"""
+    import main
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+    from app import cache, catalog, delta
+
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(main, "SessionLocal", sessions)
+    monkeypatch.setattr(main, "ReadSessionLocal", sessions)
+    monkeypatch.setattr(main, "batch_watcher", delta.BatchWatcher(engine))
+    monkeypatch.setattr(cache, "response_cache", cache.ResponseCache(cache.MemoryBackend()))
+    monkeypatch.setattr(catalog, "product_catalog", catalog.ProductCatalog(engine))
+    return TestClient(main.app)
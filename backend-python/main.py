@@ -1,19 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 import os
-from dotenv import load_dotenv
 
-from app.database import SessionLocal, engine
-from app import models, schemas, crud
+from app.database import DATABASE_READ_URL, DATABASE_URL, ReadSessionLocal, SessionLocal, engine, read_engine
+from app import schemas, crud, cache, export, analytics, metrics, fastpath, geo, catalog, delta, startup, renders
 
-load_dotenv()
+# Importing this module touches no database. Before the first request is accepted, startup
+# migrates (or in STARTUP_MODE=production checks the revision and configures eagerly), then
+# optionally warms the pools and caches
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async_engine = None
+    if ASYNC_DB:
+        from app.async_database import async_engine
+    await startup.start(app, engine, read_engine, async_engine)
+    yield
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="E-commerce Order Viewer API", version="1.0.0")
+# Handlers that build their own bytes time them with metrics.measure_serialization; the
+# default response class times the rest
+app = FastAPI(title="E-commerce Order Viewer API", version="1.0.0", lifespan=lifespan,
+              default_response_class=metrics.MeasuredJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -24,8 +36,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency to get DB session
-def get_db():
+# Per-route latency, SQL and serialization metrics, served at /api/metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Batches applied by another process (the delta CLI, seed_data) are noticed within
+# DELTA_CHECK_SECONDS; the check runs off the event loop, on the request that finds it due
+batch_watcher = delta.BatchWatcher(engine)
+
+@app.middleware("http")
+async def check_external_batches(request: Request, call_next):
+    if batch_watcher.check_due():
+        await run_in_threadpool(batch_watcher.check)
+    return await call_next(request)
+
+# Async mode: async handlers take over the hot endpoints (registered first, so they match first)
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+if ASYNC_DB:
+    from app import async_api
+    app.include_router(async_api.router)
+
+# Dependencies to get DB sessions: reads use the read engine (replica or read-only pool)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_db(request: Request):
+    """Route GET/HEAD requests to the read engine and everything else to the primary"""
+    db = ReadSessionLocal() if request.method in ("GET", "HEAD") else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# A write bumps its cache tags on commit; a replica still behind it would let the next miss store the
+# old body under the new generation until the TTL. So with a separate replica, cached responses are
+# rendered from the primary, and only uncached reads go to the replica.
+CACHE_RENDERS_ON_PRIMARY = DATABASE_READ_URL != DATABASE_URL and cache.response_cache.enabled
+
+def get_cache_render_db(request: Request):
+    """get_db, except reads that fill the response cache use the primary when a replica is configured"""
+    if not CACHE_RENDERS_ON_PRIMARY:
+        yield from get_db(request)
+        return
     db = SessionLocal()
     try:
         yield db
@@ -38,36 +93,289 @@ def read_root():
 
 @app.get("/api/health")
 def health_check():
+    startup.report.mark_healthy()
     return {"status": "healthy", "message": "API is working properly"}
 
 # User search endpoint
-@app.get("/api/users/search", response_model=List[schemas.User])
+@app.get("/api/users/search", response_model=schemas.UserPage)
 def search_users(
     email: Optional[str] = Query(None),
     first_name: Optional[str] = Query(None),
     last_name: Optional[str] = Query(None),
     city: Optional[str] = Query(None),
+    phone: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Match on shared trigrams instead of exact substrings"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated user fields to return"),
     db: Session = Depends(get_db)
 ):
-    users = crud.search_users(db, email=email, first_name=first_name, 
-                            last_name=last_name, city=city)
-    return users
+    shape = renders.user_search_shape(fields)
+    with renders.bad_request():
+        page = crud.search_users_page(db, email=email, first_name=first_name,
+                                      last_name=last_name, city=city, phone=phone,
+                                      fuzzy=fuzzy, limit=limit, cursor=cursor,
+                                      columns=shape.column_names() if shape else None)
+    return renders.user_search_response(page, shape)
 
 # User orders endpoint
-@app.get("/api/users/{user_id}/orders", response_model=List[schemas.Order])
-def get_user_orders(user_id: int, db: Session = Depends(get_db)):
-    orders = crud.get_user_orders(db, user_id=user_id)
-    if not orders:
-        raise HTTPException(status_code=404, detail="No orders found for this user")
-    return orders
+@app.get("/api/users/{user_id}/orders", response_model=schemas.OrderPage)
+def get_user_orders(
+    request: Request,
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: distribution_center"),
+    db: Session = Depends(get_cache_render_db)
+):
+    def render():
+        shape = renders.sparse(fastpath.ORDER, fields, include)
+        with renders.bad_request():
+            page = crud.get_user_orders_page_rows(db, user_id=user_id, limit=limit, cursor=cursor, shape=shape)
+        return renders.user_orders_body(page, cursor)
+
+    entry = cache.response_cache.get_or_render(
+        "user_orders", (user_id, limit, cursor, fields, include), [cache.user_orders_tag(user_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
+
+# Batch orders endpoint: orders for many users in one query
+@app.post("/api/users/orders:batch", response_model=schemas.UserOrdersBatch)
+def get_orders_for_users(batch: schemas.UserOrdersBatchRequest, db: Session = Depends(get_read_db)):
+    return {"results": crud.get_orders_for_users(db, batch.user_ids, limit_per_user=batch.limit_per_user)}
+
+# Batch items endpoint: items for many orders in one query
+@app.post("/api/orders/items:batch", response_model=schemas.OrderItemsBatch)
+def get_items_for_orders(batch: schemas.OrderItemsBatchRequest, db: Session = Depends(get_read_db)):
+    return {"results": crud.get_items_for_orders(db, batch.order_ids)}
+
+# Order detail endpoint (int-only, so /api/orders/stats is not taken for an order id)
+@app.get("/api/orders/{order_id:int}", response_model=schemas.OrderDetail)
+def get_order_detail(
+    request: Request,
+    order_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: user, distribution_center, order_items, summary"),
+    db: Session = Depends(get_cache_render_db)
+):
+    def render():
+        if fields is None and include is None:
+            return renders.order_detail_body(crud.get_order_detail(db, order_id=order_id), shaped=False)
+        # Sparse: only the requested columns, joins and follow-up queries run
+        shape = renders.sparse(fastpath.ORDER_DETAIL, fields, include)
+        return renders.order_detail_body(crud.get_order_detail_rows(db, order_id=order_id, shape=shape), shaped=True)
+
+    entry = cache.response_cache.get_or_render(
+        "order_detail", (order_id, fields, include), [cache.order_tag(order_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
 
 # Order items endpoint
 @app.get("/api/orders/{order_id}/items", response_model=List[schemas.OrderItem])
-def get_order_items(order_id: int, db: Session = Depends(get_db)):
-    items = crud.get_order_items(db, order_id=order_id)
-    if not items:
-        raise HTTPException(status_code=404, detail="No items found for this order")
-    return items
+def get_order_items(
+    request: Request,
+    order_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: product"),
+    db: Session = Depends(get_cache_render_db)
+):
+    def render():
+        shape = renders.sparse(fastpath.ORDER_ITEM, fields, include)
+        return renders.order_items_body(crud.get_order_items_rows(db, order_id=order_id, shape=shape))
+
+    entry = cache.response_cache.get_or_render(
+        "order_items", (order_id, fields, include), [cache.order_tag(order_id), cache.EMBEDDED_TAG], render)
+    return cache.json_response(request, entry)
+
+# Order counts and revenue from the daily rollup, for dashboards
+@app.get("/api/orders/stats", response_model=List[schemas.OrderStats], response_model_exclude_unset=True)
+def get_order_stats(
+    start_date: Optional[date] = Query(None, description="First day included"),
+    end_date: Optional[date] = Query(None, description="First day excluded"),
+    group_by: str = Query("day", description="Comma-separated: day, month, status, distribution_center"),
+    status: Optional[str] = Query(None),
+    distribution_center_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db)
+):
+    groups = tuple(dict.fromkeys(name.strip() for name in group_by.split(",") if name.strip()))
+    unknown = [name for name in groups if name not in crud.ORDER_STATS_GROUPS]
+    if unknown or not groups:
+        raise HTTPException(status_code=400, detail=f"group_by takes {', '.join(crud.ORDER_STATS_GROUPS)}")
+    return crud.get_order_stats(db, start_date=start_date, end_date=end_date, group_by=groups,
+                                status=status, distribution_center_id=distribution_center_id)
+
+# Orders placed in a date range, newest first; the range is a seek on the order_date index
+@app.get("/api/orders", response_model=schemas.OrderPage)
+def list_orders(
+    start_date: Optional[date] = Query(None, description="First day included"),
+    end_date: Optional[date] = Query(None, description="First day excluded"),
+    status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; relationship.field for embedded ones"),
+    include: Optional[str] = Query(None, description="Comma-separated relationships to embed: distribution_center"),
+    db: Session = Depends(get_db)
+):
+    start = datetime.combine(start_date, datetime.min.time()) if start_date else None
+    end = datetime.combine(end_date, datetime.min.time()) if end_date else None
+    shape = renders.sparse(fastpath.ORDER, fields, include)
+    with renders.bad_request():
+        page = crud.get_orders_page_rows(db, start=start, end=end, status=status, limit=limit, cursor=cursor, shape=shape)
+    return renders.page_response(page)
+
+# Rankings from the trigger-maintained rollups: k index rows, whatever the table sizes
+@app.get("/api/products/top", response_model=List[schemas.TopProduct])
+def top_products(
+    category: Optional[str] = Query(None, description="Exact category name, case-sensitive (unlike the substring match of /api/products/search)"),
+    k: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    return crud.get_top_products(db, category=category, k=k)
+
+@app.get("/api/users/top", response_model=List[schemas.TopUser])
+def top_users(k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    return crud.get_top_users(db, k=k)
+
+# User order summary endpoint
+@app.get("/api/users/{user_id}/summary", response_model=schemas.UserOrderSummary)
+def get_user_order_summary(user_id: int, limit: int = Query(50, ge=0, le=500), db: Session = Depends(get_db)):
+    return crud.get_user_order_summary(db, user_id=user_id, limit=limit)
+
+# Database statistics endpoint
+@app.get("/api/stats", response_model=schemas.DatabaseStats)
+def get_database_stats(db: Session = Depends(get_db)):
+    return crud.get_database_stats(db)
+
+# Response cache counters
+@app.get("/api/cache/stats")
+def cache_stats():
+    return cache.response_cache.stats()
+
+# Startup phase timings and time to the first healthy response
+@app.get("/api/startup")
+def startup_report():
+    return startup.report.as_dict()
+
+# Prometheus metrics
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Product search endpoint, answered from the in-memory catalog index
+@app.get("/api/products/search", response_model=schemas.ProductPage)
+def search_products(
+    name: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    with renders.bad_request():
+        page = catalog.product_catalog.current().search_page(name=name, category=category, min_price=min_price,
+                                                             max_price=max_price, limit=limit, cursor=cursor)
+    return renders.page_response(page)
+
+# Nearest distribution centers, from the in-memory spatial index
+@app.get("/api/distribution-centers/nearest", response_model=List[schemas.NearestDistributionCenter])
+def nearest_distribution_centers(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(1, ge=1, le=50),
+):
+    return geo.center_index(read_engine).nearest_centers(lat, lon, k)
+
+# Analytics endpoints, served from the in-memory column store
+ANALYTICS_FRESHNESS = (
+    "item_revenue is the sum of item quantity x price (unlike order_total elsewhere, the sum of total_amount). "
+    "Served from an in-memory column store refreshed at most every ANALYTICS_REFRESH_SECONDS. New and deleted "
+    "rows and changed item quantities or prices show on the next refresh; an existing order's new status, "
+    "center or date, an item moved to another product, or a product's new category show only after "
+    "POST /api/analytics/refresh?full=true or a delta batch that updates them."
+)
+@app.get("/api/analytics/revenue/distribution-centers", response_model=List[schemas.DistributionCenterRevenue], description=ANALYTICS_FRESHNESS)
+def revenue_by_distribution_center():
+    return analytics.analytics_store.revenue_by_distribution_center()
+
+@app.get("/api/analytics/revenue/statuses", response_model=List[schemas.StatusRevenue], description=ANALYTICS_FRESHNESS)
+def revenue_by_status():
+    return analytics.analytics_store.revenue_by_status()
+
+@app.get("/api/analytics/revenue/categories", response_model=List[schemas.CategoryRevenue], description=ANALYTICS_FRESHNESS)
+def revenue_by_category():
+    return analytics.analytics_store.revenue_by_category()
+
+@app.get("/api/analytics/revenue/periods", response_model=List[schemas.PeriodRevenue], description=ANALYTICS_FRESHNESS)
+def revenue_by_period(
+    period: str = Query("day", pattern="^(day|week)$"),
+    start_date: Optional[date] = Query(None, description="First day included"),
+    end_date: Optional[date] = Query(None, description="First day excluded"),
+):
+    return analytics.analytics_store.revenue_by_period(period, start_date, end_date)
+
+@app.post("/api/analytics/refresh")
+def refresh_analytics(full: bool = Query(False, description="Reload everything instead of appending new rows")):
+    snapshot = analytics.analytics_store.reload() if full else analytics.analytics_store.refresh()
+    return {"orders": len(snapshot.order_id), "order_items": len(snapshot.item_id)}
+
+# Incremental ingestion: apply new batches from DELTA_DIR and refresh this process's caches.
+# It writes to the database unauthenticated, so it is off unless DELTA_INGEST_ENDPOINT is set
+DELTA_INGEST_ENDPOINT = os.getenv("DELTA_INGEST_ENDPOINT", "false").lower() in ("1", "true", "yes")
+
+def refresh_after_deltas(results: List[delta.BatchResult]) -> None:
+    delta.refresh_downstream(results)
+    batch_watcher.record(results)
+
+@app.post("/api/ingest/deltas")
+def apply_deltas():
+    if not DELTA_INGEST_ENDPOINT:
+        raise HTTPException(status_code=403, detail="Delta ingestion over HTTP is disabled (DELTA_INGEST_ENDPOINT)")
+    try:
+        results = delta.apply_pending(engine)
+    except delta.DeltaBatchError as e:
+        # The batches before the failed one are committed either way
+        refresh_after_deltas(e.applied)
+        raise HTTPException(status_code=422 if isinstance(e.__cause__, ValueError) else 500, detail=str(e))
+    refresh_after_deltas(results)
+    return [
+        {"batch": result.name, "inserted": result.inserted, "updated": result.updated,
+         "tables": {stats.table: {"inserted": stats.inserted, "updated": stats.updated, "unchanged": stats.unchanged}
+                    for stats in result.tables}}
+        for result in results
+    ]
+
+# Streaming exports: rows are read from a server-side cursor and encoded batch by batch
+def export_response(query, fmt: str, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        export.stream_rows(read_engine, query, fmt),
+        media_type=export.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+@app.get("/api/export/orders")
+def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    start_date: Optional[datetime] = Query(None, description="Orders placed at or after this time"),
+    end_date: Optional[datetime] = Query(None, description="Orders placed before this time"),
+    distribution_center_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+):
+    query = export.orders_export_query(status=status, start_date=start_date, end_date=end_date,
+                                       distribution_center_id=distribution_center_id, user_id=user_id)
+    return export_response(query, format, "orders")
+
+@app.get("/api/export/order-items")
+def export_order_items(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None),
+    start_date: Optional[datetime] = Query(None, description="Orders placed at or after this time"),
+    end_date: Optional[datetime] = Query(None, description="Orders placed before this time"),
+    distribution_center_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+):
+    query = export.order_items_export_query(status=status, start_date=start_date, end_date=end_date,
+                                            distribution_center_id=distribution_center_id, user_id=user_id)
+    return export_response(query, format, "order_items")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,58 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine as default_engine
+from app import models
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# Tables created by raw DDL in migrations rather than declared in app/models.py
+UNMODELED_TABLE_PREFIXES = ("users_fts",)
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and reflected and compare_to is None:
+        return not name.startswith(UNMODELED_TABLE_PREFIXES)
+    return True
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=str(default_engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    # app.migrate passes an open connection; the alembic CLI uses the app engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with(connection)
+        return
+
+    with default_engine.connect() as connection:
+        _run_with(connection)
+
+def _run_with(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
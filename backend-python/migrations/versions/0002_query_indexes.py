@@ -0,0 +1,32 @@
+"""indexes for the order access paths
+
+Revision ID: 0002_query_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_query_indexes'
+down_revision: Union[str, None] = '0001_initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /api/users/{id}/orders: newest first per user, id as the keyset tie-breaker
+    op.create_index('ix_orders_user_id_order_date', 'orders', ['user_id', 'order_date', 'id'])
+    # get_orders_by_status: equality on status, ordered by order_date
+    op.create_index('ix_orders_status_order_date', 'orders', ['status', 'order_date'])
+    # /api/orders/{id}/items
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_status_order_date', table_name='orders')
+    op.drop_index('ix_orders_user_id_order_date', table_name='orders')
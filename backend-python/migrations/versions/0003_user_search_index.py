@@ -0,0 +1,59 @@
+"""user search index (FTS5 on SQLite, pg_trgm on Postgres)
+
+Revision ID: 0003_user_search_index
+Revises: 0002_query_indexes
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_user_search_index'
+down_revision: Union[str, None] = '0002_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIELDS = ['email', 'first_name', 'last_name', 'city', 'phone']
+COLUMNS = ', '.join(FIELDS)
+NEW_VALUES = ', '.join('new.' + field for field in FIELDS)
+OLD_VALUES = ', '.join('old.' + field for field in FIELDS)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        created = not sa.inspect(bind).has_table('users_fts')
+        op.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+            {COLUMNS}, content='users', content_rowid='id', tokenize='trigram'
+        )""")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END""")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        END""")
+        op.execute(f"""CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+            INSERT INTO users_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END""")
+        if created:
+            op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+    elif bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for field in FIELDS:
+            op.execute(f'CREATE INDEX IF NOT EXISTS ix_users_{field}_trgm ON users USING gin ({field} gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('users_fts_insert', 'users_fts_delete', 'users_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS users_fts')
+    elif bind.dialect.name == 'postgresql':
+        for field in FIELDS:
+            op.execute(f'DROP INDEX IF EXISTS ix_users_{field}_trgm')
@@ -0,0 +1,151 @@
+"""trigger-maintained per-user order rollups and table row counts
+
+Revision ID: 0004_rollups
+Revises: 0003_user_search_index
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_rollups'
+down_revision: Union[str, None] = '0003_user_search_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = ['users', 'orders', 'products', 'order_items', 'distribution_centers']
+
+# Backfill from the existing rows (app/rollups.py rebuild does the same at runtime)
+RECOMPUTE_SQL = [
+    "DELETE FROM user_order_summaries",
+    """INSERT INTO user_order_summaries (user_id, total_orders, total_spent, latest_order_date)
+       SELECT user_id, count(*), coalesce(sum(total_amount), 0), max(order_date)
+       FROM orders WHERE user_id IS NOT NULL GROUP BY user_id""",
+    "DELETE FROM table_counts",
+] + [
+    f"INSERT INTO table_counts (table_name, row_count) SELECT '{table}', count(*) FROM {table}"
+    for table in COUNTED_TABLES
+]
+
+SQLITE_ORDER_REMOVE = """
+    UPDATE user_order_summaries
+    SET total_orders = total_orders - 1,
+        total_spent = total_spent - coalesce(old.total_amount, 0),
+        latest_order_date = (SELECT max(order_date) FROM orders WHERE user_id = old.user_id)
+    WHERE user_id = old.user_id;
+"""
+
+SQLITE_ORDER_ADD = """
+    INSERT INTO user_order_summaries (user_id, total_orders, total_spent, latest_order_date)
+    VALUES (new.user_id, 1, coalesce(new.total_amount, 0), new.order_date)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_orders = total_orders + 1,
+        total_spent = total_spent + excluded.total_spent,
+        latest_order_date = max(coalesce(latest_order_date, excluded.latest_order_date),
+                                coalesce(excluded.latest_order_date, latest_order_date));
+"""
+
+POSTGRES_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION orders_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.user_id IS NOT NULL THEN
+        UPDATE user_order_summaries
+        SET total_orders = total_orders - 1,
+            total_spent = total_spent - coalesce(OLD.total_amount, 0),
+            latest_order_date = (SELECT max(order_date) FROM orders WHERE user_id = OLD.user_id)
+        WHERE user_id = OLD.user_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS NOT NULL THEN
+        INSERT INTO user_order_summaries (user_id, total_orders, total_spent, latest_order_date)
+        VALUES (NEW.user_id, 1, coalesce(NEW.total_amount, 0), NEW.order_date)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_orders = user_order_summaries.total_orders + 1,
+            total_spent = user_order_summaries.total_spent + excluded.total_spent,
+            latest_order_date = greatest(user_order_summaries.latest_order_date, excluded.latest_order_date);
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION table_counts_inserted() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_counts SET row_count = row_count + (SELECT count(*) FROM changed_rows)
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION table_counts_deleted() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_counts SET row_count = row_count - (SELECT count(*) FROM changed_rows)
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_order_summaries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_orders', sa.Integer(), nullable=False),
+        sa.Column('total_spent', sa.Float(), nullable=False),
+        sa.Column('latest_order_date', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_table(
+        'table_counts',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    for statement in RECOMPUTE_SQL:
+        op.execute(statement)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(POSTGRES_FUNCTIONS)
+        op.execute("""CREATE TRIGGER orders_rollup AFTER INSERT OR UPDATE OR DELETE ON orders
+                      FOR EACH ROW EXECUTE FUNCTION orders_rollup()""")
+        # Statement-level with transition tables, so bulk inserts update the counter once
+        for table in COUNTED_TABLES:
+            op.execute(f"""CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table}
+                           REFERENCING NEW TABLE AS changed_rows
+                           FOR EACH STATEMENT EXECUTE FUNCTION table_counts_inserted()""")
+            op.execute(f"""CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table}
+                           REFERENCING OLD TABLE AS changed_rows
+                           FOR EACH STATEMENT EXECUTE FUNCTION table_counts_deleted()""")
+        return
+
+    op.execute(f"""CREATE TRIGGER orders_rollup_insert AFTER INSERT ON orders
+                   WHEN new.user_id IS NOT NULL BEGIN {SQLITE_ORDER_ADD} END""")
+    op.execute(f"""CREATE TRIGGER orders_rollup_delete AFTER DELETE ON orders
+                   WHEN old.user_id IS NOT NULL BEGIN {SQLITE_ORDER_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER orders_rollup_update_old AFTER UPDATE OF user_id, total_amount, order_date ON orders
+                   WHEN old.user_id IS NOT NULL BEGIN {SQLITE_ORDER_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER orders_rollup_update_new AFTER UPDATE OF user_id, total_amount, order_date ON orders
+                   WHEN new.user_id IS NOT NULL BEGIN {SQLITE_ORDER_ADD} END""")
+    for table in COUNTED_TABLES:
+        op.execute(f"""CREATE TRIGGER {table}_count_insert AFTER INSERT ON {table} BEGIN
+                       UPDATE table_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+                       END""")
+        op.execute(f"""CREATE TRIGGER {table}_count_delete AFTER DELETE ON {table} BEGIN
+                       UPDATE table_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+                       END""")
+
+
+def downgrade() -> None:
+    triggers = ['orders_rollup_insert', 'orders_rollup_delete', 'orders_rollup_update_old', 'orders_rollup_update_new']
+    triggers += [f'{table}_count_{event}' for table in COUNTED_TABLES for event in ('insert', 'delete')]
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS orders_rollup ON orders')
+        for table in COUNTED_TABLES:
+            for event in ('insert', 'delete'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_count_{event} ON {table}')
+        op.execute('DROP FUNCTION IF EXISTS orders_rollup(), table_counts_inserted(), table_counts_deleted()')
+    else:
+        for trigger in triggers:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_table('table_counts')
+    op.drop_table('user_order_summaries')
@@ -0,0 +1,29 @@
+"""user coordinates for nearest distribution center assignment
+
+Revision ID: 0005_user_locations
+Revises: 0004_rollups
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_user_locations'
+down_revision: Union[str, None] = '0004_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Plain ADD COLUMN rather than batch mode: rebuilding users would drop its FTS and count triggers
+    op.add_column('users', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'longitude')
+    op.drop_column('users', 'latitude')
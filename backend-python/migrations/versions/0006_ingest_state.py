@@ -0,0 +1,41 @@
+"""high-water marks and applied batches for incremental ingestion
+
+Revision ID: 0006_ingest_state
+Revises: 0005_user_locations
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_ingest_state'
+down_revision: Union[str, None] = '0005_user_locations'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingest_watermarks',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('high_water_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    op.create_table(
+        'ingest_batches',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('rows_inserted', sa.Integer(), nullable=False),
+        sa.Column('rows_updated', sa.Integer(), nullable=False),
+        sa.Column('loaded_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_batches')
+    op.drop_table('ingest_watermarks')
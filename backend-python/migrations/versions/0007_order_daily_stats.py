@@ -0,0 +1,147 @@
+"""trigger-maintained day x status x distribution center order rollup, partitioned by month on PostgreSQL
+
+Revision ID: 0007_order_daily_stats
+Revises: 0006_ingest_state
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_order_daily_stats'
+down_revision: Union[str, None] = '0006_ingest_state'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Orders without a status or center roll up under '' and 0, so the primary key has no NULLs;
+# orders without a date are left out
+
+SQLITE_BACKFILL = """
+    INSERT INTO order_daily_stats (day, status, distribution_center_id, orders, revenue)
+    SELECT date(order_date), coalesce(status, ''), coalesce(distribution_center_id, 0), count(*), coalesce(sum(total_amount), 0)
+    FROM orders WHERE order_date IS NOT NULL
+    GROUP BY date(order_date), coalesce(status, ''), coalesce(distribution_center_id, 0)
+"""
+
+SQLITE_STATS_REMOVE = """
+    UPDATE order_daily_stats
+    SET orders = orders - 1, revenue = revenue - coalesce(old.total_amount, 0)
+    WHERE day = date(old.order_date) AND status = coalesce(old.status, '')
+      AND distribution_center_id = coalesce(old.distribution_center_id, 0);
+    DELETE FROM order_daily_stats
+    WHERE day = date(old.order_date) AND status = coalesce(old.status, '')
+      AND distribution_center_id = coalesce(old.distribution_center_id, 0) AND orders <= 0;
+"""
+
+SQLITE_STATS_ADD = """
+    INSERT INTO order_daily_stats (day, status, distribution_center_id, orders, revenue)
+    VALUES (date(new.order_date), coalesce(new.status, ''), coalesce(new.distribution_center_id, 0),
+            1, coalesce(new.total_amount, 0))
+    ON CONFLICT (day, status, distribution_center_id) DO UPDATE SET
+        orders = orders + 1,
+        revenue = revenue + excluded.revenue;
+"""
+
+POSTGRES_TABLE = """
+CREATE TABLE order_daily_stats (
+    day DATE NOT NULL,
+    status VARCHAR NOT NULL,
+    distribution_center_id INTEGER NOT NULL,
+    orders INTEGER NOT NULL,
+    revenue DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (day, status, distribution_center_id)
+) PARTITION BY RANGE (day);
+
+CREATE TABLE order_daily_stats_default PARTITION OF order_daily_stats DEFAULT;
+
+-- One partition per month holding orders, plus the next two (app/partitions.py keeps adding them)
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN
+        SELECT generate_series(date_trunc('month', min(order_date)),
+                               date_trunc('month', greatest(max(order_date), now())) + interval '2 months',
+                               interval '1 month')::date
+        FROM orders
+    LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF order_daily_stats FOR VALUES FROM (%L) TO (%L)',
+                       'order_daily_stats_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date);
+    END LOOP;
+END $$;
+
+INSERT INTO order_daily_stats (day, status, distribution_center_id, orders, revenue)
+SELECT order_date::date, coalesce(status, ''), coalesce(distribution_center_id, 0), count(*), coalesce(sum(total_amount), 0)
+FROM orders WHERE order_date IS NOT NULL
+GROUP BY 1, 2, 3;
+
+CREATE OR REPLACE FUNCTION order_daily_stats_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.order_date IS NOT NULL THEN
+        UPDATE order_daily_stats
+        SET orders = orders - 1, revenue = revenue - coalesce(OLD.total_amount, 0)
+        WHERE day = OLD.order_date::date AND status = coalesce(OLD.status, '')
+          AND distribution_center_id = coalesce(OLD.distribution_center_id, 0);
+        DELETE FROM order_daily_stats
+        WHERE day = OLD.order_date::date AND status = coalesce(OLD.status, '')
+          AND distribution_center_id = coalesce(OLD.distribution_center_id, 0) AND orders <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.order_date IS NOT NULL THEN
+        INSERT INTO order_daily_stats (day, status, distribution_center_id, orders, revenue)
+        VALUES (NEW.order_date::date, coalesce(NEW.status, ''), coalesce(NEW.distribution_center_id, 0),
+                1, coalesce(NEW.total_amount, 0))
+        ON CONFLICT (day, status, distribution_center_id) DO UPDATE SET
+            orders = order_daily_stats.orders + 1,
+            revenue = order_daily_stats.revenue + excluded.revenue;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE TRIGGER order_daily_stats_rollup AFTER INSERT OR DELETE OR UPDATE OF order_date, status, distribution_center_id, total_amount
+ON orders FOR EACH ROW EXECUTE FUNCTION order_daily_stats_rollup();
+"""
+
+SQLITE_TRIGGERS = ['order_daily_stats_insert', 'order_daily_stats_delete',
+                   'order_daily_stats_update_old', 'order_daily_stats_update_new']
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(POSTGRES_TABLE)
+        return
+
+    # The (day, ...) primary key lets a date range seek straight to its days
+    op.create_table(
+        'order_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('distribution_center_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status', 'distribution_center_id'),
+    )
+    op.execute(SQLITE_BACKFILL)
+    op.execute(f"""CREATE TRIGGER order_daily_stats_insert AFTER INSERT ON orders
+                   WHEN new.order_date IS NOT NULL BEGIN {SQLITE_STATS_ADD} END""")
+    op.execute(f"""CREATE TRIGGER order_daily_stats_delete AFTER DELETE ON orders
+                   WHEN old.order_date IS NOT NULL BEGIN {SQLITE_STATS_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER order_daily_stats_update_old
+                   AFTER UPDATE OF order_date, status, distribution_center_id, total_amount ON orders
+                   WHEN old.order_date IS NOT NULL BEGIN {SQLITE_STATS_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER order_daily_stats_update_new
+                   AFTER UPDATE OF order_date, status, distribution_center_id, total_amount ON orders
+                   WHEN new.order_date IS NOT NULL BEGIN {SQLITE_STATS_ADD} END""")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS order_daily_stats_rollup ON orders')
+        op.execute('DROP FUNCTION IF EXISTS order_daily_stats_rollup()')
+    else:
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_table('order_daily_stats')
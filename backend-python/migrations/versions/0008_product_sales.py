@@ -0,0 +1,134 @@
+"""trigger-maintained per-product sales rollup and spend-ordered user summaries, for top-N rankings
+
+Revision ID: 0008_product_sales
+Revises: 0007_order_daily_stats
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_product_sales'
+down_revision: Union[str, None] = '0007_order_daily_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# An item's revenue is quantity x price, NULLs counting as 0 as in app/analytics.py. The product's
+# category is copied in (a missing one as '') so a category's top sellers are one index range.
+BACKFILL_SQL = """
+    INSERT INTO product_sales (product_id, category, items, units, revenue)
+    SELECT order_items.product_id, coalesce(max(products.category), ''), count(*),
+           coalesce(sum(order_items.quantity), 0),
+           coalesce(sum(coalesce(order_items.quantity, 0) * coalesce(order_items.price, 0)), 0)
+    FROM order_items LEFT JOIN products ON products.id = order_items.product_id
+    WHERE order_items.product_id IS NOT NULL
+    GROUP BY order_items.product_id
+"""
+
+SQLITE_SALES_REMOVE = """
+    UPDATE product_sales
+    SET items = items - 1,
+        units = units - coalesce(old.quantity, 0),
+        revenue = revenue - coalesce(old.quantity, 0) * coalesce(old.price, 0)
+    WHERE product_id = old.product_id;
+    DELETE FROM product_sales WHERE product_id = old.product_id AND items <= 0;
+"""
+
+SQLITE_SALES_ADD = """
+    INSERT INTO product_sales (product_id, category, items, units, revenue)
+    VALUES (new.product_id, coalesce((SELECT category FROM products WHERE id = new.product_id), ''), 1,
+            coalesce(new.quantity, 0), coalesce(new.quantity, 0) * coalesce(new.price, 0))
+    ON CONFLICT (product_id) DO UPDATE SET
+        items = items + 1,
+        units = units + excluded.units,
+        revenue = revenue + excluded.revenue;
+"""
+
+SQLITE_CATEGORY_CHANGE = """
+    UPDATE product_sales SET category = coalesce(new.category, '') WHERE product_id = new.id;
+"""
+
+POSTGRES_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION product_sales_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.product_id IS NOT NULL THEN
+        UPDATE product_sales
+        SET items = items - 1,
+            units = units - coalesce(OLD.quantity, 0),
+            revenue = revenue - coalesce(OLD.quantity, 0) * coalesce(OLD.price, 0)
+        WHERE product_id = OLD.product_id;
+        DELETE FROM product_sales WHERE product_id = OLD.product_id AND items <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.product_id IS NOT NULL THEN
+        INSERT INTO product_sales (product_id, category, items, units, revenue)
+        VALUES (NEW.product_id, coalesce((SELECT category FROM products WHERE id = NEW.product_id), ''), 1,
+                coalesce(NEW.quantity, 0), coalesce(NEW.quantity, 0) * coalesce(NEW.price, 0))
+        ON CONFLICT (product_id) DO UPDATE SET
+            items = product_sales.items + 1,
+            units = product_sales.units + excluded.units,
+            revenue = product_sales.revenue + excluded.revenue;
+    END IF;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION product_sales_category() RETURNS trigger AS $$
+BEGIN
+    UPDATE product_sales SET category = coalesce(NEW.category, '') WHERE product_id = NEW.id;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+"""
+
+SQLITE_TRIGGERS = ['product_sales_insert', 'product_sales_delete', 'product_sales_update_old',
+                   'product_sales_update_new', 'product_sales_category']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'product_sales',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('items', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('product_id'),
+    )
+    # Top-k reads walk these from the high end and stop after k rows
+    op.create_index('ix_product_sales_category_revenue', 'product_sales', ['category', 'revenue', 'product_id'])
+    op.create_index('ix_product_sales_revenue', 'product_sales', ['revenue', 'product_id'])
+    op.create_index('ix_user_order_summaries_total_spent', 'user_order_summaries', ['total_spent', 'user_id'])
+    op.execute(BACKFILL_SQL)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(POSTGRES_FUNCTIONS)
+        op.execute("""CREATE TRIGGER product_sales_rollup AFTER INSERT OR DELETE OR UPDATE OF product_id, quantity, price
+                      ON order_items FOR EACH ROW EXECUTE FUNCTION product_sales_rollup()""")
+        op.execute("""CREATE TRIGGER product_sales_category AFTER UPDATE OF category ON products
+                      FOR EACH ROW EXECUTE FUNCTION product_sales_category()""")
+        return
+
+    op.execute(f"""CREATE TRIGGER product_sales_insert AFTER INSERT ON order_items
+                   WHEN new.product_id IS NOT NULL BEGIN {SQLITE_SALES_ADD} END""")
+    op.execute(f"""CREATE TRIGGER product_sales_delete AFTER DELETE ON order_items
+                   WHEN old.product_id IS NOT NULL BEGIN {SQLITE_SALES_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER product_sales_update_old AFTER UPDATE OF product_id, quantity, price ON order_items
+                   WHEN old.product_id IS NOT NULL BEGIN {SQLITE_SALES_REMOVE} END""")
+    op.execute(f"""CREATE TRIGGER product_sales_update_new AFTER UPDATE OF product_id, quantity, price ON order_items
+                   WHEN new.product_id IS NOT NULL BEGIN {SQLITE_SALES_ADD} END""")
+    op.execute(f"""CREATE TRIGGER product_sales_category AFTER UPDATE OF category ON products
+                   BEGIN {SQLITE_CATEGORY_CHANGE} END""")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS product_sales_rollup ON order_items')
+        op.execute('DROP TRIGGER IF EXISTS product_sales_category ON products')
+        op.execute('DROP FUNCTION IF EXISTS product_sales_rollup(), product_sales_category()')
+    else:
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_index('ix_user_order_summaries_total_spent', table_name='user_order_summaries')
+    op.drop_table('product_sales')
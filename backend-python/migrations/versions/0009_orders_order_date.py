@@ -0,0 +1,27 @@
+"""order_date index for date-range order listings
+
+Revision ID: 0009_orders_order_date
+Revises: 0008_product_sales
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009_orders_order_date'
+down_revision: Union[str, None] = '0008_product_sales'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /api/orders: a B-tree range seek over [start, end) on the unpartitioned orders table,
+    # read newest first, id as the keyset tie-breaker
+    op.create_index('ix_orders_order_date', 'orders', ['order_date', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_order_date', table_name='orders')
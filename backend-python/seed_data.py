@@ -1,137 +1,44 @@
-import csv
+import logging
 import os
-import random
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app import models
-from datetime import datetime
+from app.database import SessionLocal, engine, DATABASE_URL
+from app import models, ingest, migrate, delta, snapshot
 
-models.Base.metadata.create_all(bind=engine)
+DATA_DIR = os.getenv("DATA_DIR", "../data")
+# A binary snapshot (python -m app.snapshot export DIR) loads much faster than the CSVs
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
 
-def load_csv_data(file_path, required_columns=None):
-    """Generic CSV loader with error handling"""
-    data = []
-    if not os.path.exists(file_path):
-        print(f"? File not found: {file_path}")
-        return data
-        
-    try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if required_columns:
-                    if all(col in row for col in required_columns):
-                        data.append(row)
-                else:
-                    data.append(row)
-        print(f"? Loaded {len(data)} records from {os.path.basename(file_path)}")
-    except Exception as e:
-        print(f"? Error loading {file_path}: {e}")
-    
-    return data
+def create_sample_data(data_dir=DATA_DIR, chunk_size=ingest.DEFAULT_CHUNK_SIZE):
+    migrate.upgrade_database(engine)
 
-def create_sample_data():
     db = SessionLocal()
     try:
         if db.query(models.User).first():
-            print("Database already has data. Skipping seeding.")
-            return
-        
-        print("Loading real dataset from CSV files...")
-        
-        # 1. Load Distribution Centers FIRST
-        print("\\n1. Loading Distribution Centers...")
-        centers_data = load_csv_data("../data/distribution_centers.csv", ["id", "name", "latitude", "longitude"])
-        distribution_center_ids = []
-        for row in centers_data:
-            center = models.DistributionCenter(
-                id=int(row["id"]),
-                name=row["name"],
-                latitude=float(row["latitude"]),
-                longitude=float(row["longitude"])
-            )
-            db.add(center)
-            distribution_center_ids.append(int(row["id"]))
-        db.commit()
-        
-        # 2. Load Users
-        print("\\n2. Loading Users...")
-        users_data = load_csv_data("../data/users.csv")
-        for row in users_data:
-            user = models.User(
-                id=int(row.get("id", 0)),
-                first_name=row.get("first_name", ""),
-                last_name=row.get("last_name", ""),
-                email=row.get("email", ""),
-                phone=row.get("phone", ""),
-                city=row.get("city", ""),
-                country=row.get("country", "USA"),
-                address=row.get("address", "")
-            )
-            db.add(user)
-        db.commit()
-        
-        # 3. Load Products
-        print("\\n3. Loading Products...")
-        products_data = load_csv_data("../data/products.csv")
-        for row in products_data:
-            product = models.Product(
-                id=int(row.get("id", 0)),
-                name=row.get("name", ""),
-                description=row.get("description", ""),
-                price=float(row.get("price", 0)),
-                category=row.get("category", ""),
-                sku=row.get("sku", "")
-            )
-            db.add(product)
-        db.commit()
-        
-        # 4. Load Orders (with random distribution center assignment)
-        print("\\n4. Loading Orders...")
-        orders_data = load_csv_data("../data/orders.csv")
-        for row in orders_data:
-            # Assign random distribution center if not provided
-            distribution_center_id = None
-            if distribution_center_ids:
-                distribution_center_id = random.choice(distribution_center_ids)
-            
-            order = models.Order(
-                id=int(row.get("id", 0)),
-                user_id=int(row.get("user_id", 0)),
-                distribution_center_id=distribution_center_id,
-                order_number=row.get("order_number", ""),
-                status=row.get("status", "pending"),
-                total_amount=float(row.get("total_amount", 0)),
-                order_date=datetime.fromisoformat(row.get("order_date", "2025-01-01T00:00:00").replace("Z", "+00:00"))
-            )
-            db.add(order)
-        db.commit()
-        
-        # 5. Load Order Items
-        print("\\n5. Loading Order Items...")
-        items_data = load_csv_data("../data/order_items.csv")
-        for row in items_data:
-            item = models.OrderItem(
-                id=int(row.get("id", 0)),
-                order_id=int(row.get("order_id", 0)),
-                product_id=int(row.get("product_id", 0)),
-                quantity=int(row.get("quantity", 1)),
-                price=float(row.get("price", 0))
-            )
-            db.add(item)
-        db.commit()
-        
-        print("\\n?? MILESTONE 2 DATABASE READY!")
-        print("? All CSV files loaded successfully with updated schema")
-        print("? Distribution centers linked to orders")
-        print("? E-commerce Order Viewer backend ready with enhanced relationships")
-        
+            print("Database already has data. Applying new delta batches instead.")
+            return delta.main([delta.DELTA_DIR])
+    finally:
+        db.close()
+
+    bulk_engine = ingest.create_bulk_engine(DATABASE_URL)
+    try:
+        if SNAPSHOT_DIR:
+            print(f"Loading snapshot from {SNAPSHOT_DIR}...")
+            stats = snapshot.import_snapshot(bulk_engine, SNAPSHOT_DIR)
+        else:
+            print("Loading real dataset from CSV files...")
+            stats = ingest.ingest_csv_directory(bulk_engine, data_dir, chunk_size=chunk_size)
     except Exception as e:
         print(f"? Error loading data: {e}")
-        db.rollback()
+        return
     finally:
-        db.close()
+        bulk_engine.dispose()
+
+    ingest.log_stats(stats)
+
+    print("\n?? MILESTONE 2 DATABASE READY!")
+    print("? All CSV files loaded successfully with updated schema")
+    print("? Distribution centers linked to orders")
+    print("? E-commerce Order Viewer backend ready with enhanced relationships")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="  %(message)s")
     create_sample_data()
-
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import models
+from app.analytics import AnalyticsStore
+from benchmarks.bench_analytics import SQL_BREAKDOWNS, STORE_BREAKDOWNS, sql_breakdown
+
+KEYS = {"distribution_center": "distribution_center_id", "status": "status", "category": "category", "day": "period_start"}
+
+pytestmark = pytest.mark.dataset(users=50, products=30, orders=400)
+
+def assert_matches_sql(engine, store):
+    for name in SQL_BREAKDOWNS:
+        expected = {str(key): round(revenue, 2) for key, _, revenue in sql_breakdown(engine, name)}
+        actual = {str(row[KEYS[name]]): row["item_revenue"] for row in STORE_BREAKDOWNS[name](store)}
+        assert actual == pytest.approx(expected), name
+
+def test_breakdowns_match_sql_and_refresh_appends(engine):
+    store = AnalyticsStore(engine, refresh_seconds=float("inf"))
+    store.refresh()
+    assert_matches_sql(engine, store)
+
+    with engine.begin() as conn:
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 10000, "user_id": 1, "distribution_center_id": 1, "order_number": "ORD-NEW",
+            "status": "refunded", "total_amount": 30.0, "order_date": datetime(2024, 12, 31, 12),
+        }])
+        conn.execute(models.OrderItem.__table__.insert(), [
+            {"id": 50000, "order_id": 10000, "product_id": 1, "quantity": 3, "price": 10.0},
+            {"id": 50001, "order_id": 1, "product_id": 2, "quantity": 1, "price": 5.0},
+        ])
+
+    store.refresh()
+    assert_matches_sql(engine, store)
+    assert {"status": "refunded", "orders": 1, "item_revenue": 30.0} in store.revenue_by_status()
+
+def test_refresh_reloads_when_rows_change_below_the_last_id(engine):
+    store = AnalyticsStore(engine, refresh_seconds=float("inf"))
+    store.refresh()
+
+    with engine.begin() as conn:
+        conn.execute(update(models.OrderItem).where(models.OrderItem.id == 1).values(quantity=9, price=99.0))
+        conn.execute(delete(models.OrderItem).where(models.OrderItem.id == 2))
+        conn.execute(delete(models.OrderItem).where(models.OrderItem.id == 3))
+        conn.execute(models.OrderItem.__table__.insert(), [
+            {"id": 3, "order_id": 5, "product_id": 4, "quantity": 2, "price": 7.5},
+        ])
+
+    store.refresh()
+    assert_matches_sql(engine, store)
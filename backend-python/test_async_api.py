@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import async_api, async_crud, async_database, cache
+from app.singleflight import SingleFlight
+
+pytestmark = pytest.mark.dataset(users=20, products=10, orders=150)
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+# Requests answered by async_api when ASYNC_DB is on; the sync routes must answer them identically
+REQUESTS = [
+    ("GET", "/api/users/search?city=a", None),
+    ("GET", "/api/users/search?city=a&fields=id,email&limit=3", None),
+    ("GET", "/api/users/search?fields=nope", None),
+    ("GET", "/api/users/1/orders?limit=2", None),
+    ("GET", "/api/users/1/orders?fields=id,distribution_center.name&include=distribution_center", None),
+    ("GET", "/api/users/99999/orders", None),
+    ("GET", "/api/users/1/orders?cursor=garbage", None),
+    ("GET", "/api/orders/5", None),
+    ("GET", "/api/orders/5?fields=id,status&include=summary", None),
+    ("GET", "/api/orders/99999", None),
+    ("GET", "/api/orders/5/items?include=product", None),
+    ("GET", "/api/orders/99999/items", None),
+    ("POST", "/api/users/orders:batch", {"user_ids": [1, 2, 99999], "limit_per_user": 2}),
+    ("POST", "/api/orders/items:batch", {"order_ids": [5, 6, 99999]}),
+    ("GET", "/api/products/search?limit=3", None),
+]
+
+# Run in a fresh interpreter: ASYNC_DB and DATABASE_URL are read when main is imported
+SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+import main
+
+client = TestClient(main.app)
+endpoints = {route.path: route.endpoint.__module__ for route in reversed(main.app.routes) if hasattr(route, "endpoint")}
+responses = []
+for method, url, body in json.load(sys.stdin):
+    response = client.request(method, url, json=body)
+    responses.append([response.status_code, response.json()])
+json.dump({"endpoints": endpoints, "responses": responses}, sys.stdout)
+"""
+
+def serve(engine, async_db: bool) -> dict:
+    env = dict(os.environ, DATABASE_URL=str(engine.url), ASYNC_DB="true" if async_db else "false")
+    env.pop("DATABASE_READ_URL", None)
+    env.pop("ASYNC_DATABASE_URL", None)
+    result = subprocess.run([sys.executable, "-c", SCRIPT], input=json.dumps(REQUESTS), env=env, cwd=BACKEND,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+def test_async_db_mode_answers_like_the_sync_routes(engine):
+    sync, async_ = serve(engine, async_db=False), serve(engine, async_db=True)
+
+    assert async_["endpoints"]["/api/orders/{order_id:int}"] == "app.async_api"
+    assert sync["endpoints"]["/api/orders/{order_id:int}"] == "main"
+    for request, expected, actual in zip(REQUESTS, sync["responses"], async_["responses"]):
+        assert actual == expected, request
+    statuses = [status for status, _ in async_["responses"]]
+    assert statuses.count(400) == 2 and statuses.count(404) == 3
+
+class TrackedSession(AsyncSession):
+    closed = []
+
+    async def close(self):
+        TrackedSession.closed.append(self)
+        await super().close()
+
+@pytest.fixture()
+def async_app(engine, monkeypatch):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+    monkeypatch.setattr(async_database, "AsyncSessionLocal",
+                        async_sessionmaker(async_engine, class_=TrackedSession, expire_on_commit=False))
+    monkeypatch.setattr(cache, "response_cache", cache.ResponseCache(cache.MemoryBackend()))
+    monkeypatch.setattr(cache, "single_flight", SingleFlight(enabled=True))
+    TrackedSession.closed = []
+    app = FastAPI()
+    app.include_router(async_api.router)
+    yield app
+    asyncio.run(async_engine.dispose())
+
+def test_cancelled_leader_leaves_the_shared_render_its_session(async_app, monkeypatch):
+    release = asyncio.Event()
+    sessions = []
+    get_order_items_rows = async_crud.get_order_items_rows
+
+    async def slow_items(db, order_id, shape):
+        sessions.append(db)
+        await release.wait()
+        assert db not in TrackedSession.closed
+        return await get_order_items_rows(db, order_id, shape)
+
+    monkeypatch.setattr(async_crud, "get_order_items_rows", slow_items)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=async_app), base_url="http://test") as client:
+            leader = asyncio.create_task(client.get("/api/orders/5/items"))
+            while not sessions:
+                await asyncio.sleep(0)
+            followers = [asyncio.create_task(client.get("/api/orders/5/items")) for _ in range(3)]
+            while cache.single_flight.coalesced < 3:
+                await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            release.set()
+            responses = await asyncio.gather(*followers)
+
+            # The same request rendered again from scratch, without the slow query
+            monkeypatch.setattr(async_crud, "get_order_items_rows", get_order_items_rows)
+            cache.response_cache.clear()
+            return responses, await client.get("/api/orders/5/items")
+
+    responses, fresh = asyncio.run(scenario())
+
+    assert len(sessions) == 1 and sessions[0] in TrackedSession.closed
+    assert fresh.status_code == 200 and fresh.json()
+    for response in responses:
+        assert response.status_code == 200
+        assert response.json() == fresh.json()
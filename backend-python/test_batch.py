@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+
+pytestmark = pytest.mark.dataset(users=10, products=10, orders=200)
+
+def orders_by_user(engine, user_id):
+    with Session(engine) as db:
+        return [order_id for order_id, in db.execute(
+            select(models.Order.id).where(models.Order.user_id == user_id)
+            .order_by(models.Order.order_date.desc(), models.Order.id.desc()))]
+
+def test_user_orders_batch_limits_each_user_and_keeps_missing_ids(api, engine):
+    response = api.post("/api/users/orders:batch", json={"user_ids": [2, 99999, 5], "limit_per_user": 3})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert set(results) == {"2", "5", "99999"}
+    assert results["99999"] == []
+    for user_id in (2, 5):
+        assert [order["id"] for order in results[str(user_id)]] == orders_by_user(engine, user_id)[:3]
+        assert all(order["user_id"] == user_id for order in results[str(user_id)])
+
+def test_user_orders_batch_matches_each_users_own_listing(api):
+    results = api.post("/api/users/orders:batch", json={"user_ids": [1, 4], "limit_per_user": 500}).json()["results"]
+    for user_id in (1, 4):
+        listing = api.get(f"/api/users/{user_id}/orders?limit=500").json()["results"]
+        assert [order["id"] for order in results[str(user_id)]] == [order["id"] for order in listing]
+
+def test_order_items_batch_groups_items_and_keeps_missing_ids(api):
+    results = api.post("/api/orders/items:batch", json={"order_ids": [3, 7, 99999]}).json()["results"]
+    assert results["99999"] == []
+    for order_id in (3, 7):
+        items = api.get(f"/api/orders/{order_id}/items").json()
+        assert sorted(item["id"] for item in results[str(order_id)]) == sorted(item["id"] for item in items)
+        assert all(item["order_id"] == order_id and item["product"] for item in results[str(order_id)])
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/users/orders:batch", {"user_ids": []}),
+    ("/api/users/orders:batch", {"user_ids": list(range(501))}),
+    ("/api/users/orders:batch", {"user_ids": [1], "limit_per_user": 0}),
+    ("/api/users/orders:batch", {"user_ids": [1], "limit_per_user": 501}),
+    ("/api/orders/items:batch", {"order_ids": []}),
+    ("/api/orders/items:batch", {"order_ids": list(range(501))}),
+])
+def test_batch_requests_outside_the_limits_are_rejected(api, path, body):
+    assert api.post(path, json=body).status_code == 422
@@ -0,0 +1,65 @@
+import time
+
+from sqlalchemy.orm import Session
+
+from app import cache as cache_module, models
+from app.cache import MemoryBackend, ResponseCache
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(MemoryBackend(max_entries=2))
+    for n in range(2):
+        cache.set(cache.key("items", (n,), []), b"[%d]" % n)
+    assert cache.get(cache.key("items", (0,), [])) is not None
+    cache.set(cache.key("items", (2,), []), b"[2]")
+
+    assert cache.get(cache.key("items", (1,), [])) is None
+    assert cache.get(cache.key("items", (0,), [])).body == b"[0]"
+    assert cache.backend.evictions == 1
+
+def test_byte_bound_and_ttl():
+    cache = ResponseCache(MemoryBackend(max_bytes=100), ttl=0.01)
+    cache.set(cache.key("items", (1,), []), b"x" * 60)
+    cache.set(cache.key("items", (2,), []), b"y" * 60)
+    assert cache.get(cache.key("items", (1,), [])) is None
+
+    time.sleep(0.02)
+    assert cache.get(cache.key("items", (2,), [])) is None
+    assert cache.backend.expirations == 1
+
+def test_invalidation_changes_key_and_etag_follows_body():
+    cache = ResponseCache(MemoryBackend())
+    key = cache.key("order_items", (7,), ["order:7"])
+    entry = cache.get_or_render("order_items", (7,), ["order:7"], lambda: b"[1]")
+    assert cache.get(key).etag == entry.etag
+
+    cache.invalidate("order:7")
+    assert cache.get(cache.key("order_items", (7,), ["order:7"])) is None
+    assert cache.get_or_render("order_items", (7,), ["order:7"], lambda: b"[2]").etag != entry.etag
+
+def test_keys_encode_parameters_unambiguously():
+    cache = ResponseCache(MemoryBackend())
+    keys = [cache.key("order_detail", params, ["order:7"])
+            for params in [(7, None, None), (7, "None", None), (7, "id:status", None), (7, "id", "status")]]
+    assert len(set(keys)) == len(keys)
+
+def test_bumped_tags_are_bounded_without_reviving_stale_keys():
+    cache = ResponseCache(MemoryBackend(max_tags=4))
+    stale = cache.key("order_items", (1,), ["order:1"])
+    cache.set(stale, b"[1]")
+    cache.invalidate("order:1")
+    for n in range(2, 7):
+        cache.invalidate(f"order:{n}")
+
+    assert cache.backend.stats()["tags"] <= 4
+    assert cache.key("order_items", (1,), ["order:1"]) != stale
+    assert cache.get(cache.key("order_items", (1,), ["order:1"])) is None
+
+def test_embedded_entity_writes_invalidate_order_responses(engine, monkeypatch):
+    cache = ResponseCache(MemoryBackend())
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    tags = [cache_module.order_tag(1), cache_module.EMBEDDED_TAG]
+    cache.get_or_render("order_items", (1,), tags, lambda: b"[1]")
+    with Session(engine) as db:
+        db.get(models.Product, 3).name = "Renamed"
+        db.commit()
+    assert cache.get(cache.key("order_items", (1,), tags)) is None
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import crud, fastpath, models, schemas
+from app.catalog import ProductCatalog
+
+SEARCHES = [
+    {},
+    {"name": "product 1"},
+    {"name": "T 2"},
+    {"name": "1"},
+    {"name": "no such product"},
+    {"category": "tops"},
+    {"category": "e"},
+    {"min_price": 50, "max_price": 120},
+    {"max_price": 30},
+    {"name": "duct", "category": "Jeans", "min_price": 20},
+]
+
+pytestmark = pytest.mark.dataset(users=5, products=300, orders=10)
+
+def assert_pages_match(engine, catalog, search):
+    cursor = expected_cursor = None
+    with Session(engine) as db:
+        while True:
+            expected = crud.search_products_page(db, limit=40, cursor=expected_cursor, **search)
+            page = catalog.search_page(limit=40, cursor=cursor, **search)
+            body = schemas.ProductPage(results=expected.items, next_cursor=expected.next_cursor).model_dump_json()
+            assert fastpath.dumps({"results": page.items, "next_cursor": page.next_cursor}) == body.encode(), search
+            if page.next_cursor is None:
+                return
+            cursor = expected_cursor = page.next_cursor
+
+@pytest.mark.parametrize("search", SEARCHES)
+def test_search_matches_sql(engine, search):
+    assert_pages_match(engine, ProductCatalog(engine).reload(), search)
+
+def test_catalog_reloads_on_change(engine):
+    products = ProductCatalog(engine, refresh_seconds=0)
+    assert products.current().search(name="Product 7", limit=1)[0]["price"] != 1.5
+
+    with engine.begin() as conn:
+        conn.execute(update(models.Product).where(models.Product.id == 7).values(price=1.5))
+    assert products.current().search(name="Product 7", limit=1)[0]["price"] == 1.5
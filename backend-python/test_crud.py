@@ -1,35 +1,24 @@
-from app.database import SessionLocal
-from app import crud
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
-def test_crud_operations():
-    """Test CRUD operations"""
-    db = SessionLocal()
-    try:
-        # Test database stats
-        stats = crud.get_database_stats(db)
-        print("Database Stats:", stats)
-        
-        # Test user search
-        users = crud.search_users(db, first_name="John", limit=5)
-        print(f"Found {len(users)} users with first name containing John")
-        
-        if len(users) > 0:
-            print("Sample user:", users[0].first_name, users[0].last_name, users[0].email)
-        
-        # Test order operations
-        if len(users) > 0:
-            user_orders = crud.get_user_orders(db, users[0].id, limit=3)
-            print(f"User {users[0].id} has {len(user_orders)} orders")
-        
-        print("? All CRUD functions loaded successfully!")
-        return True
-        
-    except Exception as e:
-        print(f"? Error: {e}")
-        return False
-    finally:
-        db.close()
+from app import crud, models
 
-if __name__ == "__main__":
-    test_crud_operations()
+def test_database_stats_come_from_the_maintained_counts(engine):
+    with Session(engine) as db:
+        assert crud.get_database_stats(db) == {
+            "users_count": 30, "orders_count": 400, "products_count": 20,
+            "order_items_count": db.scalar(select(func.count()).select_from(models.OrderItem)),
+            "distribution_centers_count": db.scalar(select(func.count()).select_from(models.DistributionCenter)),
+        }
 
+def test_user_search_and_orders(engine):
+    with Session(engine) as db:
+        user = db.get(models.User, 7)
+        users = crud.search_users(db, first_name=user.first_name, limit=5)
+        assert user.id in [found.id for found in users]
+        assert all(user.first_name.lower() in found.first_name.lower() for found in users)
+
+        orders = crud.get_user_orders(db, user.id, limit=3)
+        assert orders and all(order.user_id == user.id for order in orders)
+        keys = [(order.order_date, order.id) for order in orders]
+        assert keys == sorted(keys, reverse=True)
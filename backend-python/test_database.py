@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+import main
+from app import database, models
+
+def request(method):
+    return Request({"type": "http", "method": method, "path": "/", "headers": []})
+
+def session_engine(dependency, method):
+    sessions = dependency(request(method))
+    db = next(sessions)
+    engine = db.get_bind()
+    sessions.close()
+    return engine
+
+@pytest.mark.parametrize("method", ["GET", "HEAD"])
+def test_reads_use_the_read_engine(method):
+    assert session_engine(main.get_db, method) is database.read_engine
+    assert session_engine(main.get_cache_render_db, method) is database.read_engine
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_writes_use_the_primary(method):
+    assert session_engine(main.get_db, method) is database.engine
+
+def test_cached_renders_use_the_primary_when_a_replica_is_configured(monkeypatch):
+    monkeypatch.setattr(main, "CACHE_RENDERS_ON_PRIMARY", True)
+    assert session_engine(main.get_cache_render_db, "GET") is database.engine
+    assert session_engine(main.get_db, "GET") is database.read_engine
+
+def test_read_engine_rejects_writes(engine):
+    read_engine = database.make_engine(str(engine.url), read_only=True)
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM users").scalar() == 30
+        with pytest.raises(OperationalError, match="readonly"):
+            conn.execute(insert(models.DistributionCenter).values(id=999, name="Read only"))
+    read_engine.dispose()
+
+def journal_mode(path):
+    engine = database.make_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    engine.dispose()
+    return mode
+
+def test_the_shipped_database_keeps_its_rollback_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "SHIPPED_DATABASE", str(tmp_path / "ecommerce.db"))
+    assert journal_mode(tmp_path / "ecommerce.db") == "delete"
+    assert journal_mode(tmp_path / "other.db") == "wal"
+
+    monkeypatch.setattr(database, "SQLITE_JOURNAL_MODE", "WAL")
+    assert journal_mode(tmp_path / "ecommerce.db") == "wal"
@@ -0,0 +1,164 @@
+import csv
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app import delta, models, rollups
+
+def write_csv(path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def read_csv(path):
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    return rows[0], rows[1:]
+
+@pytest.mark.dataset(users=20, products=20, orders=100)
+def test_delta_batches_upsert_new_and_changed_rows(engine, tmp_path):
+
+    # A cumulative orders export: every existing row, order 5 moved to another user and status, two new orders
+    header, orders = read_csv(tmp_path / "data" / "orders.csv")
+    old_user = int(orders[4][1])
+    orders[4][1], orders[4][3] = str(old_user % 20 + 1), "refunded"
+    orders += [["101", "3", "ORD-DELTA-101", "pending", "20.0", "2030-01-01T00:00:00"],
+               ["102", "4", "ORD-DELTA-102", "shipped", "30.0", "2030-01-02T00:00:00"]]
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "orders.csv", header, orders)
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "order_items.csv", ["id", "order_id", "product_id", "quantity", "price"],
+              [[1001, 101, 1, 2, 10.0], [1002, 102, 2, 1, 30.0]])
+
+    assert delta.pending_batches(engine, str(tmp_path / "deltas")) == ["2030-01-02"]
+    [result] = delta.apply_pending(engine, str(tmp_path / "deltas"))
+    stats = {stats.table: stats for stats in result.tables}
+    assert (stats["orders"].inserted, stats["orders"].updated, stats["orders"].unchanged) == (2, 1, 99)
+    assert stats["order_items"].inserted == 2
+    assert {(5, old_user), (5, old_user % 20 + 1), (101, 3), (101, None)} <= result.changed_orders
+
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.Order)).scalar() == 102
+        assert conn.execute(select(models.Order.status).where(models.Order.id == 5)).scalar() == "refunded"
+        assert conn.execute(select(models.Order.distribution_center_id).where(models.Order.id == 101)).scalar()
+        watermarks = dict(conn.execute(select(models.IngestWatermark.table_name, models.IngestWatermark.high_water_id)).all())
+        assert watermarks == {"orders": 102, "order_items": 1002}
+        # The rollup triggers followed the upserts
+        assert rollups.verify(conn) == []
+
+    assert delta.pending_batches(engine, str(tmp_path / "deltas")) == []
+
+@pytest.mark.dataset(users=20, products=20, orders=100)
+def test_z_suffixed_timestamps_compare_equal_to_stored_ones(engine, tmp_path):
+    header, orders = read_csv(tmp_path / "data" / "orders.csv")
+    for row in orders:
+        row[5] += "Z"
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "orders.csv", header, orders)
+
+    [result] = delta.apply_pending(engine, str(tmp_path / "deltas"))
+    [stats] = result.tables
+    assert (stats.inserted, stats.updated, stats.unchanged) == (0, 0, 100)
+    assert result.changed_orders == set()
+
+@pytest.mark.dataset(users=20, products=20, orders=100)
+def test_rows_written_outside_deltas_raise_the_watermark(engine, tmp_path):
+    with engine.begin() as conn:
+        delta.set_watermark(conn, models.Order.__table__, 100)
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 500, "user_id": 1, "order_number": "ORD-500", "status": "pending", "total_amount": 5.0,
+            "order_date": datetime(2030, 1, 1),
+        }])
+    with engine.connect() as conn:
+        assert delta.get_watermark(conn, models.Order.__table__) == 500
+
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "orders.csv",
+              ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+              [[500, 2, "ORD-500", "pending", 5.0, "2030-01-01T00:00:00"]])
+    [result] = delta.apply_pending(engine, str(tmp_path / "deltas"))
+    assert (result.tables[0].inserted, result.tables[0].updated) == (0, 1)
+    assert {(500, 1), (500, 2)} <= result.changed_orders
+
+@pytest.mark.dataset(users=20, products=20, orders=100)
+def test_a_batch_with_a_bad_file_rolls_back_and_stays_pending(engine, tmp_path):
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "orders.csv",
+              ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+              [[101, 3, "ORD-DELTA-101", "pending", 20.0, "2030-01-01T00:00:00"]])
+    (tmp_path / "deltas" / "2030-01-02" / "order_items.csv").write_text("")
+
+    with pytest.raises(delta.DeltaBatchError, match="order_items.csv") as error:
+        delta.apply_pending(engine, str(tmp_path / "deltas"))
+    assert error.value.applied == []
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.Order)).scalar() == 100
+        assert conn.execute(select(func.count()).select_from(models.IngestWatermark)).scalar() == 0
+    assert delta.pending_batches(engine, str(tmp_path / "deltas")) == ["2030-01-02"]
+
+@pytest.mark.dataset(users=20, products=20, orders=100)
+def test_any_failure_is_a_batch_error_carrying_the_applied_batches(engine, tmp_path, monkeypatch):
+    for name in ("2030-01-01", "2030-01-02"):
+        write_csv(tmp_path / "deltas" / name / "orders.csv",
+                  ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+                  [[101, 3, "ORD-DELTA-101", name, 20.0, "2030-01-01T00:00:00"]])
+    apply_batch = delta.apply_batch
+
+    def failing_second_batch(engine, batch_dir, chunk_size):
+        if batch_dir.endswith("2030-01-02"):
+            raise RuntimeError("disk I/O error")
+        return apply_batch(engine, batch_dir, chunk_size)
+
+    monkeypatch.setattr(delta, "apply_batch", failing_second_batch)
+    with pytest.raises(delta.DeltaBatchError, match="2030-01-02: disk I/O error") as error:
+        delta.apply_pending(engine, str(tmp_path / "deltas"))
+    assert [result.name for result in error.value.applied] == ["2030-01-01"]
+    assert isinstance(error.value.__cause__, RuntimeError)
+
+def test_the_watcher_refreshes_for_batches_applied_by_another_process(engine, tmp_path, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(delta, "refresh_everything", lambda: refreshed.append(1))
+    watcher = delta.BatchWatcher(engine, check_seconds=0)
+    write_csv(tmp_path / "deltas" / "2030-01-01" / "orders.csv",
+              ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+              [[500, 1, "ORD-500", "pending", 5.0, "2030-01-01T00:00:00"]])
+
+    # Batches applied before the first check are already reflected in this process
+    delta.apply_pending(engine, str(tmp_path / "deltas"))
+    assert watcher.check_due() and not watcher.check()
+
+    write_csv(tmp_path / "deltas" / "2030-01-02" / "orders.csv",
+              ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+              [[501, 1, "ORD-501", "pending", 5.0, "2030-01-01T00:00:00"]])
+    assert delta.main([str(tmp_path / "deltas")], engine=engine) == 0
+    assert watcher.check() and refreshed == [1] and watcher.external == 1
+    assert not watcher.check()
+
+    # Batches this process applied and refreshed for itself need no full refresh
+    write_csv(tmp_path / "deltas" / "2030-01-03" / "orders.csv",
+              ["id", "user_id", "order_number", "status", "total_amount", "order_date"],
+              [[502, 1, "ORD-502", "pending", 5.0, "2030-01-01T00:00:00"]])
+    watcher.record(delta.apply_pending(engine, str(tmp_path / "deltas")))
+    assert not watcher.check() and refreshed == [1]
+
+def test_the_ingest_endpoint_is_opt_in_and_refreshes_committed_batches_on_failure(engine, monkeypatch):
+    import main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, "batch_watcher", delta.BatchWatcher(engine))
+    client = TestClient(main.app)
+    assert client.post("/api/ingest/deltas").status_code == 403
+
+    committed = delta.BatchResult("2030-01-01")
+    refreshed = []
+
+    def apply_pending(engine):
+        try:
+            raise RuntimeError("disk I/O error")
+        except RuntimeError as error:
+            raise delta.DeltaBatchError("2030-01-02", str(error), [committed]) from error
+
+    monkeypatch.setattr(main, "DELTA_INGEST_ENDPOINT", True)
+    monkeypatch.setattr(delta, "apply_pending", apply_pending)
+    monkeypatch.setattr(delta, "refresh_downstream", refreshed.append)
+    response = client.post("/api/ingest/deltas")
+    assert response.status_code == 500 and "disk I/O error" in response.json()["detail"]
+    assert refreshed == [[committed]]
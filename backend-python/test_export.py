@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+import main
+from app import delta, models
+
+pytestmark = pytest.mark.dataset(users=20, products=10, orders=150)
+
+@pytest.fixture()
+def client(engine, monkeypatch):
+    with engine.begin() as conn:
+        # NULLs in integer, float and text columns
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 1000, "user_id": 1, "distribution_center_id": None, "order_number": "ORD-NULLS",
+            "status": None, "total_amount": None, "order_date": datetime(2024, 2, 3, 4, 5, 6),
+        }])
+        conn.execute(models.OrderItem.__table__.insert(), [
+            {"id": 9000, "order_id": 1000, "product_id": None, "quantity": 2, "price": None},
+        ])
+    monkeypatch.setattr(main, "read_engine", engine)
+    monkeypatch.setattr(main, "batch_watcher", delta.BatchWatcher(engine))
+    return TestClient(main.app)
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+def test_ndjson_exports_every_row_with_nulls_and_iso_datetimes(engine, client):
+    response = client.get("/api/export/orders")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == count(engine, models.Order)
+    assert {"id": 1000, "order_number": "ORD-NULLS", "user_id": 1, "distribution_center_id": None,
+            "status": None, "total_amount": None, "order_date": "2024-02-03T04:05:06"} in rows
+
+    items = [json.loads(line) for line in client.get("/api/export/order-items").text.splitlines()]
+    assert len(items) == count(engine, models.OrderItem)
+    assert {"id": 9000, "order_id": 1000, "product_id": None, "quantity": 2, "price": None} in items
+
+def test_csv_exports_a_header_row_and_empty_fields_for_nulls(engine, client):
+    response = client.get("/api/export/orders", params={"format": "csv"})
+    assert response.headers["content-disposition"] == 'attachment; filename="orders.csv"'
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == ["id", "order_number", "user_id", "distribution_center_id", "status", "total_amount", "order_date"]
+    assert len(rows) == count(engine, models.Order)
+    assert ["1000", "ORD-NULLS", "1", "", "", "", "2024-02-03T04:05:06"] in rows
+
+    response = client.get("/api/export/order-items", params={"format": "csv", "user_id": 1})
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header == ["id", "order_id", "product_id", "quantity", "price"]
+    with engine.connect() as conn:
+        expected = conn.execute(select(func.count()).select_from(models.OrderItem)
+                                .join(models.Order, models.Order.id == models.OrderItem.order_id)
+                                .where(models.Order.user_id == 1)).scalar()
+    assert len(rows) == expected
+    assert ["9000", "1000", "", "2", ""] in rows
+
+def test_empty_filter_values_still_filter(engine, client):
+    with engine.begin() as conn:
+        conn.execute(models.Order.__table__.update().where(models.Order.id == 1000).values(status=""))
+    rows = [json.loads(line) for line in client.get("/api/export/orders", params={"status": ""}).text.splitlines()]
+    assert [row["id"] for row in rows] == [1000]
+    assert client.get("/api/export/orders", params={"user_id": 0}).text == ""
+
+def test_unknown_format_is_rejected(client):
+    assert client.get("/api/export/orders", params={"format": "xml"}).status_code == 422
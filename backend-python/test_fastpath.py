@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud, fastpath, models, schemas
+
+pytestmark = pytest.mark.dataset(users=20, products=20, orders=200)
+
+@pytest.fixture(scope="module")
+def engine(module_engine):
+    with module_engine.begin() as conn:
+        # No distribution center, and an integer price in a float column
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 1000, "user_id": 1, "distribution_center_id": None, "order_number": "ORD-NULL-DC",
+            "status": "pending", "total_amount": 12, "order_date": datetime(2030, 1, 1),
+        }])
+        conn.execute(models.OrderItem.__table__.insert(), [
+            {"id": 9000, "order_id": 1000, "product_id": 3, "quantity": 1, "price": 12},
+        ])
+    return module_engine
+
+@pytest.mark.parametrize("user_id", [1, 2, 3])
+def test_user_orders_match_schema_output(engine, user_id):
+    with Session(engine) as db:
+        page = crud.get_user_orders_page(db, user_id, limit=5)
+        expected = schemas.OrderPage(results=page.items, next_cursor=page.next_cursor).model_dump_json().encode()
+        fast = crud.get_user_orders_page_rows(db, user_id, limit=5)
+        assert fastpath.dumps({"results": fast.items, "next_cursor": fast.next_cursor}) == expected
+
+        page = crud.get_user_orders_page(db, user_id, limit=5, cursor=page.next_cursor)
+        expected = schemas.OrderPage(results=page.items, next_cursor=page.next_cursor).model_dump_json().encode()
+        fast = crud.get_user_orders_page_rows(db, user_id, limit=5, cursor=fast.next_cursor)
+        assert fastpath.dumps({"results": fast.items, "next_cursor": fast.next_cursor}) == expected
+
+@pytest.mark.parametrize("order_id", [1, 2, 1000])
+def test_order_items_match_schema_output(engine, order_id):
+    with Session(engine) as db:
+        items = crud.get_order_items(db, order_id)
+        expected = schemas.OrderItemList.dump_json(schemas.OrderItemList.validate_python(items))
+        assert fastpath.dumps(crud.get_order_items_rows(db, order_id)) == expected
+
+def test_projection_reads_only_requested_columns_and_joins(engine):
+    shape = fastpath.sparse(fastpath.ORDER, "id,status")
+    sql = str(shape.select())
+    assert "distribution_centers" not in sql and "total_amount" not in sql
+
+    with Session(engine) as db:
+        full = crud.get_user_orders_page_rows(db, 1, limit=3)
+        page = crud.get_user_orders_page_rows(db, 1, limit=3, shape=shape)
+        assert page.items == [{"status": order["status"], "id": order["id"]} for order in full.items]
+        assert page.next_cursor == full.next_cursor
+
+        items = crud.get_order_items_rows(db, 1, fastpath.sparse(fastpath.ORDER_ITEM, "quantity,product.name"))
+        assert all(set(item) == {"quantity", "product"} and set(item["product"]) == {"name"} for item in items)
+
+def test_projected_relationship_keeps_join_miss_detection(engine):
+    # Order 1000 has no distribution center; a projection without the key still reports None
+    shape = fastpath.sparse(fastpath.ORDER_DETAIL, "status,distribution_center.name", "summary")
+    with Session(engine) as db:
+        detail = crud.get_order_detail_rows(db, 1000, shape)
+    assert detail == {"status": "pending", "distribution_center": None,
+                      "summary": {"total_items": 1, "total_amount": 12.0, "item_count": 1}}
+
+def test_projection_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        fastpath.sparse(fastpath.ORDER, "id,description")
+    with pytest.raises(ValueError):
+        fastpath.sparse(fastpath.ORDER_ITEM, None, "order")
+    assert fastpath.sparse(fastpath.ORDER) is fastpath.ORDER
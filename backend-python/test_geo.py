@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app import geo, models
+
+def brute_force_nearest(index, lat, lon, k):
+    distances = geo.haversine_km(lat[:, None], lon[:, None], index.latitudes[None, :], index.longitudes[None, :])
+    return np.sort(distances, axis=1)[:, :k]
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(1)
+    index = geo.CenterIndex(
+        ids=np.arange(1, 501), names=[f"DC {i}" for i in range(1, 501)],
+        latitudes=rng.uniform(-80, 80, 500), longitudes=rng.uniform(-180, 180, 500),
+    )
+    lat, lon = rng.uniform(-90, 90, 2000), rng.uniform(-180, 180, 2000)
+    positions, distances = index.nearest(lat, lon, k=3)
+    np.testing.assert_allclose(distances, brute_force_nearest(index, lat, lon, 3), rtol=1e-9)
+    np.testing.assert_allclose(distances, geo.haversine_km(lat[:, None], lon[:, None],
+                                                           index.latitudes[positions], index.longitudes[positions]))
+
+    positions, distances = index.nearest([np.nan, 10.0], [0.0, 10.0])
+    assert positions[0, 0] == -1 and np.isnan(distances[0, 0]) and positions[1, 0] >= 0
+
+@pytest.mark.dataset(users=40, products=10, orders=200)
+def test_ingest_assigns_nearest_center(engine):
+    with engine.connect() as conn:
+        index = geo.load_center_index(conn)
+        rows = conn.execute(
+            select(models.Order.distribution_center_id, models.User.city)
+            .join(models.User, models.Order.user_id == models.User.id)
+        ).all()
+
+    assert len(index) == 4 and rows
+    for center_id, city in rows:
+        lat, lon = geo.CITY_COORDINATES[city]
+        assert center_id == index.nearest_ids(lat, lon)[0]
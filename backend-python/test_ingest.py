@@ -0,0 +1,88 @@
+import csv
+import logging
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app import ingest, migrate, models
+from benchmarks.common import write_sample_csvs
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def csv_rows(path) -> int:
+    with open(path, newline="") as file:
+        return sum(1 for _ in csv.reader(file)) - 1
+
+def count(engine, model) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+@pytest.fixture()
+def empty_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    migrate.upgrade_database(engine)
+    yield engine
+    engine.dispose()
+
+def test_chunked_load_matches_the_csv_row_counts(empty_engine, tmp_path, caplog):
+    write_sample_csvs(str(tmp_path / "data"), users=25, products=12, orders=60)
+    with caplog.at_level(logging.INFO, logger="app.ingest"):
+        # A chunk size that doesn't divide any table leaves a short last chunk
+        results = ingest.ingest_csv_directory(empty_engine, str(tmp_path / "data"), chunk_size=7)
+        ingest.log_stats(results)
+
+    for stats in results:
+        spec = ingest.TABLE_SPECS[stats.table]
+        assert stats.rows == csv_rows(tmp_path / "data" / spec.filename)
+        with empty_engine.connect() as conn:
+            assert conn.execute(select(func.count()).select_from(spec.table)).scalar() == stats.rows
+    assert "order_items: 180 rows in" in caplog.text and "rows/sec" in caplog.text
+
+def test_values_are_converted_and_missing_fields_defaulted(empty_engine, tmp_path):
+    write_csv(tmp_path / "users.csv", ["id", "first_name", "email", "latitude", "longitude"],
+              [[1, "Ann", "ann@example.com", "", ""], [2, "Bo", "", "35.5", "-90.25"]])
+    write_csv(tmp_path / "orders.csv", ["id", "user_id", "order_number", "total_amount", "order_date"],
+              [[10, 1, "ORD-10", "12.5", "2024-02-03T04:05:06"]])
+    ingest.load_table(empty_engine, ingest.TABLE_SPECS["users"], str(tmp_path / "users.csv"), chunk_size=1)
+    ingest.load_table(empty_engine, ingest.TABLE_SPECS["orders"], str(tmp_path / "orders.csv"))
+
+    with empty_engine.connect() as conn:
+        users = conn.execute(select(models.User).order_by(models.User.id)).all()
+        order = conn.execute(select(models.Order)).one()
+    # Empty coordinates stay NULL; columns the export lacks take the spec's defaults
+    assert (users[0].latitude, users[0].longitude, users[0].last_name, users[0].country) == (None, None, "", "USA")
+    assert (users[1].latitude, users[1].longitude, users[1].email) == (35.5, -90.25, "")
+    assert (order.user_id, order.total_amount, order.status) == (1, 12.5, "pending")
+    assert order.order_date == datetime(2024, 2, 3, 4, 5, 6)
+
+def test_empty_and_incomplete_files_load_nothing(empty_engine, tmp_path, caplog):
+    (tmp_path / "products.csv").write_text("")
+    write_csv(tmp_path / "distribution_centers.csv", ["id", "name"], [[1, "Memphis TN"]])
+    write_csv(tmp_path / "orders.csv", ["id", "user_id", "order_number"], [])
+
+    assert ingest.load_table(empty_engine, ingest.TABLE_SPECS["products"], str(tmp_path / "products.csv")).rows == 0
+    assert ingest.load_table(empty_engine, ingest.TABLE_SPECS["orders"], str(tmp_path / "orders.csv")).rows == 0
+    with caplog.at_level(logging.WARNING, logger="app.ingest"):
+        centers = ingest.load_table(empty_engine, ingest.TABLE_SPECS["distribution_centers"],
+                                    str(tmp_path / "distribution_centers.csv"))
+        missing = ingest.load_table(empty_engine, ingest.TABLE_SPECS["users"], str(tmp_path / "users.csv"))
+    assert centers.rows == missing.rows == 0
+    assert "Missing required columns in distribution_centers.csv" in caplog.text
+    assert "File not found" in caplog.text
+    assert count(empty_engine, models.DistributionCenter) == 0
+
+def test_rerunning_over_loaded_data_fails_without_duplicating_rows(empty_engine, tmp_path):
+    write_sample_csvs(str(tmp_path / "data"), users=10, products=5, orders=20)
+    ingest.ingest_csv_directory(empty_engine, str(tmp_path / "data"))
+    loaded = {model: count(empty_engine, model) for model in (models.User, models.Product, models.Order)}
+
+    # Loads only insert; a rerun belongs on an empty database (deltas handle existing data)
+    with pytest.raises(IntegrityError):
+        ingest.ingest_csv_directory(empty_engine, str(tmp_path / "data"))
+    assert {model: count(empty_engine, model) for model in loaded} == loaded
@@ -0,0 +1,57 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import crud, metrics, models
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/x")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/x"} 4' in lines
+
+def test_engine_queries_are_attributed_to_the_current_request():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    stats = metrics.RequestStats({})
+    token = metrics.current_request.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        metrics.current_request.reset(token)
+
+    assert stats.queries == 2
+    assert stats.sql_seconds > 0
+    assert stats.route == "unmatched"
+
+def test_fastpath_core_rows_are_counted_like_orm_objects(engine):
+    stats = metrics.RequestStats({})
+    token = metrics.current_request.set(stats)
+    try:
+        with Session(engine) as db:
+            items = crud.get_order_items_rows(db, 1)
+            detail = crud.get_order_detail_rows(db, 1)
+            db.get(models.User, 1)
+    finally:
+        metrics.current_request.reset(token)
+
+    assert items and detail
+    # Items, the detail row and its embedded items, then one ORM user
+    assert stats.rows == len(items) + 1 + len(detail["order_items"]) + 1
+
+def serializations(route):
+    return sum(sum(counts) for labels, (counts, _) in metrics.SERIALIZATION_DURATION._values.items()
+               if dict(labels).get("route") == route)
+
+def test_response_model_routes_report_serialization(api):
+    before = {route: serializations(route) for route in ("/api/users/top", "/api/orders/{order_id:int}")}
+    assert api.get("/api/users/top").status_code == 200
+    assert api.get("/api/orders/3").status_code == 200
+    assert serializations("/api/users/top") == before["/api/users/top"] + 1
+    assert serializations("/api/orders/{order_id:int}") == before["/api/orders/{order_id:int}"] + 1
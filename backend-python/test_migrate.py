@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app import migrate, models
+
+@pytest.fixture()
+def blank_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    yield engine
+    engine.dispose()
+
+def test_unversioned_initial_schema_is_stamped_and_upgraded(blank_engine):
+    migrate.upgrade_database(blank_engine, migrate.INITIAL_REVISION)
+    with blank_engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE alembic_version")
+        assert migrate.schema_differences(conn) == []
+
+    migrate.upgrade_database(blank_engine)
+    assert migrate.current_revision(blank_engine) == migrate.head_revision()
+
+def test_unversioned_schema_from_current_models_is_refused(blank_engine):
+    models.Base.metadata.create_all(bind=blank_engine)
+    with pytest.raises(RuntimeError, match="not 0001_initial_schema"):
+        migrate.upgrade_database(blank_engine)
+    assert "alembic_version" not in inspect(blank_engine).get_table_names()
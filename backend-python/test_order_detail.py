@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+
+pytestmark = pytest.mark.dataset(users=10, products=10, orders=50)
+
+def totals(engine, order_id):
+    item = models.OrderItem
+    with engine.connect() as conn:
+        quantity, amount, count = conn.execute(
+            select(func.sum(item.quantity), func.sum(item.quantity * item.price), func.count())
+            .where(item.order_id == order_id)).one()
+    return {"total_items": quantity or 0, "total_amount": round(amount or 0, 2), "item_count": count}
+
+@pytest.mark.parametrize("url", ["/api/orders/99999", "/api/orders/99999?fields=id,status",
+                                 "/api/orders/99999?include=summary,order_items"])
+def test_unknown_orders_are_404s(api, url):
+    response = api.get(url)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Order not found"
+
+def test_unknown_order_items_are_404s(api):
+    assert api.get("/api/orders/99999/items").json()["detail"] == "No items found for this order"
+
+def test_detail_embeds_the_order_its_items_and_their_totals(api, engine):
+    detail = api.get("/api/orders/12").json()
+    assert detail["id"] == 12 and detail["user"]["id"] == detail["user_id"]
+    assert detail["summary"] == totals(engine, 12)
+    assert detail["summary"]["item_count"] == len(detail["order_items"])
+    assert detail["summary"]["total_items"] == sum(item["quantity"] for item in detail["order_items"])
+    assert sorted(item["id"] for item in detail["order_items"]) == sorted(
+        item["id"] for item in api.get("/api/orders/12/items").json())
+
+def test_sparse_detail_agrees_with_the_full_one(api):
+    full = api.get("/api/orders/12").json()
+    sparse = api.get("/api/orders/12?fields=id,total_amount,summary&include=summary").json()
+    assert sparse == {"id": 12, "total_amount": full["total_amount"], "summary": full["summary"]}
+
+def test_an_order_without_items_has_zero_totals(api, engine):
+    with engine.begin() as conn:
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 5000, "user_id": 1, "distribution_center_id": None, "order_number": "ORD-EMPTY",
+            "status": "pending", "total_amount": 0.0, "order_date": datetime(2024, 3, 5),
+        }])
+    detail = api.get("/api/orders/5000").json()
+    assert detail["order_items"] == []
+    assert detail["summary"] == {"total_items": 0, "total_amount": 0.0, "item_count": 0}
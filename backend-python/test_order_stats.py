@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import crud, models, partitions, rollups
+
+def test_triggers_keep_daily_stats_in_line_with_orders(engine):
+    with engine.begin() as conn:
+        assert rollups.verify(conn) == []
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 5000, "user_id": 1, "distribution_center_id": None, "order_number": "ORD-NEW",
+            "status": "pending", "total_amount": 10.0, "order_date": datetime(2024, 3, 5, 12),
+        }])
+        conn.execute(update(models.Order).where(models.Order.id == 7)
+                     .values(status="cancelled", order_date=datetime(2023, 12, 31)))
+        conn.execute(delete(models.Order).where(models.Order.id == 8))
+        assert rollups.verify(conn) == []
+
+    with Session(engine) as db:
+        by_day = crud.get_order_stats(db, date(2024, 3, 5), date(2024, 3, 6), ("day", "distribution_center"))
+        assert {"day": date(2024, 3, 5), "distribution_center_id": None, "orders": 1, "order_total": 10.0} in by_day
+
+def test_grouped_stats_match_the_orders_table(engine):
+    start, end = date(2024, 2, 10), date(2024, 5, 1)
+    with Session(engine) as db:
+        stats = crud.get_order_stats(db, start, end, ("month", "status"))
+        month = func.date(models.Order.order_date, "start of month")
+        expected = db.execute(
+            select(month, models.Order.status, func.count(), func.sum(models.Order.total_amount))
+            .where(models.Order.order_date >= start, models.Order.order_date < end)
+            .group_by(month, models.Order.status).order_by(month, models.Order.status)).all()
+
+    assert [(row["month"].isoformat(), row["status"], row["orders"]) for row in stats] == \
+        [(row[0], row[1], row[2]) for row in expected]
+    assert all(abs(row["order_total"] - want[3]) < 0.01 for row, want in zip(stats, expected))
+    assert stats[0]["month"] == date(2024, 2, 1)
+
+def test_month_ranges():
+    assert partitions.month_ranges(date(2024, 11, 15), date(2025, 2, 1)) == [
+        (date(2024, 11, 1), date(2024, 12, 1)), (date(2024, 12, 1), date(2025, 1, 1)),
+        (date(2025, 1, 1), date(2025, 2, 1))]
+
+def test_orders_in_a_date_range_page_newest_first(engine):
+    start, end = datetime(2024, 3, 1), datetime(2024, 5, 1)
+    with Session(engine) as db:
+        expected = db.execute(select(models.Order.id).where(models.Order.order_date >= start, models.Order.order_date < end)
+                              .order_by(models.Order.order_date.desc(), models.Order.id.desc())).scalars().all()
+        seen, cursor = [], None
+        while True:
+            page = crud.get_orders_page_rows(db, start=start, end=end, limit=7, cursor=cursor)
+            seen += [order["id"] for order in page.items]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert seen == expected and expected
+
+        shipped = crud.get_orders_page_rows(db, start=start, end=end, status="shipped", limit=500).items
+        assert {order["status"] for order in shipped} == {"shipped"}
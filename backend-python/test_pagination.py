@@ -0,0 +1,57 @@
+import base64
+import json
+
+import pytest
+
+from app import pagination
+
+pytestmark = pytest.mark.dataset(users=20, products=30, orders=300)
+
+def follow(api, url):
+    """Every page of a listing, following next_cursor until it is null"""
+    pages, cursor = [], None
+    while True:
+        response = api.get(url, params={"cursor": cursor} if cursor else None)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append(body["results"])
+        if body["next_cursor"] is None:
+            return pages
+        cursor = body["next_cursor"]
+
+@pytest.mark.parametrize("url, everything", [
+    ("/api/users/3/orders?limit=4", "/api/users/3/orders?limit=500"),
+    ("/api/orders?limit=25", "/api/orders?limit=500"),
+    ("/api/users/search?email=user&limit=3", "/api/users/search?email=user&limit=500"),
+    ("/api/users/search?email=us&limit=3", "/api/users/search?email=us&limit=500"),
+    ("/api/products/search?limit=7", "/api/products/search?limit=500"),
+])
+def test_cursors_walk_every_row_once_in_order(api, url, everything):
+    pages = follow(api, url)
+    expected = api.get(everything).json()
+    assert expected["next_cursor"] is None
+    assert [row["id"] for page in pages for row in page] == [row["id"] for row in expected["results"]]
+    limit = int(url.rsplit("limit=", 1)[1])
+    assert all(len(page) == limit for page in pages[:-1]) and 0 < len(pages[-1]) <= limit
+
+def test_a_page_that_ends_exactly_at_the_last_row_has_no_cursor(api):
+    total = len(api.get("/api/users/3/orders?limit=500").json()["results"])
+    assert api.get(f"/api/users/3/orders?limit={total}").json()["next_cursor"] is None
+    assert api.get(f"/api/users/3/orders?limit={total - 1}").json()["next_cursor"] is not None
+
+def tampered(cursor: str) -> str:
+    payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    payload[-1] = "not an id"
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+@pytest.mark.parametrize("url", [
+    "/api/users/3/orders?limit=2", "/api/orders?limit=2", "/api/users/search?email=user&limit=2",
+    "/api/users/search?email=us&limit=2", "/api/products/search?limit=2",
+])
+def test_invalid_and_tampered_cursors_are_400s(api, url):
+    cursor = api.get(url).json()["next_cursor"]
+    other_kind = pagination.encode_cursor("something else", [1])
+    for bad in ("garbage", "!!!", tampered(cursor), other_kind, cursor[:-4]):
+        response = api.get(url, params={"cursor": bad})
+        assert response.status_code == 400, (bad, response.text)
+        assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,112 @@
+import inspect
+import re
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import crud, models
+
+# Every crud function and a representative call
+CRUD_CALLS = {
+    "get_user_by_id": lambda db: crud.get_user_by_id(db, 1),
+    "get_user_by_email": lambda db: crud.get_user_by_email(db, "user1@example.com"),
+    "search_users": lambda db: crud.search_users(db, last_name="ast1", limit=10),
+    "search_users_page": lambda db: crud.search_users_page(db, email="user2", limit=10),
+    "search_users_scan": lambda db: crud.search_users_scan(db, city="Bo", limit=10),
+    "get_users_count": lambda db: crud.get_users_count(db),
+    "get_user_orders": lambda db: crud.get_user_orders(db, 1),
+    "get_user_orders_page": lambda db: crud.get_user_orders_page(db, 1, limit=2, cursor=crud.pagination.encode_cursor("orders", (datetime(2024, 6, 1), 10))),
+    "get_user_orders_page_rows": lambda db: crud.get_user_orders_page_rows(db, 1, limit=2, cursor=crud.pagination.encode_cursor("orders", (datetime(2024, 6, 1), 10))),
+    "get_orders_for_users": lambda db: crud.get_orders_for_users(db, [1, 2, 3], limit_per_user=5),
+    "get_order_by_id": lambda db: crud.get_order_by_id(db, 1),
+    "get_orders_by_status": lambda db: crud.get_orders_by_status(db, "shipped", start=datetime(2024, 3, 1), end=datetime(2024, 4, 1)),
+    "get_orders_page_rows": lambda db: crud.get_orders_page_rows(db, datetime(2024, 3, 1), datetime(2024, 4, 1), limit=5, cursor=crud.pagination.encode_cursor("orders", (datetime(2024, 3, 20), 10))),
+    "get_orders_page_rows_status": lambda db: crud.get_orders_page_rows(db, datetime(2024, 3, 1), datetime(2024, 4, 1), status="shipped", limit=5),
+    "get_order_items": lambda db: crud.get_order_items(db, 1),
+    "get_order_items_with_totals": lambda db: crud.get_order_items_with_totals(db, 1),
+    "get_order_items_rows": lambda db: crud.get_order_items_rows(db, 1),
+    "get_items_for_orders": lambda db: crud.get_items_for_orders(db, [1, 2, 3]),
+    "get_order_totals": lambda db: crud.get_order_totals(db, 1),
+    "get_order_detail": lambda db: crud.get_order_detail(db, 1),
+    "get_order_detail_rows": lambda db: crud.get_order_detail_rows(db, 1),
+    "get_product_by_id": lambda db: crud.get_product_by_id(db, 1),
+    "get_products_by_category": lambda db: crud.get_products_by_category(db, "Jeans"),
+    "search_products": lambda db: crud.search_products(db, name="Product 1", max_price=100),
+    "search_products_page": lambda db: crud.search_products_page(db, category="Tops", limit=5),
+    "get_distribution_centers": lambda db: crud.get_distribution_centers(db),
+    "get_distribution_center_by_id": lambda db: crud.get_distribution_center_by_id(db, 1),
+    "get_user_order_summary": lambda db: crud.get_user_order_summary(db, 1),
+    "get_order_stats": lambda db: crud.get_order_stats(db, date(2024, 3, 1), date(2024, 4, 1), ("month", "status", "distribution_center")),
+    "get_top_products": lambda db: crud.get_top_products(db, category="Jeans", k=5),
+    "get_top_users": lambda db: crud.get_top_users(db, k=5),
+    "get_database_stats": lambda db: crud.get_database_stats(db),
+}
+
+# Functions whose job is a listing, a count or a substring match over a small table
+ALLOWED_SCANS = {
+    "search_users_scan": {"users"},
+    "get_users_count": {"users"},
+    "get_products_by_category": {"products"},
+    "search_products": {"products"},
+    "search_products_page": {"products"},
+    "get_distribution_centers": {"distribution_centers"},
+    "get_database_stats": {"table_counts"},
+    # Walks the spend index from the top and stops at LIMIT
+    "get_top_users": {"user_order_summaries"},
+}
+
+# Relevance ordering sorts the matched rows; rollup stats regroup the days in range
+ALLOWED_SORTS = {"search_users", "search_users_page", "get_order_stats"}
+
+TABLES = set(models.Base.metadata.tables)
+# Joined eager loads alias tables as <table>_1, <table>_2, ...
+SCAN = re.compile(r"^SCAN (\w+?)(?:_\d+)?(?: |$)(?!VIRTUAL TABLE INDEX)")
+
+pytestmark = pytest.mark.dataset(users=200, products=50, orders=1000)
+
+@pytest.fixture(scope="module")
+def engine(module_engine):
+    return module_engine
+
+def query_plans(engine, call):
+    """Run a crud call and return the EXPLAIN QUERY PLAN details of every statement it issued"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as db:
+            call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+def test_every_crud_function_is_checked():
+    functions = {name for name, fn in inspect.getmembers(crud, inspect.isfunction)
+                 if fn.__module__ == crud.__name__ and not name.startswith("_")}
+    assert functions - set(CRUD_CALLS) == set()
+
+@pytest.mark.parametrize("name", sorted(CRUD_CALLS))
+def test_no_unexpected_full_scans(engine, name):
+    plans = query_plans(engine, CRUD_CALLS[name])
+    assert plans, f"{name} issued no queries"
+
+    for statement, details in plans:
+        for detail in details:
+            match = SCAN.match(detail)
+            if match and match.group(1) in TABLES:
+                assert match.group(1) in ALLOWED_SCANS.get(name, set()), \
+                    f"{name} scans {match.group(1)}:\n{statement}\n" + "\n".join(details)
+            if detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+                assert name in ALLOWED_SORTS, f"{name} sorts in a temp b-tree:\n{statement}\n" + "\n".join(details)
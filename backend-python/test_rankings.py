@@ -0,0 +1,44 @@
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app import crud, models, rollups
+
+def exact_top_products(db, category=None, k=5):
+    revenue = func.sum(models.OrderItem.quantity * models.OrderItem.price)
+    query = (select(models.OrderItem.product_id, revenue)
+             .join(models.Product, models.Product.id == models.OrderItem.product_id)
+             .group_by(models.OrderItem.product_id)
+             .order_by(revenue.desc(), models.OrderItem.product_id.desc()).limit(k))
+    if category is not None:
+        query = query.where(models.Product.category == category)
+    return [(product_id, round(total, 2)) for product_id, total in db.execute(query)]
+
+def test_triggers_keep_product_sales_in_line_with_order_items(engine):
+    with engine.begin() as conn:
+        conn.execute(models.OrderItem.__table__.insert(), [{
+            "id": 90000, "order_id": 1, "product_id": 3, "quantity": 2, "price": 12.5,
+        }])
+        conn.execute(update(models.OrderItem).where(models.OrderItem.id == 5).values(product_id=4, quantity=7))
+        conn.execute(delete(models.OrderItem).where(models.OrderItem.id == 6))
+        conn.execute(update(models.Product).where(models.Product.id == 4).values(category="Hats"))
+        assert rollups.verify(conn) == []
+
+    with Session(engine) as db:
+        assert [row["product_id"] for row in crud.get_top_products(db, category="Hats")] == [4]
+        assert crud.get_top_products(db, category="Hats")[0]["category"] == "Hats"
+
+def test_top_products_and_users_match_exact_aggregation(engine):
+    with Session(engine) as db:
+        top = crud.get_top_products(db, k=5)
+        assert [(row["product_id"], row["item_revenue"]) for row in top] == exact_top_products(db)
+        in_category = crud.get_top_products(db, category=top[0]["category"], k=3)
+        assert [(row["product_id"], row["item_revenue"]) for row in in_category] == \
+            exact_top_products(db, top[0]["category"], 3)
+
+        spent = func.sum(models.Order.total_amount)
+        expected = db.execute(select(models.Order.user_id, spent).group_by(models.Order.user_id)
+                              .order_by(spent.desc(), models.Order.user_id.desc()).limit(5)).all()
+        users = crud.get_top_users(db, k=5)
+        assert [(row["user_id"], row["order_total"]) for row in users] == \
+            [(user_id, round(total, 2)) for user_id, total in expected]
+        assert users[0]["email"] == f"user{users[0]['user_id']}@example.com"
@@ -0,0 +1,97 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from app import models, rollups
+
+pytestmark = pytest.mark.dataset(users=20, products=10, orders=150)
+
+def counts(conn):
+    return dict(conn.execute(select(models.TableCount.table_name, models.TableCount.row_count)).all())
+
+def summary(conn, user_id):
+    return conn.execute(select(models.UserOrderSummary.total_orders, models.UserOrderSummary.total_spent)
+                        .where(models.UserOrderSummary.user_id == user_id)).one_or_none()
+
+def sales(conn, product_id):
+    return conn.execute(select(models.ProductSales.items, models.ProductSales.units)
+                        .where(models.ProductSales.product_id == product_id)).one()
+
+def test_verify_reports_and_rebuild_repairs_every_rollup(engine):
+    with engine.begin() as conn:
+        assert rollups.verify(conn) == []
+        conn.execute(update(models.TableCount).where(models.TableCount.table_name == "orders").values(row_count=1))
+        conn.execute(update(models.UserOrderSummary).where(models.UserOrderSummary.user_id == 3).values(total_orders=999))
+        conn.execute(delete(models.UserOrderSummary).where(models.UserOrderSummary.user_id == 4))
+        conn.execute(update(models.OrderDailyStat).values(orders=models.OrderDailyStat.orders + 1))
+        conn.execute(delete(models.ProductSales).where(models.ProductSales.product_id == 2))
+
+        problems = rollups.verify(conn)
+        assert "table_counts[orders] = 1, expected 150" in problems
+        assert any(problem.startswith("user 3: rollup (999,") for problem in problems)
+        assert any(problem.startswith("user 4: missing rollup") for problem in problems)
+        assert any(problem.startswith("order_daily_stats(") for problem in problems)
+        assert any(problem.startswith("product_sales[2]: missing") for problem in problems)
+
+        rollups.rebuild(conn)
+        assert rollups.verify(conn) == []
+        assert counts(conn)["orders"] == 150
+
+def test_cli_exits_nonzero_until_rebuilt(engine, capsys):
+    with engine.begin() as conn:
+        conn.execute(delete(models.TableCount))
+    assert rollups.main(["verify"], engine=engine) == 1
+    assert "mismatches found" in capsys.readouterr().out
+    assert rollups.main(["rebuild"], engine=engine) == 0
+    assert rollups.main(["verify"], engine=engine) == 0
+
+def test_triggers_keep_rollups_in_line_across_order_writes(engine):
+    with engine.begin() as conn:
+        before = counts(conn)
+        orders, spent = summary(conn, 5)
+
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 5000, "user_id": 5, "distribution_center_id": None, "order_number": "ORD-NEW",
+            "status": "pending", "total_amount": 10.0, "order_date": datetime(2030, 1, 1),
+        }])
+        assert counts(conn)["orders"] == before["orders"] + 1
+        assert summary(conn, 5) == (orders + 1, pytest.approx(spent + 10.0))
+        assert rollups.verify(conn) == []
+
+        # Moving an order to another user moves it between their summaries
+        conn.execute(update(models.Order).where(models.Order.id == 5000).values(user_id=6, total_amount=25.0))
+        assert summary(conn, 5) == (orders, pytest.approx(spent))
+        assert rollups.verify(conn) == []
+
+        conn.execute(delete(models.Order).where(models.Order.id == 5000))
+        assert counts(conn) == before
+        assert rollups.verify(conn) == []
+
+def test_triggers_keep_rollups_in_line_across_item_writes(engine):
+    with engine.begin() as conn:
+        before = counts(conn)
+        items, units = sales(conn, 3)
+
+        conn.execute(models.OrderItem.__table__.insert(), [{
+            "id": 90000, "order_id": 1, "product_id": 3, "quantity": 2, "price": 12.5,
+        }])
+        assert counts(conn)["order_items"] == before["order_items"] + 1
+        assert sales(conn, 3) == (items + 1, units + 2)
+
+        conn.execute(update(models.OrderItem).where(models.OrderItem.id == 90000).values(quantity=5))
+        assert sales(conn, 3) == (items + 1, units + 5)
+        assert rollups.verify(conn) == []
+
+        conn.execute(delete(models.OrderItem).where(models.OrderItem.id == 90000))
+        assert counts(conn) == before
+        assert sales(conn, 3) == (items, units)
+        assert rollups.verify(conn) == []
+
+def test_daily_stats_follow_an_order_to_its_new_day(engine):
+    with engine.begin() as conn:
+        conn.execute(update(models.Order).where(models.Order.id == 9).values(order_date=datetime(2031, 6, 1, 8)))
+        day = conn.execute(select(func.sum(models.OrderDailyStat.orders))
+                           .where(models.OrderDailyStat.day == date(2031, 6, 1))).scalar()
+        assert day == 1
+        assert rollups.verify(conn) == []
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud, models, pagination, search
+
+def all_pages(db, limit, **terms):
+    """Every page of a search, following next_cursor to the end"""
+    pages, cursor = [], None
+    while True:
+        page = crud.search_users_page(db, limit=limit, cursor=cursor, **terms)
+        pages.append(page.items)
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+def test_indexed_search_ranks_substring_matches(module_engine):
+    with Session(module_engine) as db:
+        assert search.can_use_index(db, search.user_search_terms(email="user1"))
+        users = crud.search_users_page(db, email="user1", limit=100).items
+        assert sorted(user.id for user in users) == [1] + list(range(10, 20))
+
+        # A full-term match ranks ahead of the longer emails that merely contain it
+        ranked = search.search_users(db, {"email": "user1@"}, limit=5)
+        assert [user.id for user, _ in ranked] == [1]
+
+def test_ranked_cursor_continues_on_rank_then_id(module_engine):
+    with Session(module_engine) as db:
+        everything = crud.search_users_page(db, email="user", limit=100)
+        pages = all_pages(db, 4, email="user")
+        assert [len(items) for items in pages] == [4] * 7 + [2]
+        assert [user.id for items in pages for user in items] == [user.id for user in everything.items]
+
+        page = crud.search_users_page(db, email="user", limit=4)
+        rank, last_id = pagination.decode_cursor(page.next_cursor, "users:ranked", (float, int))
+        assert last_id == page.items[-1].id
+
+def test_short_terms_fall_back_to_an_id_ordered_scan(module_engine):
+    with Session(module_engine) as db:
+        assert not search.can_use_index(db, search.user_search_terms(last_name="t2"))
+        pages = all_pages(db, 3, last_name="t2")
+        ids = [user.id for items in pages for user in items]
+        assert ids == [2] + list(range(20, 30))
+        assert pagination.decode_cursor(crud.search_users_page(db, last_name="t2", limit=3).next_cursor,
+                                        "users", (int,)) == (21,)
+
+def test_a_cursor_only_continues_its_own_kind_of_search(module_engine):
+    with Session(module_engine) as db:
+        ranked = crud.search_users_page(db, email="user", limit=2).next_cursor
+        scanned = crud.search_users_page(db, email="us", limit=2).next_cursor
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            crud.search_users_page(db, email="us", limit=2, cursor=ranked)
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            crud.search_users_page(db, email="user", limit=2, cursor=scanned)
+
+@pytest.mark.parametrize("term", ['"Brien', "(x)*", "O'\"B", "x) OR (y", "NEAR(a"])
+def test_query_syntax_characters_match_literally(engine, term):
+    with Session(engine) as db:
+        db.add(models.User(id=500, first_name="Sean", last_name='O\'"Brien (x)* NEAR(a x) OR (y',
+                           email="sean@example.com", phone="", city="", country="USA", address=""))
+        db.commit()
+        assert [user.id for user in crud.search_users_page(db, last_name=term).items] == [500]
+        assert [user.id for user in crud.search_users_page(db, last_name=term, fuzzy=True).items][:1] == [500]
+
+def test_short_terms_with_quotes_scan_literally(engine):
+    with Session(engine) as db:
+        db.add(models.User(id=500, first_name="D'Arcy", last_name="", email="d@example.com",
+                           phone="", city="", country="USA", address=""))
+        db.commit()
+        assert [user.id for user in crud.search_users_page(db, first_name="D'").items] == [500]
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from app.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight(enabled=True)
+    calls = []
+    release = threading.Event()
+
+    def render():
+        calls.append(1)
+        release.wait(5)
+        return b"[1]"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("items", "k", render))) for _ in range(8)]
+    threads[0].start()
+    while not flight.in_flight():
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while flight.coalesced < 7:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert {result for result, _ in results} == {b"[1]"}
+    assert flight.stats()["most_coalesced"] == [{"key": "k", "coalesced": 7}]
+    assert flight.in_flight() == 0
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight(enabled=True)
+
+    async def run():
+        started = asyncio.Event()
+
+        async def fail():
+            started.set()
+            await asyncio.sleep(0.01)
+            raise LookupError("missing")
+
+        leader = asyncio.ensure_future(flight.do_async("items", "k", fail))
+        await started.wait()
+        follower = asyncio.ensure_future(flight.do_async("items", "k", fail))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    outcomes = asyncio.run(run())
+    assert all(isinstance(outcome, LookupError) for outcome in outcomes)
+    assert flight.coalesced == 1
+    assert flight.in_flight() == 0
+
+    async def ok():
+        return 1
+    assert asyncio.run(flight.do_async("items", "k", ok)) == (1, False)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app import migrate, models, rollups, snapshot
+
+pytest.importorskip("pyarrow")
+
+def table_rows(engine):
+    with engine.connect() as conn:
+        return {table.name: conn.execute(select(table).order_by(*table.primary_key.columns)).all()
+                for table in snapshot.snapshot_tables()}
+
+@pytest.mark.parametrize("fmt", sorted(snapshot.SNAPSHOT_FORMATS))
+@pytest.mark.dataset(users=30, products=20, orders=150)
+def test_snapshot_round_trip(engine, tmp_path, fmt):
+    source = engine
+    with source.begin() as conn:
+        # NULLs in integer, float and text columns
+        conn.execute(models.Order.__table__.insert(), [{
+            "id": 1000, "user_id": 1, "distribution_center_id": None, "order_number": "ORD-NULLS",
+            "status": None, "total_amount": None, "order_date": datetime(2030, 1, 1, 12, 30, 15, 250),
+        }])
+
+    snapshot.export_snapshot(source, str(tmp_path / "snapshot"), fmt, batch_size=64)
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    migrate.upgrade_database(target)
+    snapshot.import_snapshot(target, str(tmp_path / "snapshot"), batch_size=64)
+
+    assert table_rows(target) == table_rows(source)
+    with target.connect() as conn:
+        assert rollups.verify(conn) == []
+        assert conn.exec_driver_sql("SELECT count(*) FROM users_fts WHERE users_fts MATCH 'First1'").scalar() > 0
+    with pytest.raises(ValueError):
+        snapshot.import_snapshot(target, str(tmp_path / "snapshot"))
+    target.dispose()
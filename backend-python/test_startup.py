@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+
+from app import migrate, startup
+
+@pytest.fixture()
+def blank_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    yield engine
+    engine.dispose()
+
+def test_production_mode_checks_the_revision_without_migrating(blank_engine):
+    with pytest.raises(RuntimeError, match="python -m app.migrate"):
+        startup.prepare_schema(blank_engine, mode="production")
+    assert migrate.current_revision(blank_engine) is None
+
+    startup.prepare_schema(blank_engine, mode="development")
+    assert migrate.check_revision(blank_engine) == migrate.head_revision()
+    startup.prepare_schema(blank_engine, mode="production")
+
+def test_hot_paths_pick_the_busiest_users_and_newest_orders(engine):
+    with engine.connect() as conn:
+        busiest = conn.exec_driver_sql(
+            "SELECT user_id FROM orders GROUP BY user_id ORDER BY count(*) DESC LIMIT 1").scalar()
+
+    paths = startup.hot_paths(engine, top_users=3, recent_orders=2)
+    assert paths[:len(startup.WARM_STATIC_PATHS)] == startup.WARM_STATIC_PATHS
+    assert f"/api/users/{busiest}/orders" in paths
+    assert paths[-4:] == ["/api/orders/400", "/api/orders/400/items", "/api/orders/399", "/api/orders/399/items"]
+
+def test_start_warms_through_the_app_and_reports_phases(blank_engine, monkeypatch):
+    app = FastAPI()
+    seen = []
+
+    @app.get("/api/items/{item_id}")
+    def item(item_id: int):
+        seen.append(item_id)
+        return {"id": item_id}
+
+    migrate.upgrade_database(blank_engine)
+    monkeypatch.setattr(startup, "report", startup.StartupReport("production"))
+    report = asyncio.run(startup.start(app, blank_engine, blank_engine, mode="production", warm_pool_connections=True))
+    assert set(report.phases) == {"schema", "configure", "pool"}
+    assert report.warmed["connections"] == 2 * blank_engine.pool.size()
+    assert report.ready_seconds is not None and app.openapi_schema is not None
+
+    assert asyncio.run(startup.warm_requests(app, ["/api/items/1", "/api/items/2"])) == 2
+    assert seen == [1, 2]